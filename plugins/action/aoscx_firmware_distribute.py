@@ -0,0 +1,193 @@
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import time
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_firmware_server import (  # NOQA
+    FirmwareServer,
+    get_server_address,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_fleet import (  # NOQA
+    HAS_REQUESTS,
+    SwitchSession,
+    get_hosts,
+    get_json,
+    get_switch,
+    run_parallel,
+    upload_firmware,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_upload import (  # NOQA
+    get_image_version,
+)
+
+display = Display()
+
+ARGUMENT_SPEC = dict(
+    src=dict(type="path", required=True),
+    hosts=dict(type="list", elements="str"),
+    partition_name=dict(
+        type="str", default="primary", choices=["primary", "secondary"]
+    ),
+    vrf=dict(type="str", default="mgmt"),
+    firmware_version=dict(type="str"),
+    force=dict(type="bool", default=False),
+    server_address=dict(type="str"),
+    server_port=dict(type="int", default=0),
+    max_connections=dict(type="int", default=32),
+    max_workers=dict(type="int", default=32),
+    timeout=dict(type="int", default=30),
+    upload_timeout=dict(type="int", default=1800),
+    poll_interval=dict(type="int", default=10),
+)
+
+
+def distribute(switch, url, version, args):
+    """
+    Makes a switch download the image from the controller and waits for the
+        end of the upload.
+    :return: dict with the result of the switch.
+    """
+    partition = args["partition_name"]
+    start = time.time()
+    with SwitchSession(switch, args["timeout"]) as session:
+        firmware = get_json(
+            session, "firmware", "Could not get the firmware information"
+        )
+        current = firmware.get("{0}_version".format(partition))
+        if not args["force"] and version is not None and current == version:
+            return dict(
+                changed=False,
+                firmware_version=current,
+                msg="The {0} partition already holds {1}".format(
+                    partition, version
+                ),
+            )
+
+        upload_firmware(
+            session,
+            url,
+            partition,
+            args["vrf"],
+            timeout=args["upload_timeout"],
+            max_delay=args["poll_interval"],
+        )
+    return dict(
+        changed=True,
+        firmware_version=version,
+        elapsed=round(time.time() - start, 3),
+    )
+
+
+class ActionModule(ActionBase):
+    """
+    Serves a firmware image from the controller and makes many switches
+        download it concurrently.
+    """
+
+    _VALID_ARGS = frozenset(ARGUMENT_SPEC)
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        dummy, args = self.validate_argument_spec(ARGUMENT_SPEC)
+        if not HAS_REQUESTS:
+            return dict(
+                failed=True,
+                msg="The requests python library is required by "
+                "aoscx_firmware_distribute",
+            )
+        src = args["src"]
+        if not os.path.isfile(src):
+            return dict(failed=True, msg="{0} is not a file".format(src))
+
+        try:
+            hosts = get_hosts(args["hosts"], task_vars, self._task.run_once)
+        except ValueError as e:
+            return dict(failed=True, msg=to_text(e))
+        hostvars = task_vars.get("hostvars", {})
+        if not hosts:
+            return dict(changed=False, msg="No hosts")
+        switches = dict(
+            (host, get_switch(host, hostvars[host], self._templar))
+            for host in hosts
+        )
+
+        version = args["firmware_version"] or get_image_version(src)
+        result["firmware_version"] = version
+
+        if self._play_context.check_mode:
+            result.update(changed=False, skipped=True)
+            return result
+
+        server_address = args["server_address"]
+        if server_address is None:
+            server_address = get_server_address(switches[hosts[0]]["host"])
+        server = FirmwareServer(
+            port=args["server_port"],
+            max_connections=args["max_connections"],
+        )
+        url = server.publish(src, server_address)
+        display.vvv("aoscx_firmware_distribute: serving {0}".format(url))
+
+        def log_done(host, status):
+            done.add(host)
+            display.vvv(
+                "aoscx_firmware_distribute: {0} done ({1}/{2})".format(
+                    host, len(done), len(hosts)
+                )
+            )
+
+        done = set()
+        server.start()
+        try:
+            statuses = run_parallel(
+                lambda host: distribute(switches[host], url, version, args),
+                hosts,
+                args["max_workers"],
+                log_done,
+            )
+        finally:
+            server.stop()
+        hosts_result = dict(
+            (host, status.get("result", status))
+            for host, status in statuses.items()
+        )
+
+        failed = sorted(
+            host for host, status in hosts_result.items() if "failed" in status
+        )
+        changed = [
+            host
+            for host, status in hosts_result.items()
+            if status.get("changed")
+        ]
+        result.update(
+            changed=bool(changed),
+            hosts=hosts_result,
+            summary=dict(
+                total=len(hosts),
+                changed=len(changed),
+                unchanged=len(hosts) - len(changed) - len(failed),
+                failed=len(failed),
+                bytes_sent=server.bytes_sent,
+                transfers=server.transfers,
+            ),
+        )
+        if failed:
+            result["failed"] = True
+            result["msg"] = "Upload failed for {0} of {1} hosts: {2}".format(
+                len(failed), len(hosts), ", ".join(failed)
+            )
+        return result
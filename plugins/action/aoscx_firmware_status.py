@@ -0,0 +1,162 @@
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import time
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_fleet import (  # NOQA
+    HAS_REQUESTS,
+    SwitchSession,
+    check_response,
+    get_hosts,
+    get_switch,
+    run_parallel,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_upload import (  # NOQA
+    wait_firmware_upload,
+)
+
+display = Display()
+
+ARGUMENT_SPEC = dict(
+    hosts=dict(type="list", elements="str"),
+    jobs_from=dict(type="str"),
+    wait_timeout=dict(type="int", default=1800),
+    max_delay=dict(type="int", default=60),
+    max_workers=dict(type="int", default=256),
+    timeout=dict(type="int", default=30),
+)
+
+
+def wait_switch(switch, job, args):
+    """
+    Waits for the end of the firmware upload of a switch.
+    :return: dict with the result of the switch.
+    """
+    start = time.time()
+    with SwitchSession(switch, args["timeout"]) as session:
+
+        def get_status():
+            response = session.request("GET", "firmware/status")
+            check_response(response, "Could not get the firmware status")
+            return response.json()
+
+        status, done = wait_firmware_upload(
+            get_status,
+            since=job.get("since"),
+            timeout=args["wait_timeout"],
+            max_delay=args["max_delay"],
+        )
+    if not done:
+        raise ValueError(
+            "Firmware upload didn't finish in {0} seconds".format(
+                args["wait_timeout"]
+            )
+        )
+    if status["status"] == "failure":
+        raise ValueError(
+            "Firmware upload failed: {0}".format(status.get("reason"))
+        )
+    return dict(
+        status=status["status"],
+        firmware_version=job.get("firmware_version"),
+        elapsed=round(time.time() - start, 3),
+    )
+
+
+class ActionModule(ActionBase):
+    """
+    Waits from the controller for the end of the firmware uploads of many
+        switches.
+    """
+
+    _VALID_ARGS = frozenset(ARGUMENT_SPEC)
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        dummy, args = self.validate_argument_spec(ARGUMENT_SPEC)
+        if not HAS_REQUESTS:
+            return dict(
+                failed=True,
+                msg="The requests python library is required by "
+                "aoscx_firmware_status",
+            )
+
+        try:
+            hosts = get_hosts(args["hosts"], task_vars, self._task.run_once)
+        except ValueError as e:
+            return dict(failed=True, msg=to_text(e))
+        hostvars = task_vars.get("hostvars", {})
+
+        hosts_result = dict()
+        jobs = dict()
+        for host in hosts:
+            if args["jobs_from"] is None:
+                # Without a job, the end of any upload in progress
+                jobs[host] = dict()
+                continue
+            registered = hostvars[host].get(args["jobs_from"]) or {}
+            job = registered.get("job")
+            if job is None:
+                hosts_result[host] = dict(
+                    skipped=True, msg="No firmware upload was started"
+                )
+            else:
+                jobs[host] = job
+
+        if self._play_context.check_mode:
+            result.update(changed=False, skipped=True)
+            return result
+
+        def log_done(host, status):
+            done.add(host)
+            display.vvv(
+                "aoscx_firmware_status: {0} done ({1}/{2})".format(
+                    host, len(done), len(jobs)
+                )
+            )
+
+        done = set()
+        statuses = run_parallel(
+            lambda host: wait_switch(
+                get_switch(host, hostvars[host], self._templar),
+                jobs[host],
+                args,
+            ),
+            list(jobs),
+            args["max_workers"],
+            log_done,
+        )
+        for host, status in statuses.items():
+            hosts_result[host] = status.get("result", status)
+
+        failed = sorted(
+            host for host, status in hosts_result.items() if "failed" in status
+        )
+        result.update(
+            changed=False,
+            hosts=hosts_result,
+            summary=dict(
+                total=len(hosts),
+                succeeded=len(jobs) - len(failed),
+                skipped=len(hosts) - len(jobs),
+                failed=len(failed),
+            ),
+        )
+        if failed:
+            result["failed"] = True
+            result["msg"] = "Upload failed for {0} of {1} hosts: {2}".format(
+                len(failed), len(hosts), ", ".join(failed)
+            )
+        return result
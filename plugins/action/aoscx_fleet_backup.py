@@ -0,0 +1,206 @@
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import json
+import os
+import time
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx import (  # NOQA
+    HAS_ZSTANDARD_LIB,
+    dump_sorted_json,
+    open_output_file,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_backup_store import (  # NOQA
+    BackupStore,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_fleet import (  # NOQA
+    HAS_REQUESTS,
+    SwitchSession,
+    check_response,
+    get_hosts,
+    get_switch,
+    run_parallel,
+)
+
+try:
+    import requests
+except ImportError:
+    pass
+
+display = Display()
+
+ARGUMENT_SPEC = dict(
+    hosts=dict(type="list", elements="str"),
+    config_name=dict(type="str", default="running-config"),
+    dest=dict(type="path"),
+    backup_store=dict(type="path"),
+    sort_json=dict(type="bool", default=True),
+    compression=dict(
+        type="str", default="none", choices=["none", "gzip", "zstd"]
+    ),
+    max_workers=dict(type="int", default=32),
+    timeout=dict(type="int", default=30),
+    retries=dict(type="int", default=2),
+)
+
+COMPRESSION_SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def download_config(switch, config_name, timeout):
+    """
+    Logs in to a switch, downloads a configuration and logs out, with one
+        keep-alive HTTPS connection.
+    """
+    with SwitchSession(switch, timeout) as session:
+        response = session.request(
+            "GET", "fullconfigs/{0}".format(config_name)
+        )
+        check_response(response, "Could not get {0}".format(config_name))
+        return response.json()
+
+
+class ActionModule(ActionBase):
+    """
+    Downloads the configuration of many switches concurrently from the
+        controller.
+    """
+
+    _VALID_ARGS = frozenset(ARGUMENT_SPEC)
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        dummy, args = self.validate_argument_spec(ARGUMENT_SPEC)
+        if not HAS_REQUESTS:
+            return dict(
+                failed=True,
+                msg="The requests python library is required by "
+                "aoscx_fleet_backup",
+            )
+        if args["compression"] == "zstd" and not HAS_ZSTANDARD_LIB:
+            return dict(
+                failed=True,
+                msg="The zstandard python library is required for zstd "
+                "compression",
+            )
+        if not args["dest"] and not args["backup_store"]:
+            return dict(
+                failed=True,
+                msg="one of the following is required: dest, backup_store",
+            )
+
+        try:
+            hosts = get_hosts(args["hosts"], task_vars, self._task.run_once)
+        except ValueError as e:
+            return dict(failed=True, msg=to_text(e))
+        hostvars = task_vars.get("hostvars", {})
+        switches = dict(
+            (host, get_switch(host, hostvars[host], self._templar))
+            for host in hosts
+        )
+
+        if self._play_context.check_mode:
+            result.update(changed=False, skipped=True)
+            return result
+
+        if args["dest"] and not os.path.isdir(args["dest"]):
+            os.makedirs(args["dest"])
+        store = None
+        if args["backup_store"]:
+            store = BackupStore(args["backup_store"])
+
+        def backup(host):
+            start = time.time()
+            attempt = 0
+            while True:
+                try:
+                    config = download_config(
+                        switches[host], args["config_name"], args["timeout"]
+                    )
+                    break
+                except requests.exceptions.RequestException:
+                    if attempt >= args["retries"]:
+                        raise
+                    # Exponential backoff, the switch may be busy or
+                    # rebooting
+                    time.sleep(2**attempt)
+                    attempt += 1
+            # Written as soon as it arrives, the configurations of the
+            # whole fleet are never held in memory
+            status = dict(elapsed=round(time.time() - start, 3))
+            changed = False
+            if args["dest"]:
+                path = os.path.join(
+                    args["dest"],
+                    "{0}.json{1}".format(
+                        host, COMPRESSION_SUFFIXES[args["compression"]]
+                    ),
+                )
+                with open_output_file(
+                    None, path, args["compression"]
+                ) as to_file:
+                    if args["sort_json"]:
+                        dump_sorted_json(config, to_file, indent=4)
+                    else:
+                        json.dump(config, to_file, indent=4)
+                status["path"] = path
+                changed = True
+            if store is not None:
+                version, written = store.save(
+                    host, config, args["config_name"]
+                )
+                status["backup_version"] = version
+                changed = changed or written is not None
+            status["changed"] = changed
+            return status
+
+        def log_failure(host, status):
+            if "failed" in status:
+                display.vvv(
+                    "aoscx_fleet_backup: {0} failed: {1}".format(
+                        host, status["msg"]
+                    )
+                )
+
+        hosts_result = dict(
+            (host, status.get("result", status))
+            for host, status in run_parallel(
+                backup, hosts, args["max_workers"], log_failure
+            ).items()
+        )
+
+        failed = sorted(
+            host for host, status in hosts_result.items() if "failed" in status
+        )
+        changed = [
+            host
+            for host, status in hosts_result.items()
+            if status.get("changed")
+        ]
+        result.update(
+            changed=bool(changed),
+            hosts=hosts_result,
+            summary=dict(
+                total=len(hosts),
+                succeeded=len(hosts) - len(failed),
+                changed=len(changed),
+                failed=len(failed),
+            ),
+        )
+        if failed:
+            result["failed"] = True
+            result["msg"] = "Backup failed for {0} of {1} hosts: {2}".format(
+                len(failed), len(hosts), ", ".join(failed)
+            )
+        return result
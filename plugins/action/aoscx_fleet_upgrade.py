@@ -0,0 +1,440 @@
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import time
+
+from ansible.module_utils._text import to_text
+from ansible.plugins.action import ActionBase
+from ansible.utils.display import Display
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_firmware_server import (  # NOQA
+    FirmwareServer,
+    get_server_address,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_fleet import (  # NOQA
+    HAS_REQUESTS,
+    SwitchSession,
+    boot_firmware,
+    check_response,
+    get_hosts,
+    get_json,
+    get_switch,
+    run_parallel,
+    upload_firmware,
+    wait_vsx_sync,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_upload import (  # NOQA
+    get_image_version,
+)
+
+display = Display()
+
+ARGUMENT_SPEC = dict(
+    src=dict(type="path"),
+    remote_firmware_file_path=dict(type="str"),
+    firmware_version=dict(type="str"),
+    hosts=dict(type="list", elements="str"),
+    partition_name=dict(type="str", choices=["primary", "secondary"]),
+    vrf=dict(type="str", default="mgmt"),
+    force=dict(type="bool", default=False),
+    boot=dict(type="bool", default=True),
+    wave_size=dict(type="int", default=1),
+    max_failures=dict(type="int", default=0),
+    pause=dict(type="int", default=0),
+    server_address=dict(type="str"),
+    server_port=dict(type="int", default=0),
+    max_connections=dict(type="int", default=32),
+    max_workers=dict(type="int", default=32),
+    timeout=dict(type="int", default=30),
+    upload_timeout=dict(type="int", default=1800),
+    boot_timeout=dict(type="int", default=900),
+    poll_interval=dict(type="int", default=30),
+)
+
+VSX_ATTRIBUTES = "device_role,system_mac,keepalive_src_ip,keepalive_peer_ip"
+
+
+def strip_prefix(address):
+    """
+    Returns an IP address without its prefix length.
+    """
+    return address.split("/", 1)[0] if address else address
+
+
+def inspect_switch(switch, version, args):
+    """
+    Reads the firmware and the VSX configuration of a switch, and decides the
+        partition its image is staged to.
+    :return: dict with the state of the switch.
+    """
+    with SwitchSession(switch, args["timeout"]) as session:
+        firmware = get_json(
+            session, "firmware", "Could not get the firmware information"
+        )
+        response = session.request(
+            "GET", "system/vsx?attributes={0}".format(VSX_ATTRIBUTES)
+        )
+        if response.status_code == 404:
+            vsx = None
+        else:
+            check_response(response, "Could not get the VSX configuration")
+            vsx = response.json()
+    partition = args["partition_name"]
+    if partition is None:
+        # The alternate partition, the running image stays as a fallback
+        booted = firmware.get("booted_image", "primary")
+        partition = "secondary" if booted == "primary" else "primary"
+    current = firmware.get("current_version")
+    return dict(
+        current_version=current,
+        partition_name=partition,
+        stage=args["force"]
+        or firmware.get("{0}_version".format(partition)) != version,
+        upgrade=args["force"] or current != version,
+        vsx=vsx,
+    )
+
+
+def get_vsx_peers(states):
+    """
+    Pairs the VSX members among the switches, by their system MAC, or by
+        their keepalive addresses when it isn't configured.
+    :return: dict with the peer of every VSX member whose peer is upgraded.
+    """
+    by_mac = dict()
+    by_keepalive = dict()
+    for host, state in states.items():
+        vsx = state["vsx"]
+        if not vsx:
+            continue
+        if vsx.get("system_mac"):
+            by_mac.setdefault(vsx["system_mac"].lower(), []).append(host)
+        source = strip_prefix(vsx.get("keepalive_src_ip"))
+        if source:
+            by_keepalive[source] = host
+
+    peers = dict()
+    for members in by_mac.values():
+        if len(members) == 2:
+            peers[members[0]], peers[members[1]] = members[1], members[0]
+    for host, state in states.items():
+        vsx = state["vsx"]
+        if not vsx or host in peers:
+            continue
+        peer = by_keepalive.get(strip_prefix(vsx.get("keepalive_peer_ip")))
+        if peer is not None and peer != host and peer not in peers:
+            peers[host], peers[peer] = peer, host
+    return peers
+
+
+def plan_waves(hosts, states, peers, wave_size):
+    """
+    Splits the switches to boot in waves of at most wave_size switches,
+        where the members of a VSX pair are never in the same wave, and the
+        secondary member is booted before the primary one.
+    :return: List of waves, lists of hosts.
+    """
+
+    def is_primary(host):
+        role = (states[host]["vsx"] or {}).get("device_role")
+        peer_role = (states[peers[host]]["vsx"] or {}).get("device_role")
+        return role == "primary" and peer_role != "primary"
+
+    # Primary members move after their secondary peers, the others keep
+    # their order
+    pending = [
+        host for host in hosts if not (host in peers and is_primary(host))
+    ]
+    for host in hosts:
+        if host in peers and is_primary(host):
+            pending.insert(pending.index(peers[host]) + 1, host)
+
+    waves = []
+    while pending:
+        wave = []
+        for host in pending:
+            if len(wave) == wave_size:
+                break
+            if peers.get(host) not in wave:
+                wave.append(host)
+        pending = [host for host in pending if host not in wave]
+        waves.append(wave)
+    return waves
+
+
+def stage_switch(switch, url, state, args):
+    """
+    Makes a switch download the image to the partition it boots from.
+    """
+    with SwitchSession(switch, args["timeout"]) as session:
+        upload_firmware(
+            session,
+            url,
+            state["partition_name"],
+            args["vrf"],
+            timeout=args["upload_timeout"],
+            max_delay=args["poll_interval"],
+        )
+
+
+class ActionModule(ActionBase):
+    """
+    Upgrades the firmware of many switches: stages the image concurrently,
+        then boots the switches in waves and verifies the running version.
+    """
+
+    _VALID_ARGS = frozenset(ARGUMENT_SPEC)
+
+    def run(self, tmp=None, task_vars=None):
+        if task_vars is None:
+            task_vars = dict()
+        result = super(ActionModule, self).run(tmp, task_vars)
+        del tmp
+
+        dummy, args = self.validate_argument_spec(
+            ARGUMENT_SPEC,
+            mutually_exclusive=[("src", "remote_firmware_file_path")],
+            required_one_of=[("src", "remote_firmware_file_path")],
+        )
+        if not HAS_REQUESTS:
+            return dict(
+                failed=True,
+                msg="The requests python library is required by "
+                "aoscx_fleet_upgrade",
+            )
+        src = args["src"]
+        if src is not None and not os.path.isfile(src):
+            return dict(failed=True, msg="{0} is not a file".format(src))
+        version = args["firmware_version"] or get_image_version(
+            src, args["remote_firmware_file_path"]
+        )
+        if version is None:
+            return dict(
+                failed=True,
+                msg="The firmware version can't be read from the image, "
+                "firmware_version is required",
+            )
+        result["firmware_version"] = version
+
+        try:
+            hosts = get_hosts(args["hosts"], task_vars, self._task.run_once)
+        except ValueError as e:
+            return dict(failed=True, msg=to_text(e))
+        hostvars = task_vars.get("hostvars", {})
+        switches = dict(
+            (host, get_switch(host, hostvars[host], self._templar))
+            for host in hosts
+        )
+        hosts_result = dict((host, dict()) for host in hosts)
+        start = time.time()
+
+        # Inspection, nothing is changed before every switch is reachable
+        inspected = run_parallel(
+            lambda host: inspect_switch(switches[host], version, args),
+            hosts,
+            args["max_workers"],
+        )
+        unreachable = sorted(
+            host for host, status in inspected.items() if "failed" in status
+        )
+        if unreachable:
+            for host in unreachable:
+                hosts_result[host] = inspected[host]
+            result.update(
+                failed=True,
+                hosts=hosts_result,
+                msg="Could not inspect {0} of {1} hosts: {2}".format(
+                    len(unreachable), len(hosts), ", ".join(unreachable)
+                ),
+            )
+            return result
+        states = dict(
+            (host, status["result"]) for host, status in inspected.items()
+        )
+        for host, state in states.items():
+            hosts_result[host].update(
+                previous_version=state["current_version"],
+                partition_name=state["partition_name"],
+            )
+        to_upgrade = [host for host in hosts if states[host]["upgrade"]]
+        to_stage = [host for host in to_upgrade if states[host]["stage"]]
+        peers = get_vsx_peers(
+            dict((host, states[host]) for host in to_upgrade)
+        )
+        waves = []
+        if args["boot"]:
+            waves = plan_waves(to_upgrade, states, peers, args["wave_size"])
+        result["waves"] = waves
+
+        if self._play_context.check_mode:
+            result.update(changed=bool(to_upgrade), hosts=hosts_result)
+            return result
+
+        # Staging, on every switch at once
+        failed = set()
+        if to_stage:
+            server = None
+            url = args["remote_firmware_file_path"]
+            if src is not None:
+                server_address = args["server_address"]
+                if server_address is None:
+                    server_address = get_server_address(
+                        switches[to_stage[0]]["host"]
+                    )
+                server = FirmwareServer(
+                    port=args["server_port"],
+                    max_connections=args["max_connections"],
+                )
+                url = server.publish(src, server_address)
+                server.start()
+            try:
+                staged = run_parallel(
+                    lambda host: stage_switch(
+                        switches[host], url, states[host], args
+                    ),
+                    to_stage,
+                    args["max_workers"],
+                )
+            finally:
+                if server is not None:
+                    server.stop()
+            for host, status in staged.items():
+                if "failed" in status:
+                    failed.add(host)
+                    hosts_result[host].update(
+                        failed=True, msg="Staging failed: " + status["msg"]
+                    )
+                else:
+                    hosts_result[host]["staged"] = True
+            display.vvv(
+                "aoscx_fleet_upgrade: staged {0} of {1} hosts".format(
+                    len(to_stage) - len(failed), len(to_stage)
+                )
+            )
+
+        # Boot, one wave after the other
+        upgraded = []
+        boot_failed = set()
+        stopped = False
+        for number, wave in enumerate(waves):
+            if len(failed) > args["max_failures"]:
+                stopped = True
+            ready = []
+            for host in wave:
+                if host in failed:
+                    continue
+                if stopped:
+                    hosts_result[host].update(
+                        skipped=True,
+                        msg="Not booted, the upgrade stopped after {0} "
+                        "failures".format(len(failed)),
+                    )
+                elif peers.get(host) in boot_failed:
+                    # Its peer may be down, booting it could isolate the pair
+                    hosts_result[host].update(
+                        skipped=True,
+                        msg="Not booted, the upgrade of its VSX peer {0} "
+                        "failed".format(peers[host]),
+                    )
+                else:
+                    ready.append(host)
+            # Peers booted in a previous wave are back once they run the new
+            # version, but their ISL, config sync and multi-chassis LAGs may
+            # still be converging
+            syncing = [
+                peers[host] for host in ready if peers.get(host) in upgraded
+            ]
+            synced = run_parallel(
+                lambda host: wait_vsx_sync(
+                    switches[host],
+                    timeout=args["timeout"],
+                    sync_timeout=args["boot_timeout"],
+                    max_delay=args["poll_interval"],
+                ),
+                syncing,
+                args["max_workers"],
+            )
+            for host in list(ready):
+                status = synced.get(peers.get(host), {})
+                if "failed" in status:
+                    ready.remove(host)
+                    hosts_result[host].update(
+                        skipped=True,
+                        msg="Not booted, its VSX peer {0} isn't in sync: "
+                        "{1}".format(peers[host], status["msg"]),
+                    )
+            if not ready:
+                continue
+            if number and args["pause"]:
+                time.sleep(args["pause"])
+            display.vvv(
+                "aoscx_fleet_upgrade: booting wave {0} of {1}: {2}".format(
+                    number + 1, len(waves), ", ".join(ready)
+                )
+            )
+            booted = run_parallel(
+                lambda host: boot_firmware(
+                    switches[host],
+                    states[host]["partition_name"],
+                    version,
+                    timeout=args["timeout"],
+                    boot_timeout=args["boot_timeout"],
+                    max_delay=args["poll_interval"],
+                ),
+                ready,
+                args["max_workers"],
+            )
+            for host, status in booted.items():
+                if "failed" in status:
+                    failed.add(host)
+                    boot_failed.add(host)
+                    hosts_result[host].update(
+                        failed=True, msg="Boot failed: " + status["msg"]
+                    )
+                else:
+                    upgraded.append(host)
+                    hosts_result[host].update(
+                        changed=True, firmware_version=version
+                    )
+
+        for host in hosts:
+            if not states[host]["upgrade"]:
+                hosts_result[host].update(
+                    changed=False, msg="Already running {0}".format(version)
+                )
+            elif not args["boot"] and host not in failed:
+                hosts_result[host]["changed"] = states[host]["stage"]
+
+        changed = [
+            host
+            for host, status in hosts_result.items()
+            if status.get("changed")
+        ]
+        skipped = [
+            host
+            for host, status in hosts_result.items()
+            if "skipped" in status
+        ]
+        result.update(
+            changed=bool(changed),
+            hosts=hosts_result,
+            summary=dict(
+                total=len(hosts),
+                upgraded=len(upgraded),
+                unchanged=len(hosts) - len(to_upgrade),
+                skipped=len(skipped),
+                failed=len(failed),
+                elapsed=round(time.time() - start, 3),
+            ),
+        )
+        if failed:
+            result["failed"] = True
+            result["msg"] = "Upgrade failed for {0} of {1} hosts: {2}".format(
+                len(failed), len(hosts), ", ".join(sorted(failed))
+            )
+        return result
@@ -23,21 +23,59 @@ description: >
   This module provides management of CLI operations in AOS-CX devices.
 author: Aruba Networks (@ArubaNetworks)
 name: 'aoscx'
+options:
+  config_commands:
+    description:
+      - List of commands that change the configuration of the switch without
+        entering configuration mode.
+      - When the network_cli connection has single_user_mode enabled, the
+        output of commands, including the running-config and startup-config,
+        is cached across tasks. The cache is invalidated when the switch
+        enters configuration mode or when one of these commands is sent.
+    type: list
+    elements: str
+    default:
+      - write memory
+      - copy running-config startup-config
+      - copy startup-config running-config
+      - checkpoint auto confirm
+    vars:
+      - name: ansible_aoscx_config_commands
 """
 
+import hashlib
 import json
 import re
 from itertools import chain
 
 from ansible.errors import AnsibleConnectionFailure
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.common._collections_compat import Mapping
 from ansible.plugins.cliconf import CliconfBase, enable_mode
 
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import (  # NOQA
+    ignore_line,
+)
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (  # NOQA
     to_list,
 )
 
+# Prompt printed by the switch after every configuration line, used to split
+# the output of pipelined commands
+CONFIG_PROMPT_RE = re.compile(
+    rb"^[\w\+\-\.:\/\[\]]+(?:\([^\)]+\)){0,3}#", re.M
+)
+
+# Messages of the CLI when a configuration line is rejected
+CONFIG_ERROR_RE = re.compile(
+    r"^\s*%?\s*(?:Invalid input|Incomplete command|Command incomplete"
+    r"|Ambiguous command|Unknown command|Error:)",
+    re.I | re.M,
+)
+
+# Lines of the output, iterated without building a list of all of them
+LINE_RE = re.compile(r"^.*$", re.M)
+
 
 class Cliconf(CliconfBase):
     """
@@ -69,12 +107,108 @@ class Cliconf(CliconfBase):
         return self.send_command(cmd)
 
     @enable_mode
-    def edit_config(self, command):
+    def edit_config(self, command, bulk=False):
         """
         Edit the switch config
+
+        With bulk, the lines are written to the switch at once, without
+        waiting for the prompt after each of them, and their output is
+        checked for errors afterwards.
+        """
+        if not bulk:
+            for cmd in chain(
+                ["configure terminal"], to_list(command), ["end"]
+            ):
+                self.send_command(cmd)
+            return
+
+        commands = to_list(command)
+        self.send_command("configure terminal")
+        try:
+            output = self._send_pipelined(commands)
+        finally:
+            self.send_command("end")
+
+        # The errors of the CLI, and the ones of terminal_stderr_re that
+        # would have failed the lines sent one at a time
+        stderr_re = self._connection._get_terminal_std_re("terminal_stderr_re")
+        for cmd, response in zip(commands, output):
+            if CONFIG_ERROR_RE.search(response) or any(
+                regex.search(to_bytes(response)) for regex in stderr_re
+            ):
+                raise AnsibleConnectionFailure(
+                    "command '{0}' failed: {1}. The lines following it were "
+                    "also sent to the switch".format(cmd, response.strip())
+                )
+
+    def _send_pipelined(self, commands):
+        """
+        Writes all the commands, then reads until the switch printed a prompt
+        for each of them. Returns the output of every command.
+
+        The connection stops reading at the first output matching
+        terminal_stderr_re, leaving the output of the next commands unread
+        for the following command, so errors are only looked for once all
+        the output was read.
         """
-        for cmd in chain(["configure terminal"], to_list(command), ["end"]):
-            self.send_command(cmd)
+        stderr_re = self._connection.get_option("terminal_stderr_re")
+        # A pattern that never matches, an empty list means the default ones
+        self._connection.set_option(
+            "terminal_stderr_re", [{"pattern": "(?!)"}]
+        )
+        try:
+            for cmd in commands:
+                self._connection.send(to_bytes(cmd), sendonly=True)
+
+            received = b""
+            while len(CONFIG_PROMPT_RE.findall(received)) < len(commands):
+                received += b"\n" + to_bytes(
+                    self._connection.receive(strip_prompt=False)
+                )
+        finally:
+            self._connection.set_option("terminal_stderr_re", stderr_re)
+
+        # The echo of a command follows the prompt of the previous one, the
+        # first segment holds the echo and the output of each command
+        output = []
+        for segment in CONFIG_PROMPT_RE.split(received)[: len(commands)]:
+            lines = to_text(segment, errors="surrogate_or_strict")
+            output.append("\n".join(lines.strip().splitlines()[1:]))
+        return output
+
+    @enable_mode
+    def get_config_checksum(self, source="running", ignore_lines=None):
+        """
+        Returns the SHA-1 of the running or startup config, the same as the
+        sha1 of a NetworkConfig of it. AOS-CX has no CLI command returning a
+        checksum of the configs, so the full config is still fetched from the
+        switch over SSH; it is hashed by the connection, and only the 40
+        character digest, instead of the whole config, crosses to the module.
+        """
+        if source not in ("running", "startup"):
+            return self.invalid_params(
+                "fetching configuration from {0} is"
+                " not supported".format(source)
+            )
+        patterns = [re.compile(line) for line in ignore_lines or []]
+        output = to_text(
+            self.send_command("show {0}-config".format(source)),
+            errors="surrogate_or_strict",
+        )
+        sha1 = hashlib.sha1()
+        separator = b""
+        for match in LINE_RE.finditer(output):
+            line = match.group(0)
+            text = re.sub(r"[{};]", "", line).strip()
+            if (
+                not text
+                or ignore_line(text)
+                or any(pattern.match(text) for pattern in patterns)
+            ):
+                continue
+            sha1.update(separator + to_bytes(line))
+            separator = b"\n"
+        return sha1.hexdigest()
 
     def get(
         self,
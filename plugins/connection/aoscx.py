@@ -12,6 +12,12 @@ name: aoscx
 short_description: Use pyaocx to run commands on AOS-CX switches
 description: >
   This connection plugin provides a REST API connection to AOS-CX switches.
+  The persistent connection keeps its HTTPS connections to the switch alive
+  and modules send their REST requests through it, so the TLS handshake is
+  done once per play instead of once per task. The platform, firmware
+  versions and capabilities of the switch are cached until the connection
+  is closed, the firmware is uploaded or booted, or the system table or any
+  resource below it is written.
 options:
   host:
     description: >
@@ -131,13 +137,24 @@ options:
     type: string
 """
 
+import json
+
+from threading import Lock
+
 from ansible.errors import AnsibleConnectionFailure, AnsibleError
+from ansible.module_utils._text import to_text
 from ansible.plugins.connection import (
     NetworkConnectionBase,
     ensure_connect,
 )
 from ansible.module_utils.six import PY3
 
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_batch import (  # NOQA
+    DEFAULT_MAX_WORKERS,
+    run_batch,
+    validate_operation,
+)
+
 try:
     from pyaoscx.session import Session
     from pyaoscx.exceptions.login_error import LoginError
@@ -150,12 +167,33 @@ except ImportError:
 
 try:
     from requests.utils import dict_from_cookiejar
+    from urllib.parse import parse_qs, urlsplit
 
     HAS_REQUESTS = True
 except ImportError:
     HAS_REQUESTS = False
 
 
+# Status attributes of the system table that only change with a firmware
+# upload or a boot, GET requests limited to them are served from the device
+# cache. Others, like mgmt_intf_status or admin_password_set, change while the
+# switch is running and are never cached
+DEVICE_STATUS_ATTRIBUTES = [
+    "boot_time",
+    "capabilities",
+    "capacities",
+    "platform_name",
+    "software_images",
+    "software_info",
+    "software_version",
+    "qos_defaults",
+]
+
+# Writes to these resources, or below them, change the cached device
+# information
+DEVICE_INFO_RESOURCES = ["boot", "firmware", "system"]
+
+
 class Connection(NetworkConnectionBase):
     """PYAOSCX connections"""
 
@@ -171,6 +209,8 @@ class Connection(NetworkConnectionBase):
         self.use_proxy = True
         self.__username = None
         self.__password = None
+        self._login_lock = Lock()
+        self._device_cache = {}
         if hasattr(self, "_sub_plugin"):
             self._sub_plugin["type"] = "external"
             self._sub_plugin["name"] = "aoscx"
@@ -209,19 +249,20 @@ class Connection(NetworkConnectionBase):
             self.use_proxy = self.get_option("use_proxy")
             rest_version = self.get_option("rest_version")
             if rest_version not in ["10.04", "10.08", "10.09"]:
-                raise AnsibleConnectionFailure("Invalid REST version: %s"
-                                               % rest_version)
-            self.base_url = "https://{0}/rest/v{1}/".format(switchip, rest_version)
+                raise AnsibleConnectionFailure(
+                    "Invalid REST version: %s" % rest_version
+                )
+            self.base_url = "https://{0}/rest/v{1}/".format(
+                switchip, rest_version
+            )
             # Set Credentials
             self.__username = username
             self.__password = password
 
-            try:
-                self.session = Session.login(
-                    self.base_url, username, password, self.use_proxy, True
-                )
-            except LoginError as err:
-                raise AnsibleConnectionFailure(err.message)
+            self._login()
+            # The switch may have been rebooted or upgraded while
+            # disconnected
+            self._device_cache.clear()
             self.queue_message(
                 "vvvv",
                 "created pyaoscx connection for network_os %s"
@@ -229,6 +270,22 @@ class Connection(NetworkConnectionBase):
             )
             self._connected = True
 
+    def _login(self):
+        """
+        Log in to the switch, the resulting requests session keeps its
+        HTTPS connections alive and is reused by every task of the play
+        """
+        try:
+            self.session = Session.login(
+                self.base_url,
+                self.__username,
+                self.__password,
+                self.use_proxy,
+                True,
+            )
+        except LoginError as err:
+            raise AnsibleConnectionFailure(err.message)
+
     @ensure_connect
     def get_session(self):
         cookies = dict_from_cookiejar(self.session.cookies)
@@ -244,6 +301,180 @@ class Connection(NetworkConnectionBase):
             ),
         )
 
+    @ensure_connect
+    def rest_request(
+        self, method, path, params=None, data=None, headers=None, verify=False
+    ):
+        """
+        Perform a REST request through the persistent, pooled session, so
+        modules don't pay a TCP and TLS handshake per task
+        :param method: HTTP method: GET, PUT, POST, PATCH or DELETE.
+        :param path: Full URL or path relative to the REST base URL.
+        :param params: Query parameters of the request.
+        :param data: Body of the request, as text.
+        :param headers: Headers specific to this request.
+        :param verify: Whether the certificate of the switch is validated.
+        :return: dict with the status code, reason, headers and text of the
+            response.
+        """
+        if not path.startswith("https://"):
+            path = self.base_url + path.lstrip("/")
+        method = method.upper()
+        cache_key = self._device_cache_key(method, path, params)
+        if cache_key in self._device_cache:
+            return self._device_cache[cache_key]
+        request_args = dict(
+            params=params, data=data, headers=headers, verify=verify
+        )
+        response = self.session.request(method, path, **request_args)
+        if response.status_code == 401:
+            # The session cookie expired or was logged out by a module,
+            # login again and retry once
+            self.queue_message("vvvv", "REST session expired, login again")
+            with self._login_lock:
+                self._login()
+            response = self.session.request(method, path, **request_args)
+        reply = dict(
+            status_code=response.status_code,
+            reason=response.reason,
+            headers=dict(response.headers),
+            text=response.text,
+            url=response.url,
+        )
+        if cache_key is not None and response.status_code == 200:
+            self._device_cache[cache_key] = reply
+        elif method != "GET" and self._device_cache:
+            resource = self._resource(path)
+            if resource.split("/")[0] in DEVICE_INFO_RESOURCES:
+                self.invalidate_device_info()
+        return reply
+
+    def _resource(self, url):
+        """
+        Returns the path of a URL relative to the REST base URL
+        """
+        path = urlsplit(url).path
+        base_path = urlsplit(self.base_url).path
+        if path.startswith(base_path):
+            path = path[len(base_path) :]
+        return path.strip("/")
+
+    def _device_cache_key(self, method, url, params):
+        """
+        Returns the cache key of a request for device information: firmware
+        versions, platform, capabilities and capacities, which only change
+        with a firmware upgrade. Returns None for any other request.
+        """
+        if method != "GET":
+            return None
+        resource = self._resource(url)
+        query = parse_qs(urlsplit(url).query)
+        for name, value in (params or {}).items():
+            query[name] = [str(value)]
+        if resource == "firmware" and not query:
+            cacheable = True
+        elif resource == "system":
+            attributes = query.get("attributes", [""])[0]
+            cacheable = (
+                attributes != ""
+                and "selector" not in query
+                and all(
+                    attribute in DEVICE_STATUS_ATTRIBUTES
+                    for attribute in attributes.split(",")
+                )
+            )
+        else:
+            cacheable = False
+        if not cacheable:
+            return None
+        return json.dumps([resource, query], sort_keys=True)
+
+    @ensure_connect
+    def get_device_info(self, refresh=False):
+        """
+        Returns the information of the switch used by modules to check
+        what it supports, cached for the whole play
+        :param refresh: Whether the cached information is retrieved again.
+        :return: dict with the platform name, firmware versions, REST version,
+            capabilities and capacities of the switch.
+        """
+        if refresh:
+            self.invalidate_device_info()
+        firmware = self.rest_request("GET", "firmware")
+        system = self.rest_request(
+            "GET",
+            "system",
+            params=dict(
+                depth=1, attributes=",".join(DEVICE_STATUS_ATTRIBUTES)
+            ),
+        )
+        for reply in (firmware, system):
+            if reply["status_code"] != 200:
+                raise AnsibleConnectionFailure(
+                    "Unable to retrieve device information: {0} {1}".format(
+                        reply["status_code"], reply["text"]
+                    )
+                )
+        firmware = json.loads(firmware["text"])
+        system = json.loads(system["text"])
+        return dict(
+            platform_name=system.get("platform_name"),
+            firmware_version=firmware.get("current_version"),
+            firmware=firmware,
+            rest_version=self.get_option("rest_version"),
+            capabilities=system.get("capabilities", []),
+            capacities=system.get("capacities", {}),
+        )
+
+    def invalidate_device_info(self):
+        """
+        Clears the cached device information, modules changing the firmware
+        or booting the switch call it
+        """
+        self.queue_message("vvvv", "device information cache cleared")
+        self._device_cache.clear()
+
+    @ensure_connect
+    def send_batch(
+        self,
+        operations,
+        concurrent=False,
+        max_workers=DEFAULT_MAX_WORKERS,
+        independent=False,
+    ):
+        """
+        Perform several REST requests in a single call to the persistent
+        connection, saving one round-trip over its socket per request
+        :param operations: List of dicts with method, path and optionally
+            params, data and headers, see rest_request.
+        :param concurrent: Whether consecutive GET operations are sent
+            concurrently over the connection pool.
+        :param max_workers: Maximum number of concurrent GET operations.
+        :param independent: Whether none of the operations depends on
+            another, then writes are also sent concurrently.
+        :return: List with, for every operation and in the same order, the
+            rest_request result or a dict with the error message.
+        """
+
+        def execute(operation):
+            error = validate_operation(operation)
+            if error:
+                return dict(error=error)
+            try:
+                return self.rest_request(
+                    operation.get("method", "GET").upper(),
+                    operation["path"],
+                    params=operation.get("params"),
+                    data=operation.get("data"),
+                    headers=operation.get("headers"),
+                )
+            except Exception as exc:
+                return dict(error=to_text(exc))
+
+        return run_batch(
+            operations, execute, concurrent, max_workers, independent
+        )
+
     def close(self):
         if self.session is not None:
             login_session = dict(
@@ -258,4 +489,5 @@ class Connection(NetworkConnectionBase):
             self.use_proxy = None
             self.session = None
             self.base_url = None
+            self._device_cache.clear()
         super(Connection, self).close()
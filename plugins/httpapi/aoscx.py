@@ -31,6 +31,7 @@ options:
 
 import json
 import os
+import re
 
 from ansible.module_utils._text import to_text
 from ansible.module_utils.connection import ConnectionError
@@ -38,12 +39,23 @@ from ansible.module_utils.parsing.convert_bool import boolean
 from ansible.module_utils.six.moves.urllib.error import HTTPError
 from ansible.plugins.httpapi import HttpApiBase
 
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_batch import (  # NOQA
+    DEFAULT_MAX_WORKERS,
+    run_batch,
+    validate_operation,
+)
+
 # Removed the exception handling as only required pre 2.8 and collection is
 # supported in >= 2.9
 from ansible.utils.display import Display
 
 display = Display()
 
+# Writes to these REST resources change the cached device information
+DEVICE_INFO_WRITE_RE = re.compile(
+    r"^/rest/v[^/]+/(boot|firmware|system(\?|$))"
+)
+
 
 class HttpApi(HttpApiBase):
     def set_no_proxy(self):
@@ -57,6 +69,8 @@ class HttpApi(HttpApiBase):
 
     def login(self, username, password):
         self.set_no_proxy()
+        # The switch may have been rebooted or upgraded since the last login
+        self.invalidate_device_info()
         path = "/rest/v1/login?username={0}&password={1}".format(
             username, password
         )
@@ -78,6 +92,10 @@ class HttpApi(HttpApiBase):
 
         if self.connection._auth:
             headers.update(self.connection._auth)
+        if message_kwargs["method"] != "GET" and DEVICE_INFO_WRITE_RE.match(
+            message_kwargs["path"]
+        ):
+            self.invalidate_device_info()
         response, response_data = self.connection.send(
             data=data,
             headers=headers,
@@ -86,6 +104,66 @@ class HttpApi(HttpApiBase):
         )
         return self.handle_response(response, response_data)
 
+    def send_batch(
+        self, operations, concurrent=False, max_workers=DEFAULT_MAX_WORKERS
+    ):
+        """
+        Send several REST requests in a single call to the persistent
+        connection. Operations are dicts with method, path and optionally
+        data and headers. Consecutive GET operations can be sent concurrently.
+        Returns, for every operation and in the same order, a dict with the
+        response, or with the error message and code.
+        """
+
+        def execute(operation):
+            error = validate_operation(operation)
+            if error:
+                return dict(error=error)
+            try:
+                response = self.send_request(
+                    operation.get("data"),
+                    path=operation["path"],
+                    method=operation.get("method", "GET").upper(),
+                    headers=dict(operation.get("headers") or {}),
+                )
+            except ConnectionError as exc:
+                return dict(
+                    error=to_text(exc), code=getattr(exc, "code", None)
+                )
+            return dict(response=response)
+
+        return run_batch(operations, execute, concurrent, max_workers)
+
+    def get_device_info(self, refresh=False):
+        """
+        Returns the platform name, firmware versions and REST version of the
+        switch, retrieved once and cached for the following tasks.
+        """
+        device_info = getattr(self, "_device_info", None)
+        if refresh or not device_info:
+            system = self.send_request(
+                None,
+                path="/rest/v1/system?attributes=platform_name",
+                method="GET",
+            )
+            firmware = self.send_request(
+                None, path="/rest/v1/firmware", method="GET"
+            )
+            device_info = dict(
+                platform_name=system["platform_name"],
+                firmware_version=firmware["current_version"],
+                firmware=firmware,
+                rest_version="1",
+            )
+            self._device_info = device_info
+        return device_info
+
+    def invalidate_device_info(self):
+        """
+        Clears the cached device information.
+        """
+        self._device_info = None
+
     def get_connection_details(self):
         connection_details = {}
         if self.connection._auth:
@@ -10,6 +10,7 @@ from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
 import copy
+import gzip
 import json
 import re
 import traceback
@@ -20,6 +21,10 @@ from ansible.module_utils._text import to_text
 from ansible.module_utils.basic import env_fallback
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.basic import missing_required_lib
+from ansible.module_utils.common._collections_compat import (
+    MutableMapping,
+    MutableSequence,
+)
 from ansible.module_utils.connection import Connection, ConnectionError
 
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.utils import (  # NOQA
@@ -27,6 +32,10 @@ from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.u
     ComplexList,
 )
 
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_upload import (  # NOQA
+    upload_file,
+    wait_firmware_upload,
+)
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_ztp import (  # NOQA
     connect_ztp_device,
 )
@@ -40,8 +49,16 @@ except ImportError:
     HAS_REQUESTS_LIB = False
     REQUESTS_IMP_ERR = traceback.format_exc()
 
+ZSTANDARD_IMP_ERR = None
+try:
+    import zstandard
+
+    HAS_ZSTANDARD_LIB = True
+except ImportError:
+    HAS_ZSTANDARD_LIB = False
+    ZSTANDARD_IMP_ERR = traceback.format_exc()
+
 _DEVICE_CONNECTION = None
-_DEVICE_CONFIGS = {}
 _DEVICE_ZTP = False
 
 aoscx_provider_spec = {
@@ -90,7 +107,8 @@ def get_provider_argspec():
 
 def get_config(module, flags=None):
     """
-    Obtains the switch configuration
+    Obtains the switch configuration, with single_user_mode the connection
+    caches it across tasks until the configuration changes.
     """
     flags = [] if flags is None else flags
 
@@ -99,46 +117,46 @@ def get_config(module, flags=None):
     cmd = cmd.strip()
 
     try:
-        return _DEVICE_CONFIGS[cmd]
-    except KeyError:
-        try:
-            out = exec_command(module, cmd)
-        except ConnectionError as exc:
-            module.fail_json(
-                msg="unable to retrieve current config",
-                err=to_text(exc, errors="surrogate_then_replace"),
-            )
+        out = exec_command(module, cmd)
+    except ConnectionError as exc:
+        module.fail_json(
+            msg="unable to retrieve current config",
+            err=to_text(exc, errors="surrogate_then_replace"),
+        )
 
-        cfg = to_text(out, errors="surrogate_then_replace").strip()
-        _DEVICE_CONFIGS[cmd] = cfg
-        return cfg
+    return to_text(out, errors="surrogate_then_replace").strip()
 
 
-def load_config(module, commands):
+def get_config_checksum(module, source="running", ignore_lines=None):
     """
-    Loads the configuration onto the switch
+    Obtains the SHA-1 of the running or startup config, computed by the
+    connection so the configuration isn't sent to the module
     """
     try:
-        out = exec_command(module, "configure terminal")
+        return create_ssh_connection(module).get_config_checksum(
+            source=source, ignore_lines=ignore_lines
+        )
     except ConnectionError as exc:
         module.fail_json(
-            msg="unable to enter configuration mode",
+            msg="unable to retrieve {0} config checksum".format(source),
             err=to_text(exc, errors="surrogate_then_replace"),
         )
 
-    for command in to_list(commands):
-        if command == "end":
-            continue
 
-        try:
-            out = exec_command(module, command)
-        except ConnectionError as exc:
-            module.fail_json(
-                msg="unable to enter configuration mode",
-                err=to_text(exc, errors="surrogate_then_replace"),
-            )
-
-    exec_command(module, "end")
+def load_config(module, commands, bulk=False):
+    """
+    Loads the configuration onto the switch, with a single call to the
+    connection. With bulk, the lines are pipelined to the switch instead of
+    waiting for the prompt after each of them.
+    """
+    commands = [command for command in to_list(commands) if command != "end"]
+    try:
+        create_ssh_connection(module).edit_config(command=commands, bulk=bulk)
+    except ConnectionError as exc:
+        module.fail_json(
+            msg="unable to load configuration",
+            err=to_text(exc, errors="surrogate_then_replace"),
+        )
 
 
 def exec_command(module, command):
@@ -160,19 +178,49 @@ def sanitize(resp):
     return "\n".join(cleaned).strip()
 
 
+_encode_json_string = json.encoder.encode_basestring_ascii
+_NATURAL_SORT_RE = re.compile(r"\.*(\d+)$")
+_NATURAL_SORT_KEYS = {}
+
+
 def natural_sort_key(s):
     """
     Sort function for natural sort of alphanumeric values instead of ASCII
     :param s: str to be sorted
     :return: value to be compared
     """
-    _nsre = re.compile(r"\.*(\d+)$")
-    if "%2F" in s:
-        s = s.replace("%2F", "")
-    return [
-        int(text) if text.isdigit() else text.lower()
-        for text in re.split(_nsre, s)
+    try:
+        return _NATURAL_SORT_KEYS[s]
+    except KeyError:
+        pass
+    text = s.replace("%2F", "") if "%2F" in s else s
+    key = [
+        int(part) if part.isdigit() else part.lower()
+        for part in _NATURAL_SORT_RE.split(text)
     ]
+    # Config keys (interfaces, VLANs, attributes) repeat a lot
+    if len(_NATURAL_SORT_KEYS) < 65536:
+        _NATURAL_SORT_KEYS[s] = key
+    return key
+
+
+def _list_sort_key(value):
+    """
+    Sort key of list items: numbers, then strings in natural order, then
+    dicts and lists by their canonical JSON, so any list sorts the same way
+    every time.
+    """
+    if value is None:
+        return (0, 0)
+    if isinstance(value, (bool, int, float)):
+        return (1, value)
+    if isinstance(value, str):
+        return (2, natural_sort_key(value))
+    return (3, "".join(_iter_sorted_json(value, None, 0)))
+
+
+def _sorted_items(obj):
+    return sorted(obj.items(), key=lambda item: natural_sort_key(item[0]))
 
 
 def comp_sort(obj):
@@ -181,26 +229,98 @@ def comp_sort(obj):
     :param obj: dict or list to be sorted
     :return: dict or list sorted
     """
-    data = OrderedDict()
     if isinstance(obj, dict):
-        for key, value in sorted(
-            obj.items(), key=lambda x: natural_sort_key(x[0])
-        ):
-            if isinstance(value, dict) or isinstance(value, list):
-                data[key] = comp_sort(value)
-            else:
-                data[key] = value
+        return OrderedDict(
+            (key, comp_sort(value)) for key, value in _sorted_items(obj)
+        )
+    if isinstance(obj, list):
+        return [comp_sort(value) for value in sorted(obj, key=_list_sort_key)]
+    return obj
+
+
+def _encode_json(value):
+    if isinstance(value, str):
+        return _encode_json_string(value)
+    return json.dumps(value)
+
+
+def _iter_sorted_json(obj, indent, level):
+    """
+    Yields the chunks of the JSON of obj sorted like comp_sort, formatted
+    like json.dumps with the same indent.
+    """
+    if isinstance(obj, dict):
+        items = _sorted_items(obj)
+        iterator = ((_encode_json(key) + ": ", value) for key, value in items)
+        opening, closing = "{", "}"
     elif isinstance(obj, list):
-        try:
-            return sorted(obj, key=natural_sort_key)
-        except Exception:
-            is_dict_or_list = isinstance(value, dict) or isinstance(
-                value, list
+        iterator = (("", value) for value in sorted(obj, key=_list_sort_key))
+        opening, closing = "[", "]"
+    else:
+        yield _encode_json(obj)
+        return
+    if not obj:
+        yield opening + closing
+        return
+    if indent is None:
+        separator, newline, end = ", ", "", ""
+    else:
+        newline = "\n" + " " * (indent * (level + 1))
+        separator = "," + newline
+        end = "\n" + " " * (indent * level)
+    yield opening + newline
+    first = True
+    for prefix, value in iterator:
+        if not first:
+            yield separator
+        first = False
+        yield prefix
+        for chunk in _iter_sorted_json(value, indent, level + 1):
+            yield chunk
+    yield end + closing
+
+
+def dump_sorted_json(obj, stream, indent=4):
+    """
+    Writes obj as JSON to a file object, with dicts and lists sorted like
+    comp_sort, without building the sorted copy of obj or its whole JSON
+    text in memory. The output is the same as json.dump(comp_sort(obj)).
+    :param obj: dict or list to be written
+    :param stream: file object opened for writing text
+    :param indent: indentation of the JSON, None for a single line
+    """
+    buffered = []
+    size = 0
+    for chunk in _iter_sorted_json(obj, indent, 0):
+        buffered.append(chunk)
+        size += len(chunk)
+        if size >= 65536:
+            stream.write("".join(buffered))
+            buffered = []
+            size = 0
+    stream.write("".join(buffered))
+
+
+def open_output_file(module, path, compression="none"):
+    """
+    Opens a local file for writing text, compressed while it is written so
+    large outputs are never held in memory or stored uncompressed.
+    :param module: Ansible module, failed if zstandard is missing
+    :param path: path of the file
+    :param compression: none, gzip or zstd
+    :return: file object
+    """
+    if compression == "gzip":
+        # Level 6, like the gzip tool, 9 is much slower for little gain
+        return gzip.open(path, "wt", compresslevel=6)
+    if compression == "zstd":
+        if not HAS_ZSTANDARD_LIB:
+            module.fail_json(
+                msg=missing_required_lib("zstandard"),
+                exception=ZSTANDARD_IMP_ERR,
             )
-            return [
-                comp_sort(value) if is_dict_or_list else value for value in obj
-            ]
-    return data
+        return zstandard.open(path, "wt")
+    return open(path, "w")
 
 
 class HttpApi:
@@ -248,6 +368,20 @@ class HttpApi:
             data=data, method="POST", path=url, headers=headers
         )
 
+    def send_batch(self, operations, concurrent=False):
+        """
+        Several REST calls in one round-trip to the persistent connection
+        """
+        return self._connection.send_batch(
+            operations=operations, concurrent=concurrent
+        )
+
+    def get_device_info(self, refresh=False):
+        """
+        Platform and firmware of the switch, cached by the connection
+        """
+        return self._connection.get_device_info(refresh=refresh)
+
     def file_upload(self, url, files, headers=None):
         """
         Workaround with requests library for lack of support in httpapi for
@@ -268,71 +402,37 @@ class HttpApi:
         connection_details = self._connection.get_connection_details()
 
         full_url = connection_details["url"] + url
-        with open(files, "rb") as file:
-            file_param = {"fileupload": file}
-
-            # Get Credentials
-            user = connection_details["remote_user"]
-            password = connection_details["password"]
-
-            # Workaround for setting no_proxy based off acx_no_proxy flag
-            if connection_details["no_proxy"]:
-                proxies = {"http": None, "https": None}
-                # Using proxies
-                # Perform Login
-                response_login = requests.post(
-                    connection_details["url"]
-                    + "/rest/v1/login?username={0}&password={1}".format(
-                        user, password
-                    ),
-                    verify=False,
-                    timeout=5,
-                    proxies=proxies,
-                )
-                # Perform File Upload
-                res = requests.post(
-                    url=full_url,
-                    files=file_param,
-                    verify=False,
-                    proxies=proxies,
-                    cookies=response_login.cookies,
-                )
-                # Perform Logout
-                response_logout = requests.post(
-                    connection_details["url"] + "/rest/v1/logout",
-                    verify=False,
-                    proxies=proxies,
-                    cookies=response_login.cookies,
-                )
-
-            else:
-                # No proxies
-                # Perform Login
-                response_login = requests.post(
-                    connection_details["url"]
-                    + "/rest/v1/login?username={0}&password={1}".format(
-                        user, password
-                    ),
-                    verify=False,
-                    timeout=5,
-                )
-                # Perform File Upload
-                res = requests.post(
-                    url=full_url,
-                    files=file_param,
-                    verify=False,
-                    cookies=response_login.cookies,
-                )
-                # Perform Logout
-                response_logout = requests.post(
-                    connection_details["url"] + "/rest/v1/logout",
-                    verify=False,
-                    cookies=response_login.cookies,
-                )
+
+        # Get Credentials
+        user = connection_details["remote_user"]
+        password = connection_details["password"]
+
+        # Login, upload and logout share one session and its connection, the
+        # file is streamed from disk instead of being loaded in memory
+        session = requests.Session()
+        session.verify = False
+        # Workaround for setting no_proxy based off acx_no_proxy flag
+        if connection_details["no_proxy"]:
+            session.trust_env = False
+        try:
+            # Perform Login
+            session.post(
+                connection_details["url"] + "/rest/v1/login",
+                params=dict(username=user, password=password),
+                timeout=5,
+            )
+            # Perform File Upload
+            res, dummy = upload_file(session, full_url, files, headers=headers)
+            # Perform Logout
+            session.post(connection_details["url"] + "/rest/v1/logout")
+        finally:
+            session.close()
 
         if res.status_code != 200:
             error_text = "Error while uploading firmware"
             raise ConnectionError(error_text, code=res.status_code)
+        # The upload bypassed the connection, clear its cached firmware
+        self._connection.invalidate_device_info()
         return res
 
 
@@ -401,6 +501,24 @@ def post(module, url, data=None, headers=None):
     return res
 
 
+def send_batch(module, operations, concurrent=False):
+    """
+    Perform several REST calls, each operation is a dict with method, path
+    and optionally data and headers
+    """
+    conn = get_connection(module)
+    res = conn.send_batch(operations, concurrent)
+    return res
+
+
+def get_device_info(module, refresh=False):
+    """
+    Returns the platform and firmware of the switch, cached by the connection
+    """
+    conn = get_connection(module)
+    return conn.get_device_info(refresh)
+
+
 def file_upload(module, url, files, headers=None):
     """
     Upload File through REST
@@ -442,6 +560,242 @@ def run_commands(module, commands, check_rc=False):
         module.fail_json(msg=to_text(exc))
 
 
+_MISSING = object()
+
+
+def _lookup(data, path):
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return _MISSING
+    return data
+
+
+class _TrackedContainer(object):
+    """
+    Copy-on-write view of a dict or list of a configuration document. The
+    document is never modified, the containers along the path of a change
+    are copied the first time they are modified, everything else is shared
+    with the document. The paths changed are recorded by the root. Views
+    are dicts and lists holding the current values, so they can be
+    serialized and checked like the document.
+    """
+
+    def __init__(self, data, parent=None, key=None):
+        self._data = data
+        self._parent = parent
+        self._key = key
+        self._copied = False
+        self._children = {}
+        if parent is None:
+            self._root = self
+            self._original = data
+            self._changes = set()
+        else:
+            self._root = parent._root
+
+    @property
+    def data(self):
+        """
+        Current value, plain dicts and lists sharing the unchanged parts
+        with the original document
+        """
+        return self._data
+
+    def _path(self):
+        path = []
+        node = self
+        while node._parent is not None:
+            path.append(node._key)
+            node = node._parent
+        return tuple(reversed(path))
+
+    def _own(self):
+        if self._copied:
+            return
+        if self._parent is not None:
+            self._parent._own()
+        self._data = copy.copy(self._data)
+        if self._parent is not None:
+            self._parent._data[self._key] = self._data
+            self._parent._store(self._key)
+        self._copied = True
+
+    def _record(self, key=_MISSING):
+        if self._root is None:
+            return
+        path = self._path()
+        if key is not _MISSING:
+            path += (key,)
+        self._root._changes.add(path)
+
+    def _wrap(self, key, value):
+        if not isinstance(value, (dict, list)):
+            return value
+        child = self._children.get(key)
+        if child is None or child._data is not value:
+            cls = TrackedDict if isinstance(value, dict) else TrackedList
+            child = cls(value, self, key)
+            self._children[key] = child
+        return child
+
+    def _detach(self, key=None):
+        """
+        Detaches the views of children about to be replaced, all of them
+        when key is None, further changes through them are not tracked.
+        """
+        keys = list(self._children) if key is None else [key]
+        for name in keys:
+            child = self._children.pop(name, None)
+            if child is not None:
+                child._own()
+                child._parent = None
+                child._root = None
+
+    def __copy__(self):
+        return copy.copy(self._data)
+
+    def __deepcopy__(self, memo):
+        return copy.deepcopy(self._data, memo)
+
+    def __eq__(self, other):
+        if isinstance(other, _TrackedContainer):
+            other = other._data
+        return self._data == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return repr(self._data)
+
+    def changed_paths(self):
+        """
+        Returns the paths whose value differs from the original document.
+        """
+        return sorted(
+            (
+                path
+                for path in self._root._changes
+                if _lookup(self._root._original, path)
+                != _lookup(self._root._data, path)
+            ),
+            key=repr,
+        )
+
+    def is_modified(self):
+        """
+        Whether the document differs from the original one, only the
+        changed paths are compared.
+        """
+        return any(
+            _lookup(self._root._original, path)
+            != _lookup(self._root._data, path)
+            for path in self._root._changes
+        )
+
+
+def _unwrap(value):
+    if isinstance(value, _TrackedContainer):
+        return value._data
+    return value
+
+
+class TrackedDict(_TrackedContainer, MutableMapping, dict):
+    """
+    Copy-on-write view of a dict, see _TrackedContainer. The methods of
+    MutableMapping are used instead of the ones of dict, which would return
+    untracked values.
+    """
+
+    def __init__(self, data, parent=None, key=None):
+        _TrackedContainer.__init__(self, data, parent, key)
+        dict.update(self, data)
+
+    def _store(self, key):
+        dict.__setitem__(self, key, self._data[key])
+
+    def __getitem__(self, key):
+        return self._wrap(key, self._data[key])
+
+    def __setitem__(self, key, value):
+        self._detach(key)
+        self._own()
+        self._data[key] = _unwrap(value)
+        self._store(key)
+        self._record(key)
+
+    def __delitem__(self, key):
+        self._detach(key)
+        self._own()
+        del self._data[key]
+        dict.__delitem__(self, key)
+        self._record(key)
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class TrackedList(_TrackedContainer, MutableSequence, list):
+    """
+    Copy-on-write view of a list, see _TrackedContainer. Any change records
+    the whole list, as indexes move.
+    """
+
+    def __init__(self, data, parent=None, key=None):
+        _TrackedContainer.__init__(self, data, parent, key)
+        list.extend(self, data)
+
+    def _store(self, index=None):
+        list.__setitem__(self, slice(None), self._data)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            # A new list of the views, the slice itself isn't tracked
+            return [
+                self[position]
+                for position in range(*index.indices(len(self._data)))
+            ]
+        if index < 0:
+            index += len(self._data)
+        return self._wrap(index, self._data[index])
+
+    def __setitem__(self, index, value):
+        self._detach()
+        self._own()
+        self._data[index] = _unwrap(value)
+        self._store()
+        self._record()
+
+    def __delitem__(self, index):
+        self._detach()
+        self._own()
+        del self._data[index]
+        self._store()
+        self._record()
+
+    def insert(self, index, value):
+        self._detach()
+        self._own()
+        self._data.insert(index, _unwrap(value))
+        self._store()
+        self._record()
+
+    def sort(self, *args, **kwargs):
+        self._detach()
+        self._own()
+        self._data.sort(*args, **kwargs)
+        self._store()
+        self._record()
+
+
 class ArubaAnsibleModule:
     """
     Aruba ansible mdule wrapper class
@@ -484,17 +838,15 @@ class ArubaAnsibleModule:
         """
         Returns the switch platform
         """
-        platform_url = "/rest/v1/system?attributes=platform_name"
-        platform = get(self.module, platform_url)
-        self.switch_platform = platform["platform_name"]
+        device_info = get_device_info(self.module)
+        self.switch_platform = device_info["platform_name"]
 
     def get_switch_firmware_version(self):
         """
         Returns the switch firmware
         """
-        firmware_url = "/rest/v1/firmware"
-        firmware_versions = get(self.module, firmware_url)
-        self.switch_current_firmware = firmware_versions["current_version"]
+        device_info = get_device_info(self.module)
+        self.switch_current_firmware = device_info["firmware_version"]
 
     def get_firmware_upgrade_status(self):
         """
@@ -504,6 +856,19 @@ class ArubaAnsibleModule:
         firmware_update_status = get(self.module, fimrware_status_url)
         return firmware_update_status
 
+    def wait_firmware_upgrade(self, since=None, timeout=600):
+        """
+        Waits for the end of the firmware upgrade, checking its status with an
+            exponential backoff
+        :param since: Date of the status before the upgrade started
+        :param timeout: Seconds after which the upgrade is no longer waited
+        :return: Tuple with the last firmware upgrade status and whether the
+            upgrade ended
+        """
+        return wait_firmware_upload(
+            self.get_firmware_upgrade_status, since=since, timeout=timeout
+        )
+
     def get_switch_config(
         self, config_name="running-config", store_config=True
     ):
@@ -515,8 +880,12 @@ class ArubaAnsibleModule:
         running_config = get(self.module, config_url)
 
         if store_config:
-            self.running_config = copy.deepcopy(running_config)
-            self.original_config = copy.deepcopy(running_config)
+            # running_config is a copy-on-write view of the original config,
+            # only the modified parts are copied
+            self.original_config = running_config
+            self.running_config = TrackedDict(running_config)
+            # The original config must not be changed through the result
+            return self.running_config
 
         return running_config
 
@@ -551,7 +920,7 @@ class ArubaAnsibleModule:
         Upload switch config
         """
         config_url = "/rest/v1/fullconfigs/{0}".format(config_name)
-        config_json = json.dumps(config)
+        config_json = json.dumps(_unwrap(config))
         put(self.module, config_url, config_json)
         return
 
@@ -561,7 +930,7 @@ class ArubaAnsibleModule:
         """
         self.result = dict(changed=self.changed)
 
-        if self.original_config != self.running_config:
+        if self.running_config.is_modified():
             self.upload_switch_config(self.running_config)
             self.result["changed"] = True
         else:
@@ -573,7 +942,7 @@ class ArubaAnsibleModule:
             self.module.exit_json(**self.result)
 
         with open("/tmp/debugging_running_config.json", "w") as to_file:
-            json.dump(self.running_config, to_file, indent=4)
+            json.dump(self.running_config.data, to_file, indent=4)
             to_file.write("\n")
 
         self.module.exit_json(**self.result)
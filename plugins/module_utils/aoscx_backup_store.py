@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import hashlib
+import io
+import json
+import os
+import time
+import uuid
+
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.six.moves.urllib.parse import quote
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx import (  # NOQA
+    dump_sorted_json,
+)
+
+# Files are created like open() would, readable by the group and others
+# unless the umask says otherwise, which the kernel applies to this mode
+_FILE_MODE = 0o666
+
+
+def canonical_json(obj):
+    """
+    Returns the canonical JSON of obj, with dicts and lists sorted like
+        comp_sort and without indentation, so equal configurations always
+        have the same text and digest.
+    """
+    text = io.StringIO()
+    dump_sorted_json(obj, text, indent=None)
+    return to_bytes(text.getvalue())
+
+
+class BackupStore(object):
+    """
+    Content addressed store of JSON configurations in a directory:
+
+    objects/<2 hex>/<sha256>
+        Canonical JSON of a row of a top-level table of a configuration, or
+        of the manifest of a configuration, mapping its table names to the
+        digests of their rows by key. Rows equal across versions or
+        switches are stored once, so a change only writes the rows it
+        touches. Tables that aren't dicts are stored whole, their digest
+        replacing the rows in the manifest.
+    hosts/<quoted name>.json
+        Index of the versions of a host, oldest first, each one with the
+        digest of its manifest, the configuration name and the UTC time it
+        was stored.
+
+    Files are written to a temporary file and renamed, so concurrent
+        writers, like the forks of a play backing up many switches, never
+        leave partial files.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _write(self, path, data):
+        directory = os.path.dirname(path)
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory)
+            except OSError:
+                # Created by another writer in the meantime
+                if not os.path.isdir(directory):
+                    raise
+        temp_path = os.path.join(directory, ".tmp{0}".format(uuid.uuid4().hex))
+        handle = os.open(
+            temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, _FILE_MODE
+        )
+        try:
+            with os.fdopen(handle, "wb") as temp_file:
+                temp_file.write(data)
+            os.rename(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def object_path(self, digest):
+        return os.path.join(self.path, "objects", digest[:2], digest)
+
+    def put_object(self, data):
+        """
+        Stores data, unless an object with the same content exists.
+        :param data: bytes to be stored
+        :return: Tuple with the SHA-256 digest of data and whether the
+            object was written.
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        self._write(path, data)
+        return digest, True
+
+    def get_object(self, digest):
+        with open(self.object_path(digest), "rb") as object_file:
+            return object_file.read()
+
+    def index_path(self, name):
+        # Names with "/" or ".." can't leave the store
+        return os.path.join(
+            self.path, "hosts", "{0}.json".format(quote(name, safe=""))
+        )
+
+    def versions(self, name):
+        """
+        Returns the versions of a host, oldest first, empty if the host has
+            no backups.
+        """
+        path = self.index_path(name)
+        if not os.path.exists(path):
+            return []
+        with open(path) as index_file:
+            return json.load(index_file)
+
+    def save(self, name, config, config_name):
+        """
+        Stores a configuration as a new version of a host, unless it is the
+            same as its latest version.
+        :param name: Name of the host in the store.
+        :param config: Configuration, as a dict of tables.
+        :param config_name: Name of the configuration on the switch.
+        :return: Tuple with the version, a dict with its digest, config name
+            and time, and the number of objects written, None if the
+            configuration didn't change.
+        """
+        objects = dict()
+
+        def add_object(value):
+            data = canonical_json(value)
+            digest = hashlib.sha256(data).hexdigest()
+            objects[digest] = data
+            return digest
+
+        manifest = dict()
+        for table, value in config.items():
+            if isinstance(value, dict):
+                manifest[table] = dict(
+                    (key, add_object(row)) for key, row in value.items()
+                )
+            else:
+                manifest[table] = add_object(value)
+        manifest_data = canonical_json(manifest)
+        digest = hashlib.sha256(manifest_data).hexdigest()
+
+        versions = self.versions(name)
+        if versions and versions[-1]["digest"] == digest:
+            return versions[-1], None
+
+        written = 0
+        for data in objects.values():
+            written += self.put_object(data)[1]
+        written += self.put_object(manifest_data)[1]
+
+        version = dict(
+            digest=digest,
+            config_name=config_name,
+            time=time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        )
+        versions.append(version)
+        self._write(
+            self.index_path(name), to_bytes(json.dumps(versions, indent=4))
+        )
+        return version, written
+
+    def load(self, digest):
+        """
+        Returns the configuration of a version from its digest.
+        """
+        manifest = json.loads(self.get_object(digest))
+        config = dict()
+        for table, digests in manifest.items():
+            if isinstance(digests, dict):
+                config[table] = dict(
+                    (key, json.loads(self.get_object(row_digest)))
+                    for key, row_digest in digests.items()
+                )
+            else:
+                # Stored whole, like every table of older versions
+                config[table] = json.loads(self.get_object(digests))
+        return config
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from concurrent.futures import ThreadPoolExecutor
+
+BATCH_METHODS = ["GET", "PUT", "POST", "PATCH", "DELETE"]
+DEFAULT_MAX_WORKERS = 4
+
+
+def run_batch(
+    operations,
+    execute,
+    concurrent=False,
+    max_workers=DEFAULT_MAX_WORKERS,
+    independent=False,
+):
+    """
+    Runs a list of REST operations and returns their results in the same
+        order. Operations are run one after the other, except when concurrent
+        is set, then consecutive GET operations are run at the same time, as
+        they don't depend on each other. Writes are never reordered, unless
+        independent is set.
+
+    :param operations: List of dicts with method, path and optionally params,
+        data and headers.
+    :param execute: Function receiving one operation and returning its
+        result, it must not raise exceptions.
+    :param concurrent: Whether consecutive GET operations run concurrently.
+    :param max_workers: Maximum number of concurrent GET operations.
+    :param independent: Whether none of the operations depends on another,
+        then all of them, writes included, run concurrently when concurrent
+        is set.
+    :return: List of results, one per operation.
+    """
+    results = []
+    pending = []
+
+    def flush(executor):
+        if executor is None or len(pending) < 2:
+            results.extend(execute(op) for op in pending)
+        else:
+            results.extend(executor.map(execute, pending))
+        del pending[:]
+
+    executor = None
+    if concurrent and max_workers > 1:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for operation in operations:
+            if independent or operation.get("method", "GET").upper() == "GET":
+                pending.append(operation)
+                continue
+            flush(executor)
+            results.append(execute(operation))
+        flush(executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return results
+
+
+def validate_operation(operation):
+    """
+    Checks a batch operation is well formed.
+
+    :param operation: dict describing a REST operation.
+    :return: Error message, or None if the operation is valid.
+    """
+    if not isinstance(operation, dict) or "path" not in operation:
+        return "Batch operation must be a dict with at least a path"
+    method = operation.get("method", "GET").upper()
+    if method not in BATCH_METHODS:
+        return "Batch operation method {0} is not one of {1}".format(
+            method, ", ".join(BATCH_METHODS)
+        )
+    return None
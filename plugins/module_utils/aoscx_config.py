@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import (  # NOQA
+    ConfigLine,
+    NetworkConfig,
+    ignore_line,
+)
+
+
+def _path(item):
+    """
+    Returns the path of a config line, the text of its parents followed by
+        its own text.
+    """
+    return tuple(parent.text for parent in item._parents) + (item.text,)
+
+
+class AoscxConfig(NetworkConfig):
+    """
+    NetworkConfig indexing the lines by their parent path (interface, vlan,
+        router or access-list blocks), so lookups and differences between
+        configurations of tens of thousands of lines run in linear time.
+        The results are the same as the ones of NetworkConfig.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Built on the first lookup, most configs are only diffed
+        self._objects = None
+        super(AoscxConfig, self).__init__(*args, **kwargs)
+
+    def load(self, s):
+        super(AoscxConfig, self).load(s)
+        self._objects = None
+
+    def _append(self, item):
+        self._items.append(item)
+        if self._objects is not None:
+            self._objects.setdefault(_path(item), item)
+
+    def get_object(self, path):
+        if self._objects is None:
+            self._objects = {}
+            for item in self._items:
+                self._objects.setdefault(_path(item), item)
+        return self._objects.get(tuple(path))
+
+    def _expand_block(self, configobj, S=None):
+        if S is None:
+            S = list()
+        visited = set(item.line for item in S)
+        S.append(configobj)
+        visited.add(configobj.line)
+        # Depth first, children already in the block are skipped when their
+        # turn comes, like the recursion of NetworkConfig does
+        stack = list(reversed(configobj._children))
+        while stack:
+            item = stack.pop()
+            line = item.line
+            if line in visited:
+                continue
+            S.append(item)
+            visited.add(line)
+            stack.extend(reversed(item._children))
+        return S
+
+    def _diff_line(self, other):
+        lines = set(item.line for item in other)
+        return [item for item in self.items if item.line not in lines]
+
+    def difference(self, other, match="line", path=None, replace=None):
+        """
+        Perform a config diff against another network config, see
+            NetworkConfig.difference.
+        """
+        if path and match != "line":
+            try:
+                other = other.get_block(path)
+            except ValueError:
+                other = list()
+        else:
+            other = other.items
+
+        updates = getattr(self, "_diff_%s" % match)(other)
+
+        if replace == "block":
+            parents = list()
+            seen = set()
+            for item in updates:
+                if not item.has_parents:
+                    seen.add(item.line)
+                    parents.append(item)
+                    continue
+                for parent in item._parents:
+                    if parent.line not in seen:
+                        seen.add(parent.line)
+                        parents.append(parent)
+
+            updates = list()
+            for item in parents:
+                updates.extend(self._expand_block(item))
+
+        visited = set()
+        expanded = list()
+
+        for curr_elem in updates:
+            add_parents = False
+            if expanded:
+                last_elem = expanded[-1]
+                # Parents of the line must be repeated when the previous line
+                # belongs to another block
+                if (
+                    curr_elem.has_parents
+                    and last_elem.has_parents
+                    and curr_elem._parents[0].text
+                    != last_elem._parents[0].text
+                ):
+                    add_parents = True
+                if (
+                    last_elem.has_children
+                    and last_elem._children[0].text != curr_elem.text
+                ):
+                    add_parents = True
+            for parent in curr_elem._parents:
+                line = parent.line
+                if line not in visited or add_parents:
+                    visited.add(line)
+                    expanded.append(parent)
+            expanded.append(curr_elem)
+            visited.add(curr_elem.line)
+
+        return expanded
+
+    def add(self, lines, parents=None):
+        ancestors = list()
+
+        if not parents:
+            existing = set(item.line for item in self.items)
+            for line in lines:
+                if ignore_line(line, self.comment_tokens):
+                    continue
+                item = ConfigLine(line)
+                item.raw = line
+                if item.line not in existing:
+                    existing.add(item.line)
+                    self._append(item)
+            return
+
+        for index, parent in enumerate(parents):
+            obj = self.get_object(parents[: index + 1])
+            if obj is None:
+                obj = ConfigLine(parent)
+                obj.raw = parent.rjust(len(parent) + index * self._indent)
+                if ancestors:
+                    obj._parents = list(ancestors)
+                    ancestors[-1]._children.append(obj)
+                self._append(obj)
+            ancestors.append(obj)
+
+        children = set(child.text for child in ancestors[-1]._children)
+        offset = len(parents) * self._indent
+        for line in lines:
+            if ignore_line(line, self.comment_tokens) or line in children:
+                continue
+            children.add(line)
+            item = ConfigLine(line)
+            item.raw = line.rjust(len(line) + offset)
+            item._parents = ancestors
+            ancestors[-1]._children.append(item)
+            self._append(item)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import re
+import socket
+import threading
+import uuid
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def get_address(switch_host):
+    """
+    Returns the address of a switch from its host, without its port.
+    """
+    if switch_host.startswith("["):
+        return switch_host[1:].split("]", 1)[0]
+    if switch_host.count(":") == 1:
+        return switch_host.split(":", 1)[0]
+    return switch_host
+
+
+def get_server_address(switch_host):
+    """
+    Returns the address of the controller on the route to a switch, the one
+        the switches reach it at.
+    """
+    family, dummy, dummy, dummy, address = socket.getaddrinfo(
+        get_address(switch_host), 443, 0, socket.SOCK_DGRAM
+    )[0]
+    probe = socket.socket(family, socket.SOCK_DGRAM)
+    try:
+        # Nothing is sent, connecting an UDP socket only selects the route
+        probe.connect(address)
+        return probe.getsockname()[0]
+    finally:
+        probe.close()
+
+
+class FirmwareRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serves the images of a FirmwareServer, with range requests.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._serve(send_body=False)
+
+    def do_GET(self):
+        self._serve(send_body=True)
+
+    def _error(self, code):
+        self.send_response(code)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def _serve(self, send_body):
+        server = self.server
+        path = server.files.get(unquote(self.path.split("?", 1)[0]))
+        if path is None:
+            self._error(404)
+            return
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        code = 200
+        requested = self.headers.get("Range")
+        if requested:
+            match = RANGE_RE.match(requested.strip())
+            if not match or not any(match.groups()):
+                self._error(416)
+                return
+            first, last = match.groups()
+            if first:
+                start = int(first)
+                end = min(int(last), size - 1) if last else size - 1
+            else:
+                # Suffix range, the last bytes of the file
+                start = max(0, size - int(last))
+            if start > end or start >= size:
+                self.send_response(416)
+                self.send_header("Content-Range", "bytes */{0}".format(size))
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            code = 206
+        length = end - start + 1
+
+        # Switches beyond the limit wait for a transfer to finish
+        with server.slots:
+            self.send_response(code)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(length))
+            if code == 206:
+                self.send_header(
+                    "Content-Range",
+                    "bytes {0}-{1}/{2}".format(start, end, size),
+                )
+            self.end_headers()
+            if not send_body:
+                return
+            self.wfile.flush()
+            with open(path, "rb") as image:
+                # Sent by the kernel where possible, without copying the
+                # image through Python
+                sent = self.connection.sendfile(image, start, length)
+            server.add_transfer(sent)
+
+
+class FirmwareServer(ThreadingHTTPServer):
+    """
+    HTTP server sharing local firmware images with switches, which download
+        them in parallel with remote_firmware_file_path. Every image is
+        published under a random path, nothing else is served, and at most
+        max_connections images are sent at the same time.
+    """
+
+    def __init__(self, address="", port=0, max_connections=32):
+        ThreadingHTTPServer.__init__(
+            self, (address, port), FirmwareRequestHandler
+        )
+        self.files = {}
+        self.slots = threading.BoundedSemaphore(max_connections)
+        self.prefix = "/{0}/".format(uuid.uuid4().hex)
+        self.bytes_sent = 0
+        self.transfers = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def publish(self, path, address):
+        """
+        Publishes a local file, returns its URL.
+        :param address: Address the switches reach the server at.
+        """
+        url_path = self.prefix + quote(os.path.basename(path))
+        self.files[unquote(url_path)] = path
+        if ":" in address:
+            address = "[{0}]".format(address)
+        return "http://{0}:{1}{2}".format(address, self.port, url_path)
+
+    def add_transfer(self, size):
+        with self._lock:
+            self.bytes_sent += size
+            self.transfers += 1
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,353 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from ansible.module_utils._text import to_text
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.module_utils.six.moves.urllib.parse import quote_plus
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_upload import (  # NOQA
+    wait_firmware_upload,
+    wait_for,
+)
+
+try:
+    import requests
+    import urllib3
+
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+# States of the VSX oper_status of a member in sync with its peer, with "-"
+# instead of "_", config sync may be disabled
+VSX_SYNC_STATES = dict(
+    isl_mgmt_state=("operational",),
+    islp_device_state=("peer-established",),
+    config_sync_state=("in-sync", "disabled"),
+)
+
+
+def get_switch(host, host_vars, templar):
+    """
+    Returns the REST base URL and the credentials of a switch, from the
+        variables used by the aoscx connection, for action plugins reaching
+        many switches from the controller.
+    """
+
+    def get_var(*names, **kwargs):
+        for name in names:
+            if name in host_vars:
+                return templar.template(host_vars[name])
+        return kwargs.get("default")
+
+    address = get_var("ansible_host", default=host)
+    port = get_var("ansible_aoscx_port")
+    if port:
+        address = "{0}:{1}".format(address, port)
+    rest_version = get_var(
+        "ansible_aoscx_rest_version",
+        default=os.environ.get("ANSIBLE_AOSCX_REST_VERSION", "10.04"),
+    )
+    return dict(
+        host=address,
+        base_url="https://{0}/rest/v{1}/".format(address, rest_version),
+        username=get_var("ansible_user"),
+        password=get_var(
+            "ansible_password", "ansible_aoscx_pass", "ansible_aoscx_password"
+        ),
+        # Inventory values may be strings, like "False"
+        use_proxy=boolean(
+            get_var("ansible_aoscx_use_proxy", default=True), strict=False
+        ),
+    )
+
+
+def get_hosts(hosts, task_vars, run_once):
+    """
+    Returns the hosts reached by a task of an action plugin: the given ones,
+        or the hosts of the play.
+    :param hosts: Inventory hostnames given to the task, None for the hosts
+        of the play.
+    :param task_vars: Variables of the task.
+    :param run_once: Whether the task runs once, otherwise every host of the
+        play runs it, and would reach the hosts of the play again.
+    :return: List of hostnames.
+    :raises ValueError: For hosts not in the inventory, or when the hosts of
+        the play are many and the task doesn't run once.
+    """
+    if hosts is None:
+        hosts = task_vars.get("ansible_play_hosts", [])
+        if len(hosts) > 1 and not run_once:
+            raise ValueError(
+                "hosts is required when the task doesn't run once, with "
+                "run_once, or every host of the play reaches all of them"
+            )
+    hostvars = task_vars.get("hostvars", {})
+    unknown = [host for host in hosts if host not in hostvars]
+    if unknown:
+        raise ValueError(
+            "Hosts not in the inventory: {0}".format(", ".join(unknown))
+        )
+    return hosts
+
+
+def run_parallel(function, hosts, max_workers, callback=None):
+    """
+    Runs function(host) for hosts, with at most max_workers at the same time.
+    :param callback: Called with the host and its status as soon as each one
+        finishes.
+    :return: dict with the status of every host, the result of function or
+        the error.
+    """
+    results = dict()
+    if not hosts:
+        return results
+    max_workers = max(1, min(max_workers, len(hosts)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = dict(
+            (executor.submit(function, host), host) for host in hosts
+        )
+        for future in as_completed(futures):
+            host = futures[future]
+            try:
+                results[host] = dict(result=future.result())
+            except Exception as e:
+                results[host] = dict(failed=True, msg=to_text(e))
+            if callback is not None:
+                callback(host, results[host])
+    return results
+
+
+def check_response(response, message, codes=(200,)):
+    """
+    Raises an error for a failed response, server errors are raised as
+        HTTPError so they are retried, unlike login or request errors.
+    """
+    if response.status_code in codes:
+        return
+    error = "{0}: {1} {2}".format(message, response.status_code, response.text)
+    if response.status_code >= 500:
+        raise requests.exceptions.HTTPError(error, response=response)
+    raise ValueError(error)
+
+
+class SwitchSession(object):
+    """
+    REST session with a switch, logged in when entered and logged out when
+        exited, every request using one keep-alive HTTPS connection.
+    """
+
+    def __init__(self, switch, timeout=30):
+        self.switch = switch
+        self.timeout = timeout
+        self.session = None
+
+    def __enter__(self):
+        # Filters set on import don't survive the worker processes of Ansible
+        urllib3.disable_warnings()
+        self.session = requests.Session()
+        # Like the aoscx connection, which never validates the certificates,
+        # so switches with self-signed ones can be reached
+        self.session.verify = False
+        self.session.trust_env = self.switch["use_proxy"]
+        try:
+            response = self.session.post(
+                self.switch["base_url"] + "login",
+                data=dict(
+                    username=self.switch["username"],
+                    password=self.switch["password"],
+                ),
+                headers={"Accept": "*/*", "x-use-csrf-token": "true"},
+                timeout=self.timeout,
+            )
+            check_response(response, "Login failed")
+        except Exception:
+            self.session.close()
+            raise
+        if "X-Csrf-Token" in response.headers:
+            self.session.headers["x-csrf-token"] = response.headers[
+                "X-Csrf-Token"
+            ]
+        return self
+
+    def __exit__(self, *exc_info):
+        # The switch limits the sessions of a user, never leave one open
+        try:
+            self.session.post(
+                self.switch["base_url"] + "logout", timeout=self.timeout
+            )
+        except requests.exceptions.RequestException:
+            pass
+        finally:
+            self.session.close()
+
+    def request(self, method, path, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(
+            method, self.switch["base_url"] + path, **kwargs
+        )
+
+
+def get_json(session, path, message):
+    """
+    Returns the JSON body of a GET request, raising message when it fails.
+    """
+    response = session.request("GET", path)
+    check_response(response, message)
+    return response.json()
+
+
+def upload_firmware(
+    session, url, partition_name, vrf, timeout=1800, max_delay=60
+):
+    """
+    Makes a switch download a firmware image from a URL, like
+        remote_firmware_file_path, and waits for the end of the upload, on the
+        same session, which is kept alive during long downloads.
+    """
+
+    def get_status():
+        return get_json(
+            session, "firmware/status", "Could not get the firmware status"
+        )
+
+    previous = get_status()
+    response = session.request(
+        "PUT",
+        "firmware?image={0}&from={1}&vrf={2}".format(
+            partition_name, quote_plus(url), vrf
+        ),
+    )
+    check_response(response, "Could not start the upload", (200, 400))
+    if response.status_code == 400:
+        # Returned when an upload is already in progress, like pyaoscx, wait
+        # for it, but also for rejected uploads, like unreachable servers
+        if get_status().get("status") != "in_progress":
+            raise ValueError(
+                "Could not start the upload: {0} {1}".format(
+                    response.status_code, response.text
+                )
+            )
+    status, done = wait_firmware_upload(
+        get_status,
+        since=previous.get("date"),
+        timeout=timeout,
+        max_delay=max_delay,
+    )
+    if not done:
+        raise ValueError(
+            "The upload didn't finish in {0} seconds".format(timeout)
+        )
+    if status["status"] == "failure":
+        raise ValueError(
+            "Firmware upload failed: {0}".format(status.get("reason"))
+        )
+
+
+def boot_firmware(
+    switch,
+    partition_name,
+    version,
+    timeout=30,
+    boot_timeout=900,
+    max_delay=30,
+):
+    """
+    Boots a switch from a partition and waits until its REST API is reachable
+        again and it runs the expected firmware version.
+    :return: The firmware information of the switch after the boot.
+    """
+    with SwitchSession(switch, timeout) as session:
+        try:
+            response = session.request(
+                "POST", "boot?image={0}".format(partition_name)
+            )
+        except requests.exceptions.RequestException:
+            # The switch may reboot before answering
+            response = None
+        if response is not None:
+            check_response(
+                response, "Could not boot the {0} image".format(partition_name)
+            )
+
+    def poll():
+        try:
+            # Every check logs in again, the reboot ends all the sessions
+            with SwitchSession(switch, timeout) as session:
+                firmware = get_json(
+                    session, "firmware", "Could not get the firmware"
+                )
+        except (requests.exceptions.RequestException, ValueError):
+            # Still rebooting
+            return None, False
+        return firmware, firmware.get("current_version") == version
+
+    firmware, done = wait_for(
+        poll, timeout=boot_timeout, delay=5, max_delay=max_delay
+    )
+    if not done:
+        if firmware is None:
+            raise ValueError(
+                "The switch wasn't reachable {0} seconds after the "
+                "boot".format(boot_timeout)
+            )
+        raise ValueError(
+            "The switch runs {0}, not {1}, {2} seconds after the boot".format(
+                firmware.get("current_version"), version, boot_timeout
+            )
+        )
+    return firmware
+
+
+def is_vsx_in_sync(status):
+    """
+    Whether the VSX operational status of a switch reports its ISL up and
+        its configuration in sync with its peer.
+    """
+    for name, values in VSX_SYNC_STATES.items():
+        value = to_text(status.get(name, "")).lower().replace("_", "-")
+        if value not in values:
+            return False
+    return True
+
+
+def wait_vsx_sync(switch, timeout=30, sync_timeout=900, max_delay=30):
+    """
+    Waits until a VSX member booted again is in sync with its peer, its
+        multi-chassis LAGs are only forwarding on both members then.
+    :return: The VSX operational status of the switch.
+    """
+
+    def poll():
+        try:
+            with SwitchSession(switch, timeout) as session:
+                vsx = get_json(
+                    session,
+                    "system/vsx?attributes=oper_status",
+                    "Could not get the VSX status",
+                )
+        except (requests.exceptions.RequestException, ValueError):
+            return None, False
+        status = vsx.get("oper_status") or {}
+        return status, is_vsx_in_sync(status)
+
+    status, done = wait_for(
+        poll, timeout=sync_timeout, delay=5, max_delay=max_delay
+    )
+    if not done:
+        raise ValueError(
+            "The VSX isn't in sync {0} seconds after the boot: {1}".format(
+                sync_timeout, status
+            )
+        )
+    return status
@@ -9,14 +9,21 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
-from ansible.module_utils.connection import Connection
+import json
+
+from ansible.module_utils.connection import Connection, ConnectionError
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_batch import (  # NOQA
+    DEFAULT_MAX_WORKERS,
+)
 
 try:
     from requests import Session as RequestsSession
+    from requests.structures import CaseInsensitiveDict
     from requests.utils import add_dict_to_cookiejar
 
     HAS_REQUESTS = True
 except ImportError:
+    RequestsSession = object
     HAS_REQUESTS = False
 
 if HAS_REQUESTS:
@@ -35,6 +42,209 @@ except ImportError:
     HAS_PYAOSCX_FIRMWARE = False
 
 
+class PersistentResponse(object):
+    """
+    Response returned by PersistentRequestsSession, it provides the subset of
+    the requests.Response interface used by pyaoscx.
+    """
+
+    def __init__(self, reply):
+        self.status_code = reply["status_code"]
+        self.reason = reply["reason"]
+        self.headers = CaseInsensitiveDict(reply["headers"])
+        self.text = reply["text"]
+        self.url = reply["url"]
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    @property
+    def content(self):
+        return self.text.encode("utf-8")
+
+    def json(self, **kwargs):
+        return json.loads(self.text, **kwargs)
+
+
+class PersistentRequestsSession(RequestsSession):
+    """
+    requests.Session that sends its requests through the rest_request method
+    of the aoscx connection plugin, reusing the keep-alive HTTPS connections
+    the persistent connection process already holds with the switch. Requests
+    whose body cannot be serialized (file uploads, streams) are sent locally
+    with the cookies of the persistent session.
+    """
+
+    def __init__(self, connection):
+        super(PersistentRequestsSession, self).__init__()
+        self._aoscx_connection = connection
+        self._prefetched = {}
+
+    @staticmethod
+    def _request_key(url, params):
+        return url, json.dumps(params or {}, sort_keys=True, default=str)
+
+    def _invalidate_prefetched(self, url):
+        path = url.split("?")[0]
+        for key in list(self._prefetched):
+            cached_path = key[0].split("?")[0]
+            if cached_path.startswith(path) or path.startswith(cached_path):
+                del self._prefetched[key]
+
+    def send_batch(
+        self,
+        operations,
+        concurrent=False,
+        max_workers=DEFAULT_MAX_WORKERS,
+        independent=False,
+    ):
+        """
+        Send several requests in one call to the persistent connection.
+
+        :param operations: List of dicts with method, url and optionally
+            params, data and headers.
+        :param concurrent: Whether consecutive GET operations are sent
+            concurrently by the connection.
+        :param max_workers: Maximum number of concurrent GET operations.
+        :param independent: Whether none of the operations depends on
+            another, then writes are also sent concurrently.
+        :return: List with a PersistentResponse, or a ConnectionError for the
+            operations that could not be sent, in the same order as the
+            operations.
+        """
+        batch = []
+        for operation in operations:
+            method = operation.get("method", "GET").upper()
+            if method != "GET":
+                self._invalidate_prefetched(operation["url"])
+            batch.append(
+                dict(
+                    method=method,
+                    path=operation["url"],
+                    params=operation.get("params"),
+                    data=operation.get("data"),
+                    headers=operation.get("headers"),
+                )
+            )
+        replies = self._aoscx_connection.send_batch(
+            operations=batch,
+            concurrent=concurrent,
+            max_workers=max_workers,
+            independent=independent,
+        )
+        return [
+            (
+                ConnectionError(reply["error"])
+                if "error" in reply
+                else PersistentResponse(reply)
+            )
+            for reply in replies
+        ]
+
+    def prefetch(self, operations, max_workers=DEFAULT_MAX_WORKERS):
+        """
+        Send several GET requests in one batch and keep the responses, so the
+            same requests made afterwards (e.g. by pyaoscx objects) are
+            answered without another round-trip. Every response is used once,
+            and writes to a path drop the responses prefetched for it.
+
+        :param operations: List of dicts with url and optionally params.
+        :param max_workers: Maximum number of GET requests sent concurrently.
+        """
+        gets = [dict(op, method="GET") for op in operations]
+        responses = self.send_batch(gets, True, max_workers)
+        for operation, response in zip(gets, responses):
+            if isinstance(response, PersistentResponse):
+                key = self._request_key(
+                    operation["url"], operation.get("params")
+                )
+                self._prefetched[key] = response
+
+    def prefetch_conditional(
+        self, operations, cache, max_workers=DEFAULT_MAX_WORKERS
+    ):
+        """
+        Same as prefetch, but the requests carry the ETag of the responses in
+            cache, the ones not modified since (304) are answered from it.
+
+        :param operations: List of dicts with url and optionally params.
+        :param cache: dict of URL to the etag and text of its last response,
+            updated with the new responses.
+        :param max_workers: Maximum number of GET requests sent concurrently.
+        :return: List of the URLs answered from the cache.
+        """
+        gets = []
+        for operation in operations:
+            cached = cache.get(operation["url"])
+            headers = {"If-None-Match": cached["etag"]} if cached else None
+            gets.append(dict(operation, method="GET", headers=headers))
+        not_modified = []
+        responses = self.send_batch(gets, True, max_workers)
+        for operation, response in zip(gets, responses):
+            if not isinstance(response, PersistentResponse):
+                continue
+            url = operation["url"]
+            if response.status_code == 304 and url in cache:
+                response = PersistentResponse(
+                    dict(
+                        status_code=200,
+                        reason="OK",
+                        headers=dict(ETag=cache[url]["etag"]),
+                        text=cache[url]["text"],
+                        url=response.url,
+                    )
+                )
+                not_modified.append(url)
+            elif response.status_code == 200 and response.headers.get("ETag"):
+                cache[url] = dict(
+                    etag=response.headers["ETag"], text=response.text
+                )
+            else:
+                cache.pop(url, None)
+            key = self._request_key(url, operation.get("params"))
+            self._prefetched[key] = response
+        return not_modified
+
+    def request(
+        self, method, url, params=None, data=None, headers=None, **kwargs
+    ):
+        if method.upper() == "GET":
+            key = self._request_key(url, params)
+            if key in self._prefetched:
+                return self._prefetched.pop(key)
+        else:
+            self._invalidate_prefetched(url)
+        json_data = kwargs.get("json")
+        is_serializable = (
+            kwargs.get("files") is None
+            and not kwargs.get("stream")
+            and (data is None or isinstance(data, (str, bytes)))
+        )
+        if not is_serializable:
+            return super(PersistentRequestsSession, self).request(
+                method,
+                url,
+                params=params,
+                data=data,
+                headers=headers,
+                **kwargs
+            )
+        if json_data is not None:
+            data = json.dumps(json_data)
+        if isinstance(data, bytes):
+            data = data.decode("utf-8")
+        reply = self._aoscx_connection.rest_request(
+            method=method.upper(),
+            path=url,
+            params=params,
+            data=data,
+            headers=dict(headers) if headers else None,
+            verify=bool(kwargs.get("verify", False)),
+        )
+        return PersistentResponse(reply)
+
+
 class Session(object):
     def __init__(self, ansible_module):
         if not HAS_REQUESTS:
@@ -42,8 +252,8 @@ class Session(object):
                 msg="The 'requests' python library is required to use the "
                 "aoscx connection type."
             )
-        s = RequestsSession()
         connection = Connection(ansible_module._socket_path)
+        s = PersistentRequestsSession(connection)
         session_data = connection.get_session()
 
         if session_data["success"] is False:
@@ -64,7 +274,10 @@ class Session(object):
 
     def check_supported_firmware(self, ansible_module):
         if HAS_PYAOSCX_FIRMWARE:
-            version = firmware.get_firmware_version(**self._session)
+            try:
+                version = get_device_info(ansible_module)["firmware_version"]
+            except ConnectionError:
+                version = None
             if version is None:
                 ansible_module.fail_json(
                     msg="Unable to retrieve switch firmware version"
@@ -86,3 +299,131 @@ def get_pyaoscx_session(ansible_module):
     base_url = ansible_module_session_info["url"]
     auth = ansible_module_session_info["credentials"]
     return PyaoscxSession.from_session(requests_session, base_url, credentials=auth)
+
+
+def get_device_info(ansible_module, refresh=False):
+    """
+    Retrieves the device information cached by the persistent connection, so
+        tasks don't GET the firmware and system tables to check what the
+        switch supports.
+
+    :param ansible_module: AnsibleModule using the aoscx connection.
+    :param refresh: Whether the cached information is retrieved again.
+    :return: dict with platform_name, firmware_version, firmware,
+        rest_version, capabilities and capacities.
+    """
+    connection = Connection(ansible_module._socket_path)
+    return connection.get_device_info(refresh=refresh)
+
+
+def invalidate_device_info(ansible_module):
+    """
+    Clears the device information cached by the persistent connection, after
+        changing the firmware of the switch.
+
+    :param ansible_module: AnsibleModule using the aoscx connection.
+    """
+    Connection(ansible_module._socket_path).invalidate_device_info()
+
+
+def prefetch_objects(session, pyaoscx_objects):
+    """
+    Retrieves the data of several pyaoscx objects in a single round-trip, so
+        their get() calls, with default depth and selector, don't send a
+        request each.
+
+    :param session: pyaoscx Session from get_pyaoscx_session.
+    :param pyaoscx_objects: pyaoscx objects to be retrieved.
+    """
+    if not isinstance(session.s, PersistentRequestsSession):
+        return
+    params = {
+        "depth": session.api.default_depth,
+        "selector": session.api.default_selector,
+    }
+    operations = []
+    for obj in pyaoscx_objects:
+        path = getattr(obj, "path", None) or obj.get_uri()
+        if path.startswith(session.resource_prefix):
+            path = path[len(session.resource_prefix):]
+        operations.append(dict(url=session._build_uri(path), params=params))
+    session.s.prefetch(operations)
+
+
+def prefetch_requests(session, paths, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Sends several GET requests concurrently in a single round-trip, so the
+        pyaoscx calls requesting the same paths afterwards, in any order, are
+        answered without waiting for the switch.
+
+    :param session: pyaoscx Session from get_pyaoscx_session.
+    :param paths: Paths, relative to the REST version and with their query
+        string, exactly as the pyaoscx calls request them.
+    :param max_workers: Maximum number of requests sent concurrently.
+    """
+    if not isinstance(session.s, PersistentRequestsSession):
+        return
+    operations = [dict(url=session._build_uri(path)) for path in paths]
+    session.s.prefetch(operations, max_workers)
+
+
+def prefetch_conditional_requests(
+    session, paths, cache, max_workers=DEFAULT_MAX_WORKERS
+):
+    """
+    Same as prefetch_requests, but paths whose cached response is still
+        current (same ETag) are not transferred again.
+
+    :param session: pyaoscx Session from get_pyaoscx_session.
+    :param paths: Paths, relative to the REST version and with their query
+        string, exactly as they are requested afterwards.
+    :param cache: dict of URL to the etag and text of its last response,
+        updated with the new responses.
+    :param max_workers: Maximum number of requests sent concurrently.
+    :return: List of the URLs answered from the cache.
+    """
+    if not isinstance(session.s, PersistentRequestsSession):
+        return []
+    operations = [dict(url=session._build_uri(path)) for path in paths]
+    return session.s.prefetch_conditional(operations, cache, max_workers)
+
+
+def send_requests(session, operations, max_workers=1):
+    """
+    Sends several requests in a single round-trip to the persistent
+        connection, which sends them to the switch in the same order.
+
+    :param session: pyaoscx Session from get_pyaoscx_session.
+    :param operations: List of dicts with method, path, relative to the REST
+        version, and optionally data, any JSON serializable value.
+    :param max_workers: Maximum number of requests sent at the same time,
+        above 1 the operations must not depend on each other.
+    :return: List with a response, or a ConnectionError for the operations
+        that could not be sent, in the same order as the operations.
+    """
+    batch = []
+    for operation in operations:
+        data = operation.get("data")
+        batch.append(
+            dict(
+                method=operation["method"],
+                url=session._build_uri(operation["path"]),
+                data=json.dumps(data) if data is not None else None,
+            )
+        )
+    if isinstance(session.s, PersistentRequestsSession):
+        return session.s.send_batch(
+            batch,
+            concurrent=max_workers > 1,
+            max_workers=max_workers,
+            independent=max_workers > 1,
+        )
+    return [
+        session.s.request(
+            operation["method"],
+            operation["url"],
+            data=operation["data"],
+            verify=False,
+        )
+        for operation in batch
+    ]
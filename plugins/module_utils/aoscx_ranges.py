@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+
+def _split(value):
+    """
+    Returns the items of a list, or of a comma separated string, as strings.
+    """
+    if not isinstance(value, (list, tuple)):
+        value = str(value).split(",")
+    items = []
+    for item in value:
+        item = str(item).replace(" ", "")
+        if item:
+            items.append(item)
+    return items
+
+
+def expand_vlan_ids(value):
+    """
+    Returns the VLAN IDs of a list of IDs and ranges, like 100-199,300.
+
+    :param value: Comma separated string, or list, of IDs and ranges.
+    :return: List of VLAN IDs, as int, in the given order.
+    """
+    vlan_ids = []
+    for part in _split(value):
+        first, dummy, last = part.partition("-")
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            raise ValueError("Invalid VLAN range {0}".format(part))
+        if not 1 <= first <= last <= 4094:
+            raise ValueError(
+                "Invalid VLAN range {0}, VLAN IDs are between 1 and "
+                "4094".format(part)
+            )
+        vlan_ids.extend(range(first, last + 1))
+    return vlan_ids
+
+
+def _compress(numbers):
+    ranges = []
+    for number in sorted(numbers):
+        if ranges and ranges[-1][1] == number - 1:
+            ranges[-1][1] = number
+        else:
+            ranges.append([number, number])
+    return ranges
+
+
+def compress_vlan_ids(vlan_ids):
+    """
+    Returns VLAN IDs as a list of IDs and ranges, like 100-199,300.
+    """
+    return ",".join(
+        str(first) if first == last else "{0}-{1}".format(first, last)
+        for first, last in _compress(vlan_ids)
+    )
+
+
+def _split_interface_name(name):
+    """
+    Returns the prefix and the port number of an interface name, like 1/1/
+        and 48 for 1/1/48, or None for names without a port number.
+    """
+    prefix, dummy, port = name.rpartition("/")
+    if not prefix or not port.isdigit():
+        return None
+    return prefix + "/", int(port)
+
+
+def expand_interface_names(value):
+    """
+    Returns the interface names of a list of names and ranges of ports, like
+        1/1/1-1/1/48,1/2/1-4,lag1.
+
+    :param value: Comma separated string, or list, of names and ranges.
+    :return: List of interface names, in the given order.
+    """
+    names = []
+    for part in _split(value):
+        first, dummy, last = part.partition("-")
+        if not last:
+            names.append(first)
+            continue
+        first_port = _split_interface_name(first)
+        if first_port is None:
+            raise ValueError("Invalid interface range {0}".format(part))
+        prefix, first = first_port
+        if "/" in last:
+            last_port = _split_interface_name(last)
+            if last_port is None or last_port[0] != prefix:
+                raise ValueError(
+                    "Invalid interface range {0}, the ports must be in the "
+                    "same slot".format(part)
+                )
+            last = last_port[1]
+        elif last.isdigit():
+            last = int(last)
+        else:
+            raise ValueError("Invalid interface range {0}".format(part))
+        if first > last:
+            raise ValueError("Invalid interface range {0}".format(part))
+        names.extend(
+            "{0}{1}".format(prefix, port) for port in range(first, last + 1)
+        )
+    return names
+
+
+def _natural_key(text):
+    return [
+        (0, int(item)) if item.isdigit() else (1, item)
+        for item in text.split("/")
+    ]
+
+
+def compress_interface_names(names):
+    """
+    Returns interface names as a list of names and ranges of ports, like
+        1/1/1-1/1/48,lag1.
+    """
+    ports = {}
+    others = []
+    for name in names:
+        port = _split_interface_name(name)
+        if port is None:
+            others.append(name)
+        else:
+            ports.setdefault(port[0], []).append(port[1])
+    items = []
+    for prefix in sorted(ports, key=_natural_key):
+        for first, last in _compress(ports[prefix]):
+            if first == last:
+                items.append("{0}{1}".format(prefix, first))
+            else:
+                items.append("{0}{1}-{0}{2}".format(prefix, first, last))
+    items.extend(sorted(others))
+    return ",".join(items)
@@ -0,0 +1,283 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import mmap
+import os
+import random
+import re
+import time
+import uuid
+
+from ansible.module_utils._text import to_bytes
+
+try:
+    import requests
+
+    HAS_REQUESTS = True
+except ImportError:
+    HAS_REQUESTS = False
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+# Version of an image, like GL.10.13.1000, as written in the image header,
+# and in file names, like GL_10_13_1000.swi
+IMAGE_VERSION_RE = re.compile(
+    rb"(?<![A-Z])([A-Z]{2})\.(\d{2})\.(\d{2})\.(\d{4})"
+)
+FILE_NAME_VERSION_RE = re.compile(
+    r"(?<![A-Z])([A-Z]{2})[_.](\d{2})[_.](\d{2})[_.](\d{4})"
+)
+# The version is at the start of the image, the whole image is never read
+HEADER_SIZE = 1024 * 1024
+
+
+def get_image_version(firmware_file_path=None, remote_firmware_file_path=None):
+    """
+    Returns the version of a firmware image, from the header of a local image,
+        or its file name, None if it can't be found.
+    """
+    if firmware_file_path is not None:
+        with open(firmware_file_path, "rb") as image:
+            match = IMAGE_VERSION_RE.search(image.read(HEADER_SIZE))
+        if match:
+            return ".".join(part.decode() for part in match.groups())
+    path = firmware_file_path or remote_firmware_file_path
+    name = os.path.basename(path.split("?", 1)[0])
+    match = FILE_NAME_VERSION_RE.search(name)
+    if match:
+        return ".".join(match.groups())
+    return None
+
+
+def upload_done(status, since=None):
+    """
+    Whether a firmware/status of the switch reports the end of an upload,
+        since is the date of the status before the upload started, so the
+        status of a previous upload isn't mistaken for the one of this upload.
+    """
+    if status.get("status") not in ["success", "failure"]:
+        return False
+    return since is None or status.get("date") != since
+
+
+def wait_for(
+    poll,
+    timeout=600,
+    delay=1,
+    max_delay=60,
+    jitter=0.25,
+    sleep=time.sleep,
+):
+    """
+    Calls poll until it reports the end of the wait, with an exponential
+        backoff: the first checks are close, to return soon after short
+        operations, and the next ones are further apart, so hundreds of
+        switches waited for at once aren't polled in lockstep.
+
+    :param poll: Function returning a tuple with a value and whether the wait
+        is over.
+    :param timeout: Seconds after which poll is no longer called.
+    :param delay: Seconds before the second check, doubled after every check.
+    :param max_delay: Maximum number of seconds between two checks.
+    :param jitter: Maximum fraction of every delay randomly removed.
+    :param sleep: Function used to wait, for callers with their own loop.
+    :return: Tuple with the last value and whether the wait is over.
+    """
+    deadline = time.time() + timeout
+    while True:
+        value, done = poll()
+        if done:
+            return value, True
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return value, False
+        wait = min(delay, max_delay) * random.uniform(1 - jitter, 1)
+        sleep(min(wait, remaining))
+        delay *= 2
+
+
+def wait_firmware_upload(get_status, since=None, timeout=600, **kwargs):
+    """
+    Waits for the end of a firmware upload, see wait_for for the backoff.
+
+    :param get_status: Function returning the firmware/status of the switch.
+    :param since: Date of the status before the upload started, see
+        upload_done.
+    :param timeout: Seconds after which the upload is no longer waited for.
+    :return: Tuple with the last status and whether the upload ended.
+    """
+
+    def poll():
+        status = get_status()
+        return status, upload_done(status, since)
+
+    return wait_for(poll, timeout=timeout, **kwargs)
+
+
+class MultipartFile(object):
+    """
+    File-like multipart/form-data body with a single file field, read in
+        chunks from a memory map of the file, so the file is never loaded in
+        memory. Its length is known, so requests sends it with a
+        Content-Length instead of chunked encoding, which the switch doesn't
+        support.
+    """
+
+    def __init__(self, path, field="fileupload"):
+        self.boundary = uuid.uuid4().hex
+        self.content_type = "multipart/form-data; boundary={0}".format(
+            self.boundary
+        )
+        self._file = open(path, "rb")
+        self._size = os.fstat(self._file.fileno()).st_size
+        try:
+            self._data = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except (ValueError, OSError, mmap.error):
+            # Empty files and some file systems can't be mapped
+            self._data = None
+        self._head = to_bytes(
+            "--{0}\r\n"
+            'Content-Disposition: form-data; name="{1}"; filename="{2}"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n".format(
+                self.boundary, field, os.path.basename(path)
+            )
+        )
+        self._tail = to_bytes("\r\n--{0}--\r\n".format(self.boundary))
+        self.rewind()
+
+    def __len__(self):
+        return len(self._head) + self._size + len(self._tail)
+
+    @property
+    def len(self):
+        return len(self)
+
+    def rewind(self):
+        """
+        Restarts the body from its first byte, to send it again.
+        """
+        self.position = 0
+        self._file.seek(0)
+
+    def read(self, size=-1):
+        total = len(self)
+        if size is None or size < 0:
+            size = total - self.position
+        size = min(size, total - self.position, DEFAULT_CHUNK_SIZE)
+        if size <= 0:
+            return b""
+        start = self.position
+        end = start + size
+        chunks = []
+        head = len(self._head)
+        if start < head:
+            chunks.append(self._head[start : min(end, head)])
+        file_start = max(start, head) - head
+        file_end = min(end, head + self._size) - head
+        if file_end > file_start:
+            if self._data is not None:
+                chunks.append(self._data[file_start:file_end])
+            else:
+                self._file.seek(file_start)
+                chunks.append(self._file.read(file_end - file_start))
+        tail_start = max(start, head + self._size) - head - self._size
+        tail_end = end - head - self._size
+        if tail_end > tail_start:
+            chunks.append(self._tail[tail_start:tail_end])
+        self.position = end
+        return b"".join(chunks)
+
+    def close(self):
+        if self._data is not None:
+            self._data.close()
+        self._file.close()
+
+
+def upload_file(
+    session,
+    url,
+    path,
+    field="fileupload",
+    headers=None,
+    timeout=None,
+    retries=0,
+    completed=None,
+):
+    """
+    Uploads a file as multipart/form-data with an authenticated requests
+        session, streaming it from disk. Failed attempts (connection errors,
+        timeouts and server errors) are retried, the switch doesn't support
+        partial uploads, so every attempt sends the whole file again.
+
+    :param session: requests.Session logged in to the switch.
+    :param url: Full URL of the upload.
+    :param path: Path of the local file.
+    :param field: Name of the form field of the file.
+    :param headers: Additional headers of the request.
+    :param timeout: Seconds without data from the switch before an attempt
+        fails, None to wait forever.
+    :param retries: Number of times a failed attempt is retried, waiting 1,
+        2, 4... seconds in between.
+    :param completed: Function called before retrying, returning True when
+        the switch processed the previous attempt anyway, like when only its
+        response timed out, so the file isn't sent again.
+    :return: Tuple with the response, None if completed returned True, and
+        a dict with the bytes sent, seconds, bytes per second and attempts.
+    """
+    body = MultipartFile(path, field=field)
+    request_headers = {"Accept": "*/*"}
+    request_headers.update(headers or {})
+    request_headers["Content-Type"] = body.content_type
+    stats = dict(bytes=0, seconds=0.0, throughput=0.0, attempts=0)
+    start = time.time()
+    response = None
+    try:
+        while True:
+            stats["attempts"] += 1
+            body.rewind()
+            error = None
+            try:
+                # verify is given explicitly, or the CA bundle of the
+                # environment would override the one of the session
+                response = session.post(
+                    url,
+                    data=body,
+                    headers=request_headers,
+                    timeout=timeout,
+                    verify=session.verify,
+                )
+                if response.status_code < 500:
+                    break
+                error = requests.exceptions.HTTPError(
+                    "{0} {1}".format(response.status_code, response.text),
+                    response=response,
+                )
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+            ) as e:
+                error = e
+            finally:
+                stats["bytes"] += body.position
+            if stats["attempts"] > retries:
+                raise error
+            time.sleep(2 ** (stats["attempts"] - 1))
+            if completed is not None and completed():
+                response = None
+                break
+    finally:
+        body.close()
+        stats["seconds"] = round(time.time() - start, 3)
+        if stats["seconds"]:
+            stats["throughput"] = round(stats["bytes"] / stats["seconds"], 1)
+    return response, stats
@@ -47,6 +47,22 @@ options:
       - update
       - delete
     default: create
+  bulk:
+    description: >
+      Write all the entries of the ACL in a single request, instead of one or
+      more requests per entry. The ACL and its entries are read once and
+      compared with acl_entries, and the ACL is written, with a new version,
+      only when an entry changes. With merge, the entries of the ACL that
+      aren't in acl_entries are kept, with replace they are removed. Unlike
+      without bulk, every entry is written as given, the attributes that
+      aren't given are removed from it. With the delete state, the entries of
+      acl_entries are removed from the ACL.
+    required: false
+    type: str
+    choices:
+      - merge
+      - replace
+    version_added: "4.6.0"
   acl_entries:
     description: >
       A dictionary, where the key is the sequence number of the Access Control
@@ -413,16 +429,72 @@ EXAMPLES = """
     name: ipv4_acl
     type: ipv4
     state: delete
+
+# Replace all the entries of a large ACL at once
+# The entries that don't change aren't written, and the ACL is written to
+# hardware once, with all its entries.
+- name: Configure an ACL with the entries of a variable
+  aoscx_acl:
+    name: border_in
+    type: ipv4
+    acl_entries: "{{ border_in_entries }}"
+    bulk: replace
 """
 
 
-RETURN = r""" # """
+RETURN = r"""
+created:
+  description: >
+    Sequence numbers of the entries created, or that would be created in
+    check mode.
+  returned: with bulk
+  type: list
+  elements: int
+  sample: [10, 20]
+updated:
+  description: >
+    Sequence numbers of the entries updated, or that would be updated in check
+    mode.
+  returned: with bulk
+  type: list
+  elements: int
+  sample: [30]
+deleted:
+  description: >
+    Sequence numbers of the entries deleted, or that would be deleted in check
+    mode.
+  returned: with bulk
+  type: list
+  elements: int
+  sample: [40]
+"""
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves.urllib.parse import quote, unquote
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
     get_pyaoscx_session,
+    send_requests,
 )
 
+try:
+    from pyaoscx.utils import util as utils
+
+    HAS_PYAOSCX = True
+except ImportError:
+    HAS_PYAOSCX = False
+
+VALID_TCP_FLAGS = [
+    "ack",
+    "cwr",
+    "ece",
+    "established",
+    "fin",
+    "psh",
+    "rst",
+    "syn",
+    "urg",
+]
+
 
 def get_argument_spec():
     argument_spec = {
@@ -443,10 +515,323 @@ def get_argument_spec():
             "default": "create",
             "choices": ["create", "update", "delete"],
         },
+        "bulk": {
+            "type": "str",
+            "required": False,
+            "choices": ["merge", "replace"],
+        },
     }
     return argument_spec
 
 
+def get_entry_config(ansible_module, session, acl, config_cls, object_groups):
+    """
+    Translates an entry of acl_entries into the arguments of an AclEntry.
+
+    :param config_cls: Entry of acl_entries.
+    :param object_groups: dict of the object groups already retrieved, by
+        name and type.
+    :return: dict of AclEntry arguments.
+    """
+    config = config_cls.copy()
+    # Need to convert tcp_flags list in {tcp_flag: True}
+    if "tcp_flags" in config:
+        for flag in config["tcp_flags"]:
+            if flag in VALID_TCP_FLAGS:
+                config["tcp_" + flag] = True
+            else:
+                ansible_module.fail_json(
+                    msg="Invalid TCP Flag {0}, valid flags are: {1}".format(
+                        flag, ", ".join(VALID_TCP_FLAGS)
+                    )
+                )
+        del config["tcp_flags"]
+
+    def get_object_group(group_name, group_type):
+        # The ACEs often share the same groups, retrieve each one once
+        key = (group_name, group_type)
+        if key not in object_groups:
+            ObjectGroup = session.api.get_module_class(session, "ObjectGroup")
+            object_group = ObjectGroup(session, group_name, group_type)
+            try:
+                object_group.get()
+            except Exception:
+                ansible_module.fail_json(
+                    msg="{0} does not exist".format(str(object_group))
+                )
+            object_groups[key] = object_group
+        return object_groups[key]
+
+    for l4_port in ["src_l4_port", "dst_l4_port"]:
+        l4_port_grp_name = l4_port + "_group"
+        if l4_port_grp_name in config:
+            config[l4_port_grp_name] = get_object_group(
+                config[l4_port_grp_name], "l4port"
+            )
+            config.pop(l4_port, None)
+            config.pop(l4_port + "_min", None)
+            config.pop(l4_port + "_max", None)
+    for ip_param in ["src_ip", "dst_ip"]:
+        ip_grp_name = ip_param + "_group"
+        if ip_grp_name in config:
+            config[ip_grp_name] = get_object_group(
+                config[ip_grp_name], acl.list_type
+            )
+            config.pop(ip_param, None)
+    # Need to translate L4 port name if any
+    if "src_l4_port" in config:
+        l4_port = config["src_l4_port"]
+        if isinstance(l4_port, int):
+            config["src_l4_port_min"] = l4_port
+            config["src_l4_port_max"] = l4_port
+        elif "-" in l4_port:
+            try:
+                port_range = iter(l4_port.split("-"))
+                config["src_l4_port_min"] = int(next(port_range))
+                config["src_l4_port_max"] = int(next(port_range))
+            except Exception as e:
+                ansible_module.fail_json(
+                    msg="Unable to parse range: {0} ({1})".format(
+                        l4_port, str(e)
+                    )
+                )
+        else:
+            if l4_port.isnumeric():
+                l4_port = int(l4_port)
+            config["src_l4_port_min"] = l4_port
+            config["src_l4_port_max"] = l4_port
+        del config["src_l4_port"]
+    if "dst_l4_port" in config:
+        l4_port = config["dst_l4_port"]
+        if isinstance(l4_port, int):
+            config["dst_l4_port_min"] = l4_port
+            config["dst_l4_port_max"] = l4_port
+        elif "-" in l4_port:
+            try:
+                port_range = iter(l4_port.split("-"))
+                config["dst_l4_port_min"] = int(next(port_range))
+                config["dst_l4_port_max"] = int(next(port_range))
+            except Exception as e:
+                ansible_module.fail_json(
+                    msg="Unable to parse range: {0} ({1})".format(
+                        l4_port, str(e)
+                    )
+                )
+        else:
+            if l4_port.isnumeric():
+                l4_port = int(l4_port)
+            config["dst_l4_port_min"] = l4_port
+            config["dst_l4_port_max"] = l4_port
+        del config["dst_l4_port"]
+
+    return config
+
+
+def get_ace_data(acl_entry):
+    """
+    Returns the attributes of an AclEntry, in the format pyaoscx creates it
+        with.
+    """
+    data = utils.get_attrs(acl_entry, acl_entry.config_attrs)
+    for attr in ["src_ip", "dst_ip", "src_mac", "dst_mac"]:
+        data[attr] = getattr(acl_entry, attr)
+    data["protocol"] = acl_entry.protocol
+    data["ethertype"] = acl_entry.ethertype
+    for attr in [
+        "dscp",
+        "icmp_type",
+        "src_l4_port_min",
+        "src_l4_port_max",
+        "dst_l4_port_min",
+        "dst_l4_port_max",
+    ]:
+        if getattr(acl_entry, attr):
+            data[attr] = getattr(acl_entry, attr)
+    for attr in acl_entry.cap_grp:
+        if data.get(attr) is not None:
+            data[attr] = data[attr].get_info_format()
+    return dict(
+        (attr, value)
+        for attr, value in data.items()
+        if value is not None and value != "any"
+    )
+
+
+def normalize_ace(data, group_attributes):
+    """
+    Returns the attributes of an ACE that tell whether two ACEs match,
+        without the unset ones, and with the keys of the object groups.
+    """
+    normalized = {}
+    for attr, value in data.items():
+        if attr == "sequence_number" or value in [None, False, "any"]:
+            continue
+        if attr in group_attributes:
+            if isinstance(value, dict):
+                value = sorted(value)
+            else:
+                value = [unquote(str(value).rstrip("/").rsplit("/", 1)[-1])]
+        normalized[attr] = value
+    return normalized
+
+
+def apply_bulk(ansible_module, session):
+    """
+    Bulk mode, writes all the entries of the ACL in a single request.
+    """
+    state = ansible_module.params["state"]
+    name = ansible_module.params["name"]
+    list_type = ansible_module.params["type"]
+    acl_entries = ansible_module.params["acl_entries"]
+    replace = ansible_module.params["bulk"] == "replace"
+
+    if not HAS_PYAOSCX:
+        ansible_module.fail_json(
+            msg="Could not find the PYAOSCX SDK. Make sure it is installed."
+        )
+
+    acl_path = "system/acls/{0},{1}".format(quote(name, safe=""), list_type)
+    responses = send_requests(
+        session,
+        [
+            dict(method="GET", path=acl_path + "?selector=writable"),
+            dict(
+                method="GET",
+                path=acl_path + "/cfg_aces?depth=2&selector=writable",
+            ),
+        ],
+    )
+    for response in responses:
+        if isinstance(response, Exception):
+            ansible_module.fail_json(
+                msg="Could not get the ACL: {0}".format(str(response))
+            )
+    acl_response, aces_response = responses
+    acl_exists = acl_response.status_code != 404
+    if acl_exists and acl_response.status_code != 200:
+        ansible_module.fail_json(
+            msg="Could not get the ACL: {0} {1}".format(
+                acl_response.status_code, acl_response.text
+            )
+        )
+    acl_data = acl_response.json() if acl_exists else {}
+    current = {}
+    if acl_exists:
+        if aces_response.status_code != 200:
+            ansible_module.fail_json(
+                msg="Could not get the ACL entries: {0} {1}".format(
+                    aces_response.status_code, aces_response.text
+                )
+            )
+        for sequence_number, ace in aces_response.json().items():
+            ace = dict(ace)
+            ace.pop("sequence_number", None)
+            current[int(sequence_number)] = ace
+    elif state == "delete":
+        # No entries to delete, the ACL isn't created either
+        ansible_module.exit_json(
+            changed=False, created=[], updated=[], deleted=[]
+        )
+
+    acl = session.api.get_module(session, "ACL", name, list_type=list_type)
+    AclEntry = session.api.get_module_class(session, "AclEntry")
+    intended = {}
+    object_groups = {}
+    for sequence_number, config_cls in (acl_entries or {}).items():
+        sequence_number = int(sequence_number)
+        if state == "delete":
+            intended[sequence_number] = None
+            continue
+        config = get_entry_config(
+            ansible_module, session, acl, config_cls, object_groups
+        )
+        try:
+            acl_entry = AclEntry(
+                session,
+                sequence_number=sequence_number,
+                parent_acl=acl,
+                **config
+            )
+        except Exception as e:
+            ansible_module.fail_json(msg=str(e))
+        intended[sequence_number] = get_ace_data(acl_entry)
+
+    if state == "delete":
+        aces = dict(
+            (sequence_number, ace)
+            for sequence_number, ace in current.items()
+            if sequence_number not in intended
+        )
+    elif replace:
+        aces = intended
+    else:
+        aces = dict(current)
+        aces.update(intended)
+
+    group_attributes = AclEntry.cap_grp
+    created = sorted(set(aces) - set(current))
+    deleted = sorted(set(current) - set(aces))
+    updated = sorted(
+        sequence_number
+        for sequence_number in set(aces) & set(current)
+        if normalize_ace(aces[sequence_number], group_attributes)
+        != normalize_ace(current[sequence_number], group_attributes)
+    )
+    result = dict(
+        changed=bool(created or updated or deleted or not acl_exists),
+        created=created,
+        updated=updated,
+        deleted=deleted,
+    )
+    if ansible_module.check_mode or not result["changed"]:
+        ansible_module.exit_json(**result)
+
+    operations = []
+    if not acl_exists:
+        operations.append(
+            dict(
+                method="POST",
+                path="system/acls",
+                data=dict(name=name, list_type=list_type, cfg_version=0),
+            )
+        )
+    # The new version makes the switch write the ACL to hardware, once for
+    # all its entries
+    data = dict(
+        (attr, value)
+        for attr, value in acl_data.items()
+        if attr not in ["name", "list_type", "cfg_aces"]
+    )
+    data["cfg_aces"] = dict(
+        (str(sequence_number), ace)
+        for sequence_number, ace in sorted(aces.items())
+    )
+    data["cfg_version"] = (acl_data.get("cfg_version") or 0) + 1
+    operations.append(dict(method="PUT", path=acl_path, data=data))
+
+    errors = []
+    for operation, response in zip(
+        operations, send_requests(session, operations)
+    ):
+        if isinstance(response, Exception):
+            error = str(response)
+        elif response.status_code >= 400:
+            error = "{0} {1}".format(response.status_code, response.text)
+        else:
+            continue
+        errors.append(
+            "{0} {1}: {2}".format(
+                operation["method"], operation["path"], error
+            )
+        )
+    if errors:
+        ansible_module.fail_json(
+            msg="Could not write the ACL: {0}".format("; ".join(errors)),
+            **result
+        )
+    ansible_module.exit_json(**result)
+
+
 def main():
     module_args = get_argument_spec()
 
@@ -454,6 +839,15 @@ def main():
         argument_spec=module_args, supports_check_mode=True
     )
 
+    if ansible_module.params["bulk"] and ansible_module.params["acl_entries"]:
+        try:
+            session = get_pyaoscx_session(ansible_module)
+        except Exception as e:
+            ansible_module.fail_json(
+                msg="Could not get PYAOSCX Session: {0}".format(str(e))
+            )
+        apply_bulk(ansible_module, session)
+
     result = dict(changed=False)
 
     if ansible_module.check_mode:
@@ -513,116 +907,12 @@ def main():
         if acl_entries:
             AclEntry = session.api.get_module_class(session, "AclEntry")
             sw_acl_entries = acl.cfg_aces.copy()
-            valid_tcp_flags = [
-                "ack",
-                "cwr",
-                "ece",
-                "established",
-                "fin",
-                "psh",
-                "rst",
-                "syn",
-                "urg",
-            ]
+            object_groups = {}
             for sequence_number, config_cls in acl_entries.items():
                 sequence_number = int(sequence_number)
-                config = config_cls.copy()
-                # Need to convert tcp_flags list in {tcp_flag: True}
-                if "tcp_flags" in config:
-                    for flag in config["tcp_flags"]:
-                        if flag in valid_tcp_flags:
-                            config["tcp_" + flag] = True
-                        else:
-                            ansible_module.fail_json(
-                                msg=(
-                                    "Invalid TCP Flag {0}, "
-                                    "valid flags are: {1}"
-                                ).format(flag, ", ".join(valid_tcp_flags))
-                            )
-                    del config["tcp_flags"]
-                ObjectGroup = session.api.get_module_class(
-                    session, "ObjectGroup"
+                config = get_entry_config(
+                    ansible_module, session, acl, config_cls, object_groups
                 )
-                for l4_port in ["src_l4_port", "dst_l4_port"]:
-                    l4_port_grp_name = l4_port + "_group"
-                    if l4_port_grp_name in config:
-                        group_name = config[l4_port_grp_name]
-                        l4_port_group = ObjectGroup(
-                            session, group_name, "l4port"
-                        )
-                        try:
-                            l4_port_group.get()
-                        except Exception:
-                            ansible_module.fail_json(
-                                msg="{0} does not exist".format(
-                                    str(l4_port_group)
-                                )
-                            )
-                        config[l4_port_grp_name] = l4_port_group
-                        config.pop(l4_port, None)
-                        config.pop(l4_port + "_min", None)
-                        config.pop(l4_port + "_max", None)
-                for ip_param in ["src_ip", "dst_ip"]:
-                    ip_grp_name = ip_param + "_group"
-                    if ip_grp_name in config:
-                        group_name = config[ip_grp_name]
-                        ip_group = ObjectGroup(
-                            session, group_name, acl.list_type
-                        )
-                        try:
-                            ip_group.get()
-                        except Exception:
-                            ansible_module.fail_json(
-                                msg="{0} does not exist".format(str(ip_group))
-                            )
-                        config[ip_grp_name] = ip_group
-                        config.pop(ip_param, None)
-                # Need to translate L4 port name if any
-                if "src_l4_port" in config:
-                    l4_port = config["src_l4_port"]
-                    if isinstance(l4_port, int):
-                        config["src_l4_port_min"] = l4_port
-                        config["src_l4_port_max"] = l4_port
-                    elif "-" in l4_port:
-                        try:
-                            port_range = iter(l4_port.split("-"))
-                            config["src_l4_port_min"] = int(next(port_range))
-                            config["src_l4_port_max"] = int(next(port_range))
-                        except Exception as e:
-                            ansible_module.fail_json(
-                                msg="Unable to parse range: {0} ({1})".format(
-                                    l4_port, str(e)
-                                )
-                            )
-                    else:
-                        if l4_port.isnumeric():
-                            l4_port = int(l4_port)
-                        config["src_l4_port_min"] = l4_port
-                        config["src_l4_port_max"] = l4_port
-                    del config["src_l4_port"]
-                if "dst_l4_port" in config:
-                    l4_port = config["dst_l4_port"]
-                    if isinstance(l4_port, int):
-                        config["dst_l4_port_min"] = l4_port
-                        config["dst_l4_port_max"] = l4_port
-                    elif "-" in l4_port:
-                        try:
-                            port_range = iter(l4_port.split("-"))
-                            config["dst_l4_port_min"] = int(next(port_range))
-                            config["dst_l4_port_max"] = int(next(port_range))
-                        except Exception as e:
-                            ansible_module.fail_json(
-                                msg="Unable to parse range: {0} ({1})".format(
-                                    l4_port, str(e)
-                                )
-                            )
-                    else:
-                        if l4_port.isnumeric():
-                            l4_port = int(l4_port)
-                        config["dst_l4_port_min"] = l4_port
-                        config["dst_l4_port_max"] = l4_port
-                    del config["dst_l4_port"]
-
                 try:
                     if sequence_number in sw_acl_entries:
                         acl_entry = sw_acl_entries[sequence_number]
@@ -59,10 +59,44 @@ options:
     type: str
     required: false
   sort_json:
-    description: flag whether or not to sort JSON config
+    description: >
+      flag whether or not to sort JSON config. Keys and lists are sorted in
+      natural order, so backups of the same config are identical.
     type: bool
     default: True
     required: false
+  compression:
+    description: >
+      Compression of output_file, written while the configuration is
+      serialized. zstd requires the zstandard Python library on the
+      controller.
+    type: str
+    choices:
+      - none
+      - gzip
+      - zstd
+    default: none
+    version_added: "4.6.0"
+    required: false
+  backup_store:
+    description: >
+      Directory of a content addressed backup store where the JSON
+      configuration is saved as a new version of the switch, instead of or
+      besides output_file. The configuration is canonicalized and hashed,
+      nothing is written when it is the same as the latest version of the
+      switch, and the rows of its top-level tables are stored once for all
+      the versions and switches sharing them. Every switch has an index of
+      its versions in hosts/<backup_name>.json, with backup_name quoted.
+    type: path
+    version_added: "4.6.0"
+    required: false
+  backup_name:
+    description: >
+      Name of the switch in backup_store, usually the inventory_hostname.
+      Defaults to the hostname of the configuration.
+    type: str
+    version_added: "4.6.0"
+    required: false
 """
 
 EXAMPLES = """
@@ -81,6 +115,18 @@ EXAMPLES = """
      config_name: checkpoint1
      output_file: /home/admin/checkpoint1.json
 
+ - name: Copy Running Config to local as compressed JSON
+   aoscx_backup_config:
+     config_name: running-config
+     output_file: /home/admin/running-config.json.gz
+     compression: gzip
+
+ - name: Save Running Config in a backup store, only when it changed
+   aoscx_backup_config:
+     config_name: running-config
+     backup_store: /mnt/backups/aoscx
+     backup_name: "{{ inventory_hostname }}"
+
  - name: Copy Running Config to TFTP server as JSON
    aoscx_backup_config:
      config_name: running-config
@@ -103,14 +149,60 @@ EXAMPLES = """
      vrf: mgmt
 """
 
-RETURN = r""" # """
+RETURN = r"""
+backup_version:
+  description: >
+    Version of the configuration in backup_store, the latest one when the
+    configuration didn't change.
+  returned: when backup_store is provided
+  type: dict
+  sample:
+    digest: 9f2c5e0b7d4a4c2fb1b3f5e8a6d7c9e0b1a2c3d4e5f60718293a4b5c6d7e8f90
+    config_name: running-config
+    time: "2024-05-02T01:00:03Z"
+"""
+
+import json
 
 from ansible.module_utils.basic import AnsibleModule
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx import (  # NOQA
+    dump_sorted_json,
+    open_output_file,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_backup_store import (  # NOQA
+    BackupStore,
+)
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
     get_pyaoscx_session,
 )
 
 
+def get_config(session, config_name):
+    """
+    Downloads a configuration as JSON.
+    """
+    response = session.request("GET", "fullconfigs/{0}".format(config_name))
+    if response.status_code != 200:
+        raise ValueError(
+            "Could not get {0}: {1} {2}".format(
+                config_name, response.status_code, response.text
+            )
+        )
+    return json.loads(response.text)
+
+
+def save_config(module, config, output_file, sort_json, compression):
+    """
+    Writes a JSON configuration to a local file, sorted and compressed while
+    it is written.
+    """
+    with open_output_file(module, output_file, compression) as to_file:
+        if sort_json:
+            dump_sorted_json(config, to_file, indent=4)
+        else:
+            json.dump(config, to_file, indent=4)
+
+
 def main():
     module_args = dict(
         config_name=dict(type="str", default="running-config"),
@@ -119,6 +211,11 @@ def main():
         config_type=dict(type="str", default="json", choices=["json", "cli"]),
         vrf=dict(type="str"),
         sort_json=dict(type="bool", default=True),
+        compression=dict(
+            type="str", default="none", choices=["none", "gzip", "zstd"]
+        ),
+        backup_store=dict(type="path", default=None),
+        backup_name=dict(type="str", default=None),
     )
 
     ansible_module = AnsibleModule(
@@ -131,6 +228,10 @@ def main():
     config_name = ansible_module.params["config_name"]
     config_type = ansible_module.params["config_type"]
     config_file = ansible_module.params["output_file"]
+    sort_json = ansible_module.params["sort_json"]
+    compression = ansible_module.params["compression"]
+    backup_store = ansible_module.params["backup_store"]
+    backup_name = ansible_module.params["backup_name"]
 
     result = dict(changed=False)
 
@@ -149,6 +250,43 @@ def main():
             msg="Could not get PYAOSCX Session: {0}".format(str(e))
         )
 
+    if tftp_path is None and backup_store is not None:
+        try:
+            config = get_config(session, config_name)
+        except ValueError as e:
+            ansible_module.fail_json(msg=str(e))
+        if backup_name is None:
+            backup_name = config.get("System", {}).get("hostname")
+            if not backup_name:
+                ansible_module.fail_json(
+                    msg="backup_name is required, the configuration has no "
+                    "hostname"
+                )
+        try:
+            version, written = BackupStore(backup_store).save(
+                backup_name, config, config_name
+            )
+            if config_file is not None:
+                save_config(
+                    ansible_module, config, config_file, sort_json, compression
+                )
+        except (IOError, OSError, ValueError) as e:
+            ansible_module.fail_json(msg=str(e))
+        result["backup_version"] = version
+        result["changed"] = written is not None or config_file is not None
+        ansible_module.exit_json(**result)
+
+    if tftp_path is None and config_file is not None:
+        try:
+            config = get_config(session, config_name)
+            save_config(
+                ansible_module, config, config_file, sort_json, compression
+            )
+        except (IOError, OSError, ValueError) as e:
+            ansible_module.fail_json(msg=str(e))
+        result["changed"] = True
+        ansible_module.exit_json(**result)
+
     device = Device(session)
 
     # Create a Configuration Object
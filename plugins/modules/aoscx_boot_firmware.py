@@ -51,6 +51,7 @@ RETURN = r""" # """
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
     get_pyaoscx_session,
+    invalidate_device_info,
 )
 
 
@@ -87,6 +88,8 @@ def main():
     device = Device(session)
 
     success = device.boot_firmware(partition_name)
+    # The switch boots another firmware, its cached information is outdated
+    invalidate_device_info(ansible_module)
 
     # Changed
     result["changed"] = success
@@ -89,6 +89,19 @@ options:
       - plain-text
     required: false
     type: str
+  compression:
+    description: >
+      Compression of 'output_file', written while the responses are
+      serialized, for large captures like 'show tech'. zstd requires the
+      zstandard Python library on the controller.
+    default: none
+    choices:
+      - none
+      - gzip
+      - zstd
+    required: false
+    type: str
+    version_added: "4.6.0"
   provider:
     description: A dict object containing connection details.
     suboptions:
@@ -197,6 +210,16 @@ EXAMPLES = """
   aoscx_command:
     commands:
       - ping 10.80.2.120 vrf mgmt repetitions 100
+
+- name: Collect show tech to a gzip compressed file
+  vars:
+    - ansible_command_timeout: 600
+  aoscx_command:
+    commands:
+      - show tech
+    output_file: /users/Home/show-tech.txt.gz
+    output_file_format: plain-text
+    compression: gzip
 """
 
 RETURN = r"""
@@ -232,6 +255,7 @@ from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.u
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx import (  # NOQA
     run_commands,
     aoscx_argument_spec,
+    open_output_file,
 )
 
 
@@ -274,6 +298,9 @@ def main():
         output_file_format=dict(
             type="str", default="json", choices=["json", "plain-text"]
         ),
+        compression=dict(
+            type="str", default="none", choices=["none", "gzip", "zstd"]
+        ),
     )
 
     argument_spec.update(aoscx_argument_spec)
@@ -323,20 +350,26 @@ def main():
 
     if module.params["output_file"] is not None:
         output_file_format = str(module.params["output_file_format"])
-        if output_file_format == "json":
-            output_list = []
-            for i, command in enumerate(commands_list):
-                output_dict = {}
-                output_dict["command"] = command
-                output_dict["response"] = responses[i]
-                output_list.append(output_dict)
-            output_file = str(module.params["output_file"])
-            with open(output_file, "w") as output:
-                json.dump(output_list, output, indent=4)
-                output.write("\n")
-        else:
-            output_file = str(module.params["output_file"])
-            with open(output_file, "w") as output:
+        output_file = str(module.params["output_file"])
+        compression = module.params["compression"]
+        with open_output_file(module, output_file, compression) as output:
+            if output_file_format == "json":
+                # Same text as json.dump of the whole list with indent=4,
+                # written one command at a time
+                output.write("[")
+                for i, command in enumerate(commands_list):
+                    output_dict = {}
+                    output_dict["command"] = command
+                    output_dict["response"] = responses[i]
+                    output.write("," if i else "")
+                    output.write("\n    ")
+                    output.write(
+                        json.dumps(output_dict, indent=4).replace(
+                            "\n", "\n    "
+                        )
+                    )
+                output.write("\n]\n" if commands_list else "]\n")
+            else:
                 for i, command in enumerate(commands_list):
                     output.write("command: ")
                     output.write(command)
@@ -149,8 +149,11 @@ options:
       startup-config. If "save_when" is set to "never", the running-config
       will never be copied to startup-config. If "save_when" is set to
       "modified", the running-config will be copied to startup-config if the
-      two differ. If "save_when" is set to "changed", the running-config will
-      be copied to startup-config if the task modified the running-config.
+      two differ; both configs are still read from the switch over SSH, but
+      only their SHA-1 checksums are returned to the module, unless the diff
+      needs their text. If "save_when" is set to "changed", the
+      running-config will be copied to startup-config if the task modified
+      the running-config.
     required: false
     type: str
     default: never
@@ -194,6 +197,17 @@ options:
       To be used with "diff_against", which should be set to "intended".
     required: false
     type: str
+  bulk:
+    description: >
+      Sends the configuration lines to the device at once, without waiting
+      for the prompt after each line, and checks the output of every line for
+      errors once all of them were sent. This is much faster for large
+      configurations, but when a line is rejected, the lines following it
+      have been applied already. Lines that prompt for an answer are not
+      supported in this mode.
+    required: false
+    type: bool
+    default: false
   provider:
     description: A dict object containing connection details.
     required: false
@@ -305,6 +319,11 @@ EXAMPLES = """
   aoscx_config:
     src:  /users/Home/golden.cfg
 
+- name: Push a large golden config without waiting for every line
+  aoscx_config:
+    src: /users/Home/golden.cfg
+    bulk: true
+
 - name: >
     Update interface 1/1/4, matching only if both "parents" and "lines" are
     present.
@@ -331,13 +350,16 @@ from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx import (  # NOQA
     run_commands,
     get_config,
+    get_config_checksum,
     load_config,
 )
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx import (  # NOQA
     aoscx_argument_spec,
 )
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_config import (  # NOQA
+    AoscxConfig,
+)
 from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import (  # NOQA
-    NetworkConfig,
     dumps,
 )
 
@@ -352,14 +374,14 @@ def get_running_config(module, config=None):
             contents = config
         else:
             contents = get_config(module)
-    return NetworkConfig(contents=contents)
+    return AoscxConfig(contents=contents)
 
 
 def get_candidate(module):
     """
     Gets config candidate
     """
-    candidate = NetworkConfig()
+    candidate = AoscxConfig()
 
     if module.params["src"]:
         candidate.loadfp(module.params["src"])
@@ -407,6 +429,7 @@ def main():
         ),
         diff_against=dict(choices=["running", "startup", "intended"]),
         diff_ignore_lines=dict(type="list", elements="str"),
+        bulk=dict(type="bool", default=False),
     )
 
     argument_spec.update(aoscx_argument_spec)
@@ -438,7 +461,7 @@ def main():
         module._diff and module.params["diff_against"] == "running"
     ):
         contents = get_config(module)
-        config = NetworkConfig(contents=contents)
+        config = AoscxConfig(contents=contents)
         if module.params["backup"]:
             result["__backup__"] = contents
             result["backup_options"] = module.params["backup_options"]
@@ -484,7 +507,7 @@ def main():
             result["updates"] = commands
 
             if not module.check_mode:
-                load_config(module, commands)
+                load_config(module, commands, bulk=module.params["bulk"])
 
             result["changed"] = True
 
@@ -501,18 +524,29 @@ def main():
     if module.params["save_when"] == "always":
         save_config(module, result)
     elif module.params["save_when"] == "modified":
-        output = run_commands(
-            module, ["show running-config", "show startup-config"]
-        )
-
-        running_config = NetworkConfig(
-            contents=output[0], ignore_lines=diff_ignore_lines
-        )
-        startup_config = NetworkConfig(
-            contents=output[1], ignore_lines=diff_ignore_lines
-        )
-
-        if running_config.sha1 != startup_config.sha1:
+        # Only the checksums of the configs are returned by the connection,
+        # unless the diff needs their text, which is then read only once
+        if module._diff:
+            output = run_commands(module, "show running-config")
+            running_config = AoscxConfig(
+                contents=output[0], ignore_lines=diff_ignore_lines
+            )
+            running_sha1 = running_config.sha1
+        else:
+            running_sha1 = get_config_checksum(
+                module, "running", diff_ignore_lines
+            )
+        if module._diff and module.params["diff_against"] == "startup":
+            output = run_commands(module, "show startup-config")
+            startup_config = AoscxConfig(
+                contents=output[0], ignore_lines=diff_ignore_lines
+            )
+            startup_sha1 = startup_config.sha1
+        else:
+            startup_sha1 = get_config_checksum(
+                module, "startup", diff_ignore_lines
+            )
+        if running_sha1 != startup_sha1:
             save_config(module, result)
     elif module.params["save_when"] == "changed":
         if result["changed"]:
@@ -520,13 +554,12 @@ def main():
 
     if module._diff:
         if not running_config:
-            output = run_commands(module, "show running-config")
-            contents = output[0]
+            contents = get_config(module)
         else:
             contents = running_config.config_text
 
         # recreate the object in order to process diff_ignore_lines
-        running_config = NetworkConfig(
+        running_config = AoscxConfig(
             contents=contents, ignore_lines=diff_ignore_lines
         )
 
@@ -551,7 +584,7 @@ def main():
             with open(module.params["intended_config"], "r") as intended_file:
                 contents = intended_file.read()
         if contents is not None:
-            base_config = NetworkConfig(
+            base_config = AoscxConfig(
                 contents=contents, ignore_lines=diff_ignore_lines
             )
 
@@ -74,6 +74,53 @@ options:
       - vrfs
       - lldp_neighbors
     required: false
+  max_concurrency:
+    description: >
+      Maximum number of REST requests sent to the device at the same time.
+      The requests of every subset and network resource don't depend on each
+      other, they are sent concurrently over the persistent connection. Set to
+      1 to send them one after the other.
+    type: int
+    default: 4
+    required: false
+  fields:
+    description: >
+      Attributes retrieved for a network resource or a subset, to reduce the
+      amount of data transferred. Keys are network resource names
+      (interfaces, vlans, vrfs, lldp_neighbors) or subsets retrieved from the
+      subsystems (fans, physical_interfaces, power_supplies, product_info,
+      resource_utilization), values are lists of attribute names. For network
+      resources the attributes are selected by the device. For subsets, only
+      the subsystem attributes of the requested subsets are retrieved, and
+      the entries of the subset are then limited to the given attributes.
+      The type of the VLANs is always retrieved, to leave out the internal
+      VLANs as pyaoscx does.
+    type: dict
+    required: false
+  depth:
+    description: >
+      Depth of the network resources retrieved. The default depth, 2, returns
+      every object with its attributes, references to other objects are
+      returned as URIs. Higher values also return the referenced objects.
+      With a depth of 1 the internal VLANs can't be told apart, and are
+      returned with the others.
+    type: int
+    required: false
+  cache:
+    description: >
+      Keep the responses of the device, with their ETag, in a cache file on
+      the controller. Following runs send conditional requests, the device
+      only transfers the facts that changed since, the rest is read from the
+      cache.
+    type: bool
+    default: false
+    required: false
+  cache_dir:
+    description: >
+      Directory of the cache files, one per device and REST version.
+    type: path
+    default: ~/.ansible/aoscx_facts_cache
+    required: false
 """
 
 EXAMPLES = """
@@ -99,6 +146,33 @@ EXAMPLES = """
     gather_network_resources:
       - vrfs
   register: facts_subset_output
+
+- name: Retrieve all network resources, sending up to 8 requests at a time
+  aoscx_facts:
+    gather_network_resources:
+      - interfaces
+      - vlans
+      - vrfs
+      - lldp_neighbors
+    max_concurrency: 8
+
+- name: Retrieve only the state and description of all interfaces
+  aoscx_facts:
+    gather_subset:
+      - host_name
+    gather_network_resources:
+      - interfaces
+    fields:
+      interfaces:
+        - admin_state
+        - link_state
+        - description
+
+- name: Retrieve the interfaces, only transferring them if they changed
+  aoscx_facts:
+    gather_network_resources:
+      - interfaces
+    cache: true
 """
 
 RETURN = r"""
@@ -160,12 +234,202 @@ ansible_net_mgmt_intf_status:
   returned: always
   type: dict
 """
+import json
+import os
+import tempfile
+
 from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves.urllib.parse import quote_plus
 
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
     get_pyaoscx_session,
+    invalidate_device_info,
+    prefetch_conditional_requests,
+    prefetch_requests,
 )
 
+# Status attributes of the system table retrieved by Device.get()
+SYSTEM_ATTRIBUTES = [
+    "admin_password_set",
+    "aruba_central",
+    "boot_time",
+    "capabilities",
+    "capacities",
+    "mgmt_intf_status",
+    "platform_name",
+    "software_images",
+    "software_info",
+    "software_version",
+    "qos_defaults",
+    "lldp_mgmt_neighbor_info",
+]
+
+# Subsystem attributes allowed to retrieve as facts
+SUBSYSTEM_ATTRIBUTES = [
+    "product_info",
+    "power_supplies",
+    "interfaces",
+    "fans",
+    "resource_utilization",
+]
+
+# Subsets retrieved from the subsystems, and their subsystem attribute
+SUBSYSTEM_SUBSETS = {
+    "fans": "fans",
+    "physical_interfaces": "interfaces",
+    "power_supplies": "power_supplies",
+    "product_info": "product_info",
+    "resource_utilization": "resource_utilization",
+}
+
+NETWORK_RESOURCE_URIS = {
+    "interfaces": "system/interfaces",
+    "vlans": "system/vlans",
+    "vrfs": "system/vrfs",
+    "lldp_neighbors": "system/interfaces/{0}/lldp_neighbors".format(
+        quote_plus("*")
+    ),
+}
+
+
+def get_resource_path(session, resource, fields, depth):
+    """
+    Returns the path, with its query string, of a network resource.
+    """
+    if depth is None:
+        depth = session.api.default_facts_depth
+    path = "{0}?depth={1}".format(NETWORK_RESOURCE_URIS[resource], depth)
+    if fields.get(resource):
+        attributes = list(fields[resource])
+        if resource == "vlans" and "type" not in attributes:
+            # Needed to drop the internal VLANs
+            attributes.append("type")
+        path += "&attributes={0}".format(",".join(attributes))
+    return path
+
+
+def remove_internal_vlans(vlans, fields):
+    """
+    Removes the internal VLANs, like Vlan.get_facts of pyaoscx, and the type
+        attribute when it was only retrieved to find them.
+    """
+    facts = {}
+    for vlan_id, vlan in vlans.items():
+        if isinstance(vlan, dict):
+            if vlan.get("type") == "internal":
+                continue
+            if fields.get("vlans") and "type" not in fields["vlans"]:
+                vlan = dict((k, v) for k, v in vlan.items() if k != "type")
+        facts[vlan_id] = vlan
+    return facts
+
+
+def get_subsystems_path(session, subset_list):
+    """
+    Returns the path, with its query string, retrieving the subsystem
+    attributes of the requested subsets, or None if none is requested.
+    """
+    requested = [
+        SUBSYSTEM_SUBSETS[s] for s in subset_list if s in SUBSYSTEM_SUBSETS
+    ]
+    attributes = [a for a in SUBSYSTEM_ATTRIBUTES if a in requested]
+    if not attributes:
+        return None
+    return "system/subsystems?attributes={0}&depth={1}".format(
+        ",".join(attributes), session.api.default_subsystem_facts_depth
+    )
+
+
+def get_fact_paths(session, network_resource_list, subset_list, fields, depth):
+    """
+    Returns the paths, with their query string, requested to gather the
+    facts, none of them depends on another.
+    """
+    paths = [
+        "firmware",
+        "system?depth={0}&attributes={1}".format(
+            session.api.default_depth, ",".join(SYSTEM_ATTRIBUTES)
+        ),
+    ]
+    subsystems_path = get_subsystems_path(session, subset_list)
+    if subsystems_path:
+        paths.append(subsystems_path)
+    for resource in network_resource_list or []:
+        paths.append(get_resource_path(session, resource, fields, depth))
+    return paths
+
+
+def get_cache_file(cache_dir, session):
+    """
+    Returns the path of the cache file of the device.
+    """
+    name = "{0}_v{1}.json".format(session.ip, session.api)
+    return os.path.join(cache_dir, name.replace(":", "_").replace("/", "_"))
+
+
+def load_cache(cache_file):
+    """
+    Reads a cache file, an unreadable file is an empty cache.
+    """
+    try:
+        with open(cache_file) as cache:
+            return json.load(cache)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def save_cache(cache_file, data):
+    """
+    Writes a cache file atomically, readable only by its owner, as facts may
+    contain sensitive information.
+    """
+    cache_dir = os.path.dirname(cache_file)
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir, 0o700)
+    fd, tmp_file = tempfile.mkstemp(dir=cache_dir)
+    try:
+        with os.fdopen(fd, "w") as cache:
+            json.dump(data, cache)
+        os.rename(tmp_file, cache_file)
+    except Exception:
+        os.remove(tmp_file)
+        raise
+
+
+def get_facts(session, path):
+    """
+    Performs a GET call and returns the decoded response, like the get_facts
+    class methods of pyaoscx, for a path with any query string.
+    """
+    response = session.request("GET", path)
+    if response.status_code != 200:
+        raise ValueError(
+            "GET {0}: {1} {2}".format(
+                path, response.status_code, response.text
+            )
+        )
+    return json.loads(response.text)
+
+
+def select_fields(entries, fields):
+    """
+    Limits a subset to the given attributes. Subsets with an entry per
+    component, like fans or interfaces, have every entry limited.
+    """
+    if not any(isinstance(entry, dict) for entry in entries.values()):
+        return dict((k, v) for k, v in entries.items() if k in fields)
+    return dict(
+        (
+            name,
+            (
+                dict((k, v) for k, v in entry.items() if k in fields)
+                if isinstance(entry, dict)
+                else entry
+            ),
+        )
+        for name, entry in entries.items()
+    )
+
 
 def main():
     """
@@ -211,6 +475,11 @@ def main():
             elements="str",
             choices=["interfaces", "vlans", "vrfs", "lldp_neighbors"],
         ),
+        "max_concurrency": dict(type="int", default=4),
+        "fields": dict(type="dict"),
+        "depth": dict(type="int"),
+        "cache": dict(type="bool", default=False),
+        "cache_dir": dict(type="path", default="~/.ansible/aoscx_facts_cache"),
     }
     ansible_module = AnsibleModule(
         argument_spec=argument_spec, supports_check_mode=True
@@ -240,36 +509,57 @@ def main():
     # Retrieve variables from module parameters
     network_resource_list = ansible_module.params["gather_network_resources"]
     subset_list = ansible_module.params["gather_subset"]
+    max_concurrency = ansible_module.params["max_concurrency"]
+    if max_concurrency < 1:
+        ansible_module.fail_json(msg="max_concurrency must be at least 1")
+    fields = ansible_module.params["fields"] or {}
+    depth = ansible_module.params["depth"]
+    for name, attributes in fields.items():
+        if name not in NETWORK_RESOURCE_URIS and name not in SUBSYSTEM_SUBSETS:
+            ansible_module.fail_json(
+                msg="fields: {0} is not a network resource or a subsystem "
+                "subset".format(name)
+            )
+        if not isinstance(attributes, list):
+            fields[name] = [
+                attribute.strip() for attribute in str(attributes).split(",")
+            ]
+
+    # Facts are always retrieved from the switch, this also refreshes the
+    # device information cached by the connection for later tasks
+    invalidate_device_info(ansible_module)
+    # Send the requests of all fact sources at once, the calls below are
+    # answered from their responses and merged in the same order as always
+    fact_paths = get_fact_paths(
+        session, network_resource_list, subset_list, fields, depth
+    )
+    if ansible_module.params["cache"]:
+        cache_file = get_cache_file(
+            ansible_module.params["cache_dir"], session
+        )
+        cache = load_cache(cache_file)
+        prefetch_conditional_requests(
+            session, fact_paths, cache, max_concurrency
+        )
+        try:
+            save_cache(cache_file, cache)
+        except (IOError, OSError) as e:
+            ansible_module.warn(
+                "Unable to save facts cache {0}: {1}".format(cache_file, e)
+            )
+    else:
+        prefetch_requests(session, fact_paths, max_concurrency)
 
     # Retrieve ansible_network_resources
     ansible_network_resources = {}
     if network_resource_list is not None:
         for resource in network_resource_list:
             try:
-                if resource == "interfaces":
-                    Interface = session.api.get_module_class(
-                        session, "Interface"
-                    )
-                    ansible_network_resources.update(
-                        {"interfaces": Interface.get_facts(session)}
-                    )
-                elif resource == "vlans":
-                    Vlan = session.api.get_module_class(session, "Vlan")
-                    ansible_network_resources.update(
-                        {"vlans": Vlan.get_facts(session)}
-                    )
-                elif resource == "vrfs":
-                    Vrf = session.api.get_module_class(session, "Vrf")
-                    ansible_network_resources.update(
-                        {"vrfs": Vrf.get_facts(session)}
-                    )
-                elif resource == "lldp_neighbors":
-                    LLDPNeighbor = session.api.get_module_class(
-                        session, "LLDPNeighbor"
-                    )
-                    ansible_network_resources.update(
-                        {"lldp_neighbors": LLDPNeighbor.get_facts(session)}
-                    )
+                path = get_resource_path(session, resource, fields, depth)
+                facts = get_facts(session, path)
+                if resource == "vlans":
+                    facts = remove_internal_vlans(facts, fields)
+                ansible_network_resources.update({resource: facts})
             except Exception as e:
                 ansible_module.fail_json(
                     msg="Network resources: {0}".format(str(e))
@@ -325,20 +615,18 @@ def main():
     main_version = int(next(curr_firmware))
     sub_version = int(next(curr_firmware))
 
-    # Retrieve device facts
-    try:
-        switch.get_subsystems()  # subsystem
-    except Exception as e:
-        ansible_module.fail_json(msg="Subsystem: {0}".format(str(e)))
+    # Retrieve device facts, only the subsystem attributes of the requested
+    # subsets
+    subsystems = {}
+    subsystems_path = get_subsystems_path(session, subset_list)
+    if subsystems_path:
+        try:
+            subsystems = get_facts(session, subsystems_path)  # subsystem
+        except Exception as e:
+            ansible_module.fail_json(msg="Subsystem: {0}".format(str(e)))
 
     # Set the subsystem attributes allowed to retrieve as facts
-    allowed_subsystem_attributes = [
-        "product_info",
-        "power_supplies",
-        "interfaces",
-        "fans",
-        "resource_utilization",
-    ]
+    allowed_subsystem_attributes = SUBSYSTEM_ATTRIBUTES
 
     # Set the default subsets that are always retreived as facts
     default_subset_list = ["management_interface", "software_version"]
@@ -353,6 +641,7 @@ def main():
     # in argument_spec
     use_data_planes = False
     for subset in subset_list:
+        subset_fields = fields.get(subset)
         # Argument translation for management_interface and
         # physical_interfaces
         if subset == "management_interface":
@@ -406,7 +695,7 @@ def main():
             ansible_facts.update({str_subset: {}})
 
             # Iterate through Device subsystems
-            for subsystem, value in switch.subsystems.items():
+            for subsystem, value in subsystems.items():
 
                 # Get attribute value and update the Ansible facts
                 # dictionary
@@ -416,7 +705,9 @@ def main():
                     for dp in ss_dps:
                         intfs.update(ss_dps[dp][subset])
                 else:
-                    intfs = switch.subsystems[subsystem][subset]
+                    intfs = subsystems[subsystem][subset]
+                if subset_fields and isinstance(intfs, dict):
+                    intfs = select_fields(intfs, subset_fields)
                 ansible_facts[str_subset].update({subsystem: intfs})
 
     ansible_module.exit_json(ansible_facts=ansible_facts)
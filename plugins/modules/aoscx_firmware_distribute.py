@@ -0,0 +1,181 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "certified",
+}
+
+DOCUMENTATION = """
+---
+module: aoscx_firmware_distribute
+version_added: "4.6.0"
+short_description: >
+  Upload a local firmware image to many AOS-CX switches concurrently.
+description: >
+  This action plugin runs on the controller, serves a local firmware image
+  over HTTP from the controller and makes many AOS-CX switches download it at
+  the same time, as with the remote_firmware_file_path of
+  aoscx_upload_firmware, instead of uploading the image to every switch from
+  its own fork. The server supports range requests, sends the image with
+  sendfile, and limits the number of concurrent downloads. It only serves the
+  image, under a random path, and is stopped when the task ends. Every switch
+  is reached with the variables of the aoscx connection in the inventory
+  (ansible_host, ansible_user, ansible_password, ansible_aoscx_rest_version
+  and ansible_aoscx_use_proxy), without validating their certificates, like
+  the connection, and switches whose partition already holds the image are
+  skipped. Run the task once, with run_once, for the hosts of the play or the
+  given ones.
+author: Aruba Networks (@ArubaNetworks)
+options:
+  src:
+    description: Path of the firmware image on the controller.
+    type: path
+    required: true
+  hosts:
+    description: >
+      Inventory hostnames of the switches to upload the image to. Defaults to
+      the hosts of the play, and is required when the play has many hosts and
+      the task doesn't run once, with run_once.
+    type: list
+    elements: str
+    required: false
+  partition_name:
+    description: Name of the partition for the image to be uploaded.
+    type: str
+    default: primary
+    choices:
+      - primary
+      - secondary
+    required: false
+  vrf:
+    description: VRF the switches use to reach the controller.
+    type: str
+    default: mgmt
+    required: false
+  firmware_version:
+    description: >
+      Version of the firmware image, like GL.10.13.1000. By default it is
+      read from the header of the image, or from its file name, like
+      GL_10_13_1000.swi.
+    type: str
+    required: false
+  force:
+    description: >
+      Upload the image even to the switches whose partition already holds the
+      same firmware version.
+    type: bool
+    default: false
+    required: false
+  server_address:
+    description: >
+      Address the switches reach the controller at. By default it is the
+      address of the controller on the route to the first switch.
+    type: str
+    required: false
+  server_port:
+    description: >
+      TCP port of the HTTP server on the controller, 0 to use any free port.
+    type: int
+    default: 0
+    required: false
+  max_connections:
+    description: >
+      Maximum number of images sent at the same time, switches beyond it
+      wait for a download to finish.
+    type: int
+    default: 32
+    required: false
+  max_workers:
+    description: Maximum number of switches uploading at the same time.
+    type: int
+    default: 32
+    required: false
+  timeout:
+    description: Timeout, in seconds, of every REST request to a switch.
+    type: int
+    default: 30
+    required: false
+  upload_timeout:
+    description: >
+      Seconds a switch is given to download the image before its upload is
+      considered failed.
+    type: int
+    default: 1800
+    required: false
+  poll_interval:
+    description: >
+      Maximum seconds between two checks of the status of the upload of a
+      switch, which is checked after 1, 2, 4... seconds.
+    type: int
+    default: 10
+    required: false
+"""
+
+EXAMPLES = """
+- name: Upload firmware to the secondary partition of every switch
+  aoscx_firmware_distribute:
+    src: /tftpboot/GL_10_13_1000.swi
+    partition_name: secondary
+  run_once: true
+  delegate_to: localhost
+
+- name: Upload firmware to a group through a given interface of the controller
+  aoscx_firmware_distribute:
+    src: /tftpboot/GL_10_13_1000.swi
+    hosts: "{{ groups['access_switches'] }}"
+    server_address: 192.168.1.2
+    server_port: 8000
+    vrf: default
+    max_connections: 16
+  run_once: true
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+firmware_version:
+  description: Version of the firmware image, null if it is unknown.
+  returned: always
+  type: str
+  sample: GL.10.13.1000
+hosts:
+  description: >
+    Result of every switch, whether it changed and the seconds its upload
+    took, or the error when it failed.
+  returned: success or failure
+  type: dict
+  sample:
+    access-1:
+      changed: true
+      firmware_version: GL.10.13.1000
+      elapsed: 84.312
+    access-2:
+      changed: false
+      firmware_version: GL.10.13.1000
+      msg: The primary partition already holds GL.10.13.1000
+    access-3:
+      failed: true
+      msg: "Firmware upload failed: Connection timed out"
+summary:
+  description: >
+    Number of switches uploaded, skipped and failed, and the bytes and
+    downloads served by the controller.
+  returned: success or failure
+  type: dict
+  sample:
+    total: 3
+    changed: 1
+    unchanged: 1
+    failed: 1
+    bytes_sent: 512000000
+    transfers: 1
+"""
@@ -0,0 +1,122 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "certified",
+}
+
+DOCUMENTATION = """
+---
+module: aoscx_firmware_status
+version_added: "4.6.0"
+short_description: >
+  Wait for the end of the firmware uploads of many AOS-CX switches.
+description: >
+  This action plugin runs on the controller and waits for the end of the
+  firmware uploads started by aoscx_upload_firmware on many AOS-CX switches at
+  once, instead of holding one fork per switch with wait_firmware_upload for
+  the whole upload. The status of every switch is checked after 1, 2, 4...
+  seconds, with some jitter, up to max_delay seconds between checks. Every
+  switch is reached with the variables of the aoscx connection in the
+  inventory (ansible_host, ansible_user, ansible_password,
+  ansible_aoscx_rest_version and ansible_aoscx_use_proxy), without validating
+  their certificates, like the connection. Run the task once, with run_once,
+  for the hosts of the play or the given ones.
+author: Aruba Networks (@ArubaNetworks)
+options:
+  hosts:
+    description: >
+      Inventory hostnames of the switches to wait for. Defaults to the hosts
+      of the play, and is required when the play has many hosts and the task
+      doesn't run once, with run_once.
+    type: list
+    elements: str
+    required: false
+  jobs_from:
+    description: >
+      Name of the variable every switch registered the result of
+      aoscx_upload_firmware in. Its job is waited for, and switches without a
+      job, because the upload was skipped or failed, are skipped. By default
+      the end of any upload in progress on every switch is waited for.
+    type: str
+    required: false
+  wait_timeout:
+    description: >
+      Seconds the end of the upload of a switch is waited for, before it is
+      considered failed.
+    type: int
+    default: 1800
+    required: false
+  max_delay:
+    description: Maximum seconds between two checks of a switch.
+    type: int
+    default: 60
+    required: false
+  max_workers:
+    description: >
+      Maximum number of switches waited for at the same time, the workers
+      are idle between checks.
+    type: int
+    default: 256
+    required: false
+  timeout:
+    description: Timeout, in seconds, of every REST request to a switch.
+    type: int
+    default: 30
+    required: false
+"""
+
+EXAMPLES = """
+- name: Start the upload of firmware to primary on every switch
+  aoscx_upload_firmware:
+    partition_name: primary
+    remote_firmware_file_path: http://192.168.1.2:8000/GL_10_13_1000.swi
+    vrf: mgmt
+  register: upload
+
+- name: Wait for the uploads of all the switches from the controller
+  aoscx_firmware_status:
+    jobs_from: upload
+    wait_timeout: 3600
+  run_once: true
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+hosts:
+  description: >
+    Result of every switch, the status of its upload and the seconds it was
+    waited for, or the error when it failed.
+  returned: always
+  type: dict
+  sample:
+    access-1:
+      status: success
+      firmware_version: GL.10.13.1000
+      elapsed: 312.5
+    access-2:
+      skipped: true
+      msg: No firmware upload was started
+    access-3:
+      failed: true
+      msg: "Firmware upload failed: Image verification failed"
+summary:
+  description: Number of switches uploaded, skipped and failed.
+  returned: always
+  type: dict
+  sample:
+    total: 3
+    succeeded: 1
+    skipped: 1
+    failed: 1
+"""
@@ -0,0 +1,145 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "certified",
+}
+
+DOCUMENTATION = """
+---
+module: aoscx_fleet_backup
+version_added: "4.6.0"
+short_description: >
+  Download the configuration of many AOS-CX switches concurrently.
+description: >
+  This action plugin runs on the controller and downloads the JSON
+  configuration of many AOS-CX switches concurrently through the REST API,
+  with a bounded pool of workers, instead of running aoscx_backup_config in
+  one fork per switch. Every switch is reached with the variables of the aoscx
+  connection in the inventory (ansible_host, ansible_user, ansible_password,
+  ansible_aoscx_rest_version and ansible_aoscx_use_proxy), without validating
+  their certificates, like the connection. Configurations are written as soon
+  as they are downloaded. Run the task once, with run_once, for the hosts of
+  the play or the given ones.
+author: Aruba Networks (@ArubaNetworks)
+options:
+  hosts:
+    description: >
+      Inventory hostnames of the switches to back up. Defaults to the hosts of
+      the play, and is required when the play has many hosts and the task
+      doesn't run once, with run_once.
+    type: list
+    elements: str
+    required: false
+  config_name:
+    description: Config file or checkpoint to be downloaded.
+    type: str
+    default: running-config
+    required: false
+  dest:
+    description: >
+      Directory where the configuration of every switch is saved, as
+      <inventory_hostname>.json, with .gz or .zst appended when compressed.
+      At least one of dest and backup_store is required.
+    type: path
+    required: false
+  backup_store:
+    description: >
+      Directory of a content addressed backup store, see aoscx_backup_config,
+      where the configuration of every switch is saved as a new version
+      named after its inventory_hostname, unless it didn't change.
+    type: path
+    required: false
+  sort_json:
+    description: >
+      Whether the JSON configurations saved in dest are sorted, so backups of
+      the same config are identical.
+    type: bool
+    default: true
+    required: false
+  compression:
+    description: >
+      Compression of the files saved in dest. zstd requires the zstandard
+      Python library on the controller.
+    type: str
+    choices:
+      - none
+      - gzip
+      - zstd
+    default: none
+    required: false
+  max_workers:
+    description: Maximum number of switches downloaded at the same time.
+    type: int
+    default: 32
+    required: false
+  timeout:
+    description: >
+      Timeout, in seconds, of every request to a switch: login, download and
+      logout.
+    type: int
+    default: 30
+    required: false
+  retries:
+    description: >
+      Number of times the download of a switch is retried after a connection
+      error, a timeout or a server error, waiting 1, 2, 4... seconds between
+      attempts. Login failures are not retried.
+    type: int
+    default: 2
+    required: false
+"""
+
+EXAMPLES = """
+- name: Back up the running-config of every switch of the play
+  aoscx_fleet_backup:
+    dest: /mnt/backups/aoscx/{{ '%Y-%m-%d' | strftime }}
+    compression: gzip
+  run_once: true
+
+- name: Save the running-config of a group in a backup store
+  aoscx_fleet_backup:
+    hosts: "{{ groups['access_switches'] }}"
+    backup_store: /mnt/backups/aoscx-store
+    max_workers: 64
+    timeout: 60
+  run_once: true
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+hosts:
+  description: >
+    Result of every switch, with the path of its file, its backup_version in
+    the backup store, whether it changed and the seconds it took, or the
+    error when it failed.
+  returned: always
+  type: dict
+  sample:
+    core-1:
+      path: /mnt/backups/aoscx/core-1.json.gz
+      changed: true
+      elapsed: 1.204
+    core-2:
+      failed: true
+      msg: "Login failed: 401 Login failed"
+summary:
+  description: Number of switches backed up, changed and failed.
+  returned: always
+  type: dict
+  sample:
+    total: 2
+    succeeded: 1
+    changed: 1
+    failed: 1
+"""
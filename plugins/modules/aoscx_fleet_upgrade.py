@@ -0,0 +1,238 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "certified",
+}
+
+DOCUMENTATION = """
+---
+module: aoscx_fleet_upgrade
+version_added: "4.6.0"
+short_description: >
+  Upgrade the firmware of many AOS-CX switches in rolling waves.
+description: >
+  This action plugin runs on the controller and upgrades the firmware of many
+  AOS-CX switches. It first reads the firmware and the VSX configuration of
+  every switch, then stages the image on the alternate partition of all the
+  switches that don't run it yet at the same time, served from the controller
+  like aoscx_firmware_distribute or pulled from an HTTP server. Then it boots
+  the switches in waves of wave_size switches, waiting for the REST API of
+  every switch of a wave to be reachable again and to report the new running
+  version before the next wave. The members of a VSX pair, paired by their
+  system MAC or their keepalive addresses, are never booted in the same wave,
+  the secondary member is booted first, and a member is only booted once its
+  peer reports its ISL up and its configuration in sync after its boot. A
+  member isn't booted when the boot of its peer failed. The upgrade stops when
+  more than max_failures switches failed. Every switch is reached with the variables of the aoscx
+  connection in the inventory (ansible_host, ansible_user, ansible_password,
+  ansible_aoscx_rest_version and ansible_aoscx_use_proxy), without validating
+  their certificates, like the connection. Run the task once, with run_once,
+  for the hosts of the play or the given ones. In check mode, the switches are
+  inspected and the waves are returned, without staging or booting anything.
+author: Aruba Networks (@ArubaNetworks)
+options:
+  src:
+    description: >
+      Path of the firmware image on the controller, served to the switches
+      over HTTP. Mutually exclusive with remote_firmware_file_path, one of
+      them is required.
+    type: path
+    required: false
+  remote_firmware_file_path:
+    description: >
+      HTTP server address and path of the firmware image, must be reachable
+      by the switches through vrf.
+    type: str
+    required: false
+  firmware_version:
+    description: >
+      Version of the firmware image, like GL.10.13.1000, verified after the
+      boot. By default it is read from the header of src, or from the file
+      name of the image, like GL_10_13_1000.swi.
+    type: str
+    required: false
+  hosts:
+    description: >
+      Inventory hostnames of the switches to upgrade. Defaults to the hosts of
+      the play, and is required when the play has many hosts and the task
+      doesn't run once, with run_once.
+    type: list
+    elements: str
+    required: false
+  partition_name:
+    description: >
+      Partition the image is staged to and booted from. By default it is the
+      partition the switch didn't boot from, so the running image stays as a
+      fallback.
+    type: str
+    choices:
+      - primary
+      - secondary
+    required: false
+  vrf:
+    description: VRF the switches use to download the image.
+    type: str
+    default: mgmt
+    required: false
+  force:
+    description: >
+      Stage and boot the image even on the switches already running it.
+    type: bool
+    default: false
+    required: false
+  boot:
+    description: >
+      Whether the switches are booted after the image is staged. If false,
+      the image is only staged.
+    type: bool
+    default: true
+    required: false
+  wave_size:
+    description: Maximum number of switches booted at the same time.
+    type: int
+    default: 1
+    required: false
+  max_failures:
+    description: >
+      Number of failed switches tolerated, the next waves are not booted when
+      more switches failed.
+    type: int
+    default: 0
+    required: false
+  pause:
+    description: Seconds waited between two waves.
+    type: int
+    default: 0
+    required: false
+  server_address:
+    description: >
+      Address the switches reach the controller at, when src is provided. By
+      default it is the address of the controller on the route to the first
+      switch.
+    type: str
+    required: false
+  server_port:
+    description: >
+      TCP port of the HTTP server on the controller, 0 to use any free port.
+    type: int
+    default: 0
+    required: false
+  max_connections:
+    description: >
+      Maximum number of images sent by the controller at the same time.
+    type: int
+    default: 32
+    required: false
+  max_workers:
+    description: >
+      Maximum number of switches inspected, staged or booted at the same
+      time.
+    type: int
+    default: 32
+    required: false
+  timeout:
+    description: Timeout, in seconds, of every REST request to a switch.
+    type: int
+    default: 30
+    required: false
+  upload_timeout:
+    description: >
+      Seconds a switch is given to download the image before its staging is
+      considered failed.
+    type: int
+    default: 1800
+    required: false
+  boot_timeout:
+    description: >
+      Seconds a switch is given to boot and report the new running version
+      before its boot is considered failed, and a VSX member booted again is
+      given to be in sync with its peer before its peer is skipped.
+    type: int
+    default: 900
+    required: false
+  poll_interval:
+    description: >
+      Maximum seconds between two checks of a switch that is downloading the
+      image or booting.
+    type: int
+    default: 30
+    required: false
+"""
+
+EXAMPLES = """
+- name: Upgrade every switch of the play, three at a time
+  aoscx_fleet_upgrade:
+    src: /tftpboot/GL_10_13_1000.swi
+    wave_size: 3
+    max_failures: 1
+    pause: 60
+  run_once: true
+  delegate_to: localhost
+
+- name: Show the waves the upgrade of a group would use
+  aoscx_fleet_upgrade:
+    remote_firmware_file_path: http://192.168.1.2:8000/GL_10_13_1000.swi
+    hosts: "{{ groups['access_switches'] }}"
+    wave_size: 10
+  check_mode: true
+  run_once: true
+  delegate_to: localhost
+"""
+
+RETURN = r"""
+firmware_version:
+  description: Version of the firmware image.
+  returned: always
+  type: str
+  sample: GL.10.13.1000
+waves:
+  description: Switches booted together, in order.
+  returned: when the switches were inspected
+  type: list
+  elements: list
+  sample: [["core-2", "access-1"], ["core-1", "access-2"]]
+hosts:
+  description: >
+    Result of every switch, with its previous version, the partition the
+    image was staged to, whether it was staged and changed, or the error when
+    it failed or the reason it wasn't booted.
+  returned: always
+  type: dict
+  sample:
+    core-1:
+      previous_version: GL.10.12.1000
+      partition_name: secondary
+      staged: true
+      changed: true
+      firmware_version: GL.10.13.1000
+    core-2:
+      previous_version: GL.10.12.1000
+      partition_name: secondary
+      staged: true
+      failed: true
+      msg: "Boot failed: The switch wasn't reachable 900 seconds after the boot"
+summary:
+  description: >
+    Number of switches upgraded, already running the image, not booted and
+    failed, and the seconds the upgrade took.
+  returned: when the switches were inspected
+  type: dict
+  sample:
+    total: 2
+    upgraded: 1
+    unchanged: 0
+    skipped: 0
+    failed: 1
+    elapsed: 1834.2
+"""
@@ -0,0 +1,501 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "certified",
+}
+
+DOCUMENTATION = """
+---
+module: aoscx_interfaces
+version_added: "4.6.0"
+short_description: Configure many interfaces of an AOS-CX switch at once.
+description: >
+  This module configures many interfaces in a single task, with ranges of
+  ports like 1/1/1-1/1/48, instead of one aoscx_interface,
+  aoscx_l2_interface or aoscx_l3_interface task per interface. The
+  interfaces of the switch are read with a single request, compared with
+  the given ones, and only the interfaces that differ are updated, with all
+  the requests sent in a single batch. The interfaces must exist, like the
+  physical ports of the switch. Interfaces becoming Layer3 interfaces lose
+  their VLANs, and interfaces becoming Layer2 interfaces lose their IPv4
+  address and go back to the default VRF.
+author: Aruba Networks (@ArubaNetworks)
+options:
+  interfaces:
+    description: >
+      Interfaces to configure. When several entries list the same interface,
+      the options of the later ones take precedence.
+    type: list
+    elements: dict
+    required: true
+    suboptions:
+      name:
+        description: >
+          Interface names and ranges of ports, like 1/1/1-1/1/48,1/2/1-4,
+          sharing the options of the entry.
+        type: raw
+        required: true
+      description:
+        description: >
+          Description of the interfaces, {name} is replaced by the name of
+          every interface, like Access port {name}.
+        type: str
+        required: false
+      enabled:
+        description: >
+          Administrative state of the interfaces. Use true to
+          administratively enable them.
+        type: bool
+        required: false
+      mtu:
+        description: MTU of the interfaces.
+        type: int
+        required: false
+      vlan_mode:
+        description: >
+          VLAN mode of the interfaces, access or trunk, which makes them
+          Layer2 interfaces.
+        type: str
+        choices:
+          - access
+          - trunk
+        required: false
+      vlan_access:
+        description: Access VLAN ID, vlan_mode must be set to access.
+        type: int
+        required: false
+      vlan_trunks:
+        description: >
+          VLAN IDs and ranges of VLAN IDs allowed on the trunk, like
+          100-199,300, or all. vlan_mode must be set to trunk.
+        type: raw
+        required: false
+      native_vlan_id:
+        description: >
+          VLAN trunk native VLAN ID, vlan_mode must be set to trunk.
+        type: int
+        required: false
+      native_vlan_tag:
+        description: >
+          Flag for accepting only tagged packets on VLAN trunk native,
+          vlan_mode must be set to trunk.
+        type: bool
+        required: false
+      ipv4_address:
+        description: >
+          Primary IPv4 address, in the address/mask format, which makes the
+          interfaces Layer3 interfaces. Mutually exclusive with vlan_mode.
+        type: str
+        required: false
+      vrf:
+        description: >
+          VRF of the Layer3 interfaces. Mutually exclusive with vlan_mode.
+        type: str
+        required: false
+  state:
+    description: >
+      With merged, the given options of the interfaces are updated. With
+      replaced, the options that aren't given are also reset to their
+      defaults, the description is removed, the administrative state and MTU
+      are the ones of the platform, Layer2 interfaces go back to access VLAN
+      1, or trunk all VLANs with native VLAN 1 untagged, and Layer3
+      interfaces lose their IPv4 address.
+    type: str
+    default: merged
+    choices:
+      - merged
+      - replaced
+    required: false
+  max_concurrency:
+    description: >
+      Maximum number of interfaces updated at the same time. The updates of
+      the interfaces don't depend on each other, above 1 they are sent
+      concurrently over the persistent connection.
+    type: int
+    default: 1
+    required: false
+"""
+
+EXAMPLES = """
+- name: Configure the access ports of a switch
+  aoscx_interfaces:
+    interfaces:
+      - name: 1/1/1-1/1/48
+        description: Access port {name}
+        enabled: true
+        vlan_mode: access
+        vlan_access: 10
+      - name: 1/1/49-1/1/52
+        description: Uplink {name}
+        enabled: true
+        mtu: 9198
+        vlan_mode: trunk
+        vlan_trunks: 10-20,100
+        native_vlan_id: 1
+    max_concurrency: 8
+
+- name: Route an interface and reset the others to their defaults
+  aoscx_interfaces:
+    interfaces:
+      - name: 1/1/1-1/1/47
+        vlan_mode: access
+      - name: 1/1/48
+        ipv4_address: 10.10.10.1/24
+        vrf: red
+    state: replaced
+"""
+
+RETURN = r"""
+updated:
+  description: >
+    Interfaces updated, or that would be updated in check mode, as names and
+    ranges of ports.
+  returned: always
+  type: str
+  sample: 1/1/1-1/1/12,1/1/49
+"""
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves.urllib.parse import quote, unquote
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
+    get_pyaoscx_session,
+    send_requests,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_ranges import (  # NOQA
+    compress_interface_names,
+    expand_interface_names,
+    expand_vlan_ids,
+)
+
+# Attributes of the interfaces read from the switch
+INTERFACE_ATTRIBUTES = [
+    "name",
+    "description",
+    "user_config",
+    "routing",
+    "vlan_mode",
+    "vlan_tag",
+    "vlan_trunks",
+    "ip4_address",
+    "vrf",
+]
+
+L2_OPTIONS = [
+    "vlan_access",
+    "vlan_trunks",
+    "native_vlan_id",
+    "native_vlan_tag",
+]
+
+L3_OPTIONS = ["ipv4_address", "vrf"]
+
+TRUNK_MODES = ["native-tagged", "native-untagged"]
+
+
+def get_argument_spec():
+    argument_spec = {
+        "interfaces": {
+            "type": "list",
+            "elements": "dict",
+            "required": True,
+            "options": {
+                "name": {"type": "raw", "required": True},
+                "description": {"type": "str", "required": False},
+                "enabled": {"type": "bool", "required": False},
+                "mtu": {"type": "int", "required": False},
+                "vlan_mode": {
+                    "type": "str",
+                    "required": False,
+                    "choices": ["access", "trunk"],
+                },
+                "vlan_access": {"type": "int", "required": False},
+                "vlan_trunks": {"type": "raw", "required": False},
+                "native_vlan_id": {"type": "int", "required": False},
+                "native_vlan_tag": {"type": "bool", "required": False},
+                "ipv4_address": {"type": "str", "required": False},
+                "vrf": {"type": "str", "required": False},
+            },
+        },
+        "state": {
+            "type": "str",
+            "required": False,
+            "default": "merged",
+            "choices": ["merged", "replaced"],
+        },
+        "max_concurrency": {
+            "type": "int",
+            "required": False,
+            "default": 1,
+        },
+    }
+    return argument_spec
+
+
+def get_reference_keys(reference):
+    """
+    Returns the keys of the objects of a reference attribute, which is a
+        dict of keys to URIs, a URI, or a list of URIs depending on the REST
+        version.
+    """
+    if not reference:
+        return []
+    if isinstance(reference, dict):
+        return [str(key) for key in reference]
+    if not isinstance(reference, list):
+        reference = [reference]
+    return [unquote(uri.rstrip("/").rsplit("/", 1)[-1]) for uri in reference]
+
+
+def get_intended_interfaces(entries):
+    """
+    Returns the options of every interface of the interfaces option, the
+        later entries taking precedence.
+    """
+    intended = {}
+    for entry in entries:
+        for name in expand_interface_names(entry["name"]):
+            options = intended.setdefault(name, {})
+            for option, value in entry.items():
+                if option == "name" or value is None:
+                    continue
+                if option == "description":
+                    value = value.replace("{name}", name)
+                elif option == "vlan_trunks":
+                    value = (
+                        None
+                        if str(value).lower() == "all"
+                        else sorted(set(expand_vlan_ids(value)))
+                    )
+                options[option] = value
+    for name, options in intended.items():
+        vlan_mode = options.get("vlan_mode")
+        if vlan_mode and any(option in options for option in L3_OPTIONS):
+            raise ValueError(
+                "Interface {0} can't have both vlan_mode and Layer3 "
+                "options".format(name)
+            )
+        if "vlan_access" in options and vlan_mode != "access":
+            raise ValueError(
+                "vlan_access requires vlan_mode access, on interface "
+                "{0}".format(name)
+            )
+        for option in L2_OPTIONS[1:]:
+            if option in options and vlan_mode != "trunk":
+                raise ValueError(
+                    "{0} requires vlan_mode trunk, on interface {1}".format(
+                        option, name
+                    )
+                )
+    return intended
+
+
+def get_interface_changes(options, current, replace, prefix):
+    """
+    Returns the attributes of an interface that differ from the current
+        ones.
+
+    :param options: Intended options of the interface.
+    :param current: Current attributes of the interface.
+    :param replace: Whether the options that aren't given are reset.
+    :param prefix: REST resource prefix, like /rest/v10.09/, of the URIs of
+        the VLANs and VRFs.
+    """
+
+    # References are written as URIs, lists of URIs for vlan_trunks, like
+    # pyaoscx does on every REST version
+    def vlan_reference(vlan_id):
+        return "{0}system/vlans/{1}".format(prefix, vlan_id)
+
+    changes = {}
+    current_user_config = current.get("user_config") or {}
+    user_config = dict(current_user_config)
+    if replace:
+        # Without them the interface uses the defaults of the platform
+        user_config.pop("admin", None)
+        user_config.pop("mtu", None)
+    if "enabled" in options:
+        user_config["admin"] = "up" if options["enabled"] else "down"
+    if "mtu" in options:
+        user_config["mtu"] = str(options["mtu"])
+    if user_config != current_user_config:
+        changes["user_config"] = user_config
+
+    if "description" in options or replace:
+        description = options.get("description")
+        if (current.get("description") or None) != description:
+            changes["description"] = description
+
+    vlan_mode = options.get("vlan_mode")
+    is_l3 = any(option in options for option in L3_OPTIONS)
+    if vlan_mode is None and not is_l3 and replace:
+        # Only reset the current mode of the interface
+        if current.get("routing"):
+            is_l3 = True
+        elif current.get("vlan_mode") in TRUNK_MODES:
+            vlan_mode = "trunk"
+        else:
+            vlan_mode = "access"
+
+    intended = {}
+    current_mode = current.get("vlan_mode")
+    current_tag = get_reference_keys(current.get("vlan_tag"))
+    if vlan_mode is not None:
+        intended["routing"] = False
+    if vlan_mode == "access":
+        intended["vlan_mode"] = "access"
+        vlan_id = options.get("vlan_access")
+        if vlan_id is None and (replace or not current_tag):
+            vlan_id = 1
+        if vlan_id is not None:
+            intended["vlan_tag"] = vlan_reference(vlan_id)
+    elif vlan_mode == "trunk":
+        native_vlan_tag = options.get("native_vlan_tag")
+        if native_vlan_tag is None and not replace:
+            native_vlan_tag = current_mode == "native-tagged"
+        intended["vlan_mode"] = (
+            "native-tagged" if native_vlan_tag else "native-untagged"
+        )
+        vlan_id = options.get("native_vlan_id")
+        if vlan_id is None and (
+            replace or current_mode not in TRUNK_MODES or not current_tag
+        ):
+            vlan_id = 1
+        if vlan_id is not None:
+            intended["vlan_tag"] = vlan_reference(vlan_id)
+        if "vlan_trunks" in options or replace:
+            # No VLAN trunks allows all the VLANs
+            intended["vlan_trunks"] = [
+                vlan_reference(vlan_id)
+                for vlan_id in options.get("vlan_trunks") or []
+            ]
+    elif is_l3:
+        intended["routing"] = True
+        if "ipv4_address" in options or replace:
+            intended["ip4_address"] = options.get("ipv4_address")
+        if "vrf" in options:
+            vrf = options["vrf"]
+            intended["vrf"] = "{0}system/vrfs/{1}".format(
+                prefix, quote(vrf, safe="")
+            )
+
+    for attribute, value in intended.items():
+        if attribute in ["vlan_tag", "vrf"]:
+            current_keys = get_reference_keys(current.get(attribute))
+            if attribute == "vrf" and not current_keys:
+                current_keys = ["default"]
+            modified = current_keys != get_reference_keys(value)
+        elif attribute == "vlan_trunks":
+            modified = sorted(
+                get_reference_keys(current.get(attribute)), key=int
+            ) != sorted(get_reference_keys(value), key=int)
+        else:
+            modified = current.get(attribute) != value
+        if modified:
+            changes[attribute] = value
+    # The settings of the other mode are cleared, the switch may reject them
+    if changes.get("routing") is True:
+        changes.update(vlan_mode=None, vlan_tag=None, vlan_trunks=[])
+    elif changes.get("routing") is False:
+        changes["ip4_address"] = None
+        if get_reference_keys(current.get("vrf")) not in ([], ["default"]):
+            changes["vrf"] = "{0}system/vrfs/default".format(prefix)
+    return changes
+
+
+def main():
+    ansible_module = AnsibleModule(
+        argument_spec=get_argument_spec(),
+        supports_check_mode=True,
+    )
+
+    replace = ansible_module.params["state"] == "replaced"
+    try:
+        intended = get_intended_interfaces(ansible_module.params["interfaces"])
+    except ValueError as e:
+        ansible_module.fail_json(msg=str(e))
+
+    try:
+        session = get_pyaoscx_session(ansible_module)
+    except Exception as e:
+        ansible_module.fail_json(
+            msg="Could not get PYAOSCX Session: {0}".format(str(e))
+        )
+
+    response = session.request(
+        "GET",
+        "system/interfaces?depth=2&attributes={0}".format(
+            ",".join(INTERFACE_ATTRIBUTES)
+        ),
+    )
+    if response.status_code != 200:
+        ansible_module.fail_json(
+            msg="Could not get the interfaces: {0} {1}".format(
+                response.status_code, response.text
+            )
+        )
+    running = response.json()
+    missing = [name for name in intended if name not in running]
+    if missing:
+        ansible_module.fail_json(
+            msg="Interfaces not found: {0}".format(
+                compress_interface_names(missing)
+            )
+        )
+
+    operations = []
+    updated = []
+    for name, options in intended.items():
+        changes = get_interface_changes(
+            options, running[name], replace, session.resource_prefix
+        )
+        if changes:
+            operations.append(
+                dict(
+                    method="PATCH",
+                    path="system/interfaces/{0}".format(quote(name, safe="")),
+                    data=changes,
+                )
+            )
+            updated.append(name)
+
+    result = dict(
+        changed=bool(operations), updated=compress_interface_names(updated)
+    )
+    if ansible_module.check_mode or not operations:
+        ansible_module.exit_json(**result)
+
+    responses = send_requests(
+        session, operations, ansible_module.params["max_concurrency"]
+    )
+    errors = []
+    for name, response in zip(updated, responses):
+        if isinstance(response, Exception):
+            error = str(response)
+        elif response.status_code >= 400:
+            error = "{0} {1}".format(response.status_code, response.text)
+        else:
+            continue
+        errors.append("{0}: {1}".format(name, error))
+    if errors:
+        ansible_module.fail_json(
+            msg="Could not update the interfaces: {0}".format(
+                "; ".join(errors)
+            ),
+            **result
+        )
+    ansible_module.exit_json(**result)
+
+
+if __name__ == "__main__":
+    main()
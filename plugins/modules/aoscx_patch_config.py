@@ -0,0 +1,630 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+ANSIBLE_METADATA = {
+    "metadata_version": "1.1",
+    "status": ["preview"],
+    "supported_by": "certified",
+}
+
+DOCUMENTATION = """
+---
+module: aoscx_patch_config
+version_added: "4.6.0"
+short_description: >
+  Apply the differences between a JSON configuration and the running-config
+  of AOS-CX devices.
+description: >
+  This module compares an intended configuration, in the JSON format of the
+  fullconfigs REST API, with the running-config of AOS-CX devices, and only
+  creates, updates or deletes the resources that differ, instead of uploading
+  the whole configuration like aoscx_upload_config. The System attributes and
+  the rows of the VRF, ACL, QoS, Queue_Profile, VLAN and Interface tables are
+  supported, they are applied in this order so resources exist before they
+  are referenced, and deleted in the reverse order. References to other rows,
+  given as their keys like in the fullconfig JSON, are sent as the URIs of
+  these rows. The child tables nested in the rows, like the static routes
+  and next hops of VRFs, the entries of ACLs, the queues of QoS and Queue
+  Profiles and the IPv6 addresses of interfaces, are applied with their own
+  requests after all the rows, the configuration version of the ACLs whose
+  entries changed is then incremented. Other tables, like Port which copies
+  Interface, and other nested tables are skipped with a warning.
+author: Aruba Networks (@ArubaNetworks)
+options:
+  config:
+    description: >
+      Intended configuration, or fragment of it, in the JSON format of the
+      fullconfigs REST API. Its keys are table names, like VLAN or Interface,
+      mapping the key of every row to its attributes, and System, mapping the
+      system attributes to their values. Table names are case insensitive.
+      Mutually exclusive with src.
+    type: dict
+    required: false
+  src:
+    description: >
+      Path of a JSON file with the intended configuration, like the files
+      saved by aoscx_backup_config with the JSON config_type. Mutually
+      exclusive with config.
+    type: path
+    required: false
+  state:
+    description: >
+      How the intended configuration is applied. With merged, only the
+      attributes given for each row are updated. With replaced, the
+      attributes of the rows that differ are replaced by the given ones,
+      resetting the attributes they don't list, and the rows of the child
+      tables they list are replaced, deleting the child rows they don't
+      list. With overridden, the rows are replaced like with replaced, and
+      the rows of the given tables that aren't in the intended configuration
+      are deleted, except the physical interfaces, the default and mgmt
+      VRFs, VLAN 1, the internal VLANs and the factory-default QoS and Queue
+      Profile. System attributes are always merged.
+    type: str
+    choices:
+      - merged
+      - replaced
+      - overridden
+    default: merged
+    required: false
+"""
+
+EXAMPLES = """
+- name: Apply the differences with a saved configuration
+  aoscx_patch_config:
+    src: /home/admin/golden-config.json
+    state: replaced
+
+- name: Set the name of VLAN 10, creating it if needed
+  aoscx_patch_config:
+    config:
+      VLAN:
+        "10":
+          id: 10
+          name: Servers
+
+- name: Keep only the VLANs of the intended configuration
+  aoscx_patch_config:
+    config:
+      VLAN:
+        "1":
+          id: 1
+          name: DEFAULT_VLAN_1
+        "10":
+          id: 10
+          name: Servers
+    state: overridden
+"""
+
+RETURN = r"""
+operations:
+  description: Requests sent, or that would be sent in check mode.
+  returned: always
+  type: list
+  sample:
+    - PATCH system/vlans/10
+    - POST system/acls/servers,ipv4/cfg_aces
+    - PATCH system/acls/servers,ipv4
+    - DELETE system/vlans/20
+"""
+
+import json
+
+from ansible.module_utils.basic import AnsibleModule
+from ansible.module_utils.six.moves.urllib.parse import quote, unquote
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
+    get_pyaoscx_session,
+    send_requests,
+)
+
+# Tables of the fullconfig JSON applied by the module, in dependency order,
+# with their REST collection
+TABLES = [
+    ("VRF", "system/vrfs"),
+    ("ACL", "system/acls"),
+    ("QoS", "system/qos"),
+    ("Queue_Profile", "system/q_profiles"),
+    ("VLAN", "system/vlans"),
+    ("Interface", "system/interfaces"),
+]
+
+# Attributes of the keys of the rows of the tables and child tables
+INDICES = {
+    "VRF": ["name"],
+    "ACL": ["name", "list_type"],
+    "QoS": ["name"],
+    "Queue_Profile": ["name"],
+    "VLAN": ["id"],
+    "Interface": ["name"],
+    "cfg_aces": ["sequence_number"],
+    "ip6_addresses": ["address"],
+    "q_profile_entries": ["queue_number"],
+    "queues": ["queue_number"],
+    "static_nexthops": ["id"],
+    "static_routes": ["prefix"],
+}
+
+# Child tables, nested in their parent rows in the fullconfig JSON, and
+# collections below them in the REST API
+CHILD_TABLES = {
+    "VRF": ["static_routes"],
+    "static_routes": ["static_nexthops"],
+    "ACL": ["cfg_aces"],
+    "QoS": ["queues"],
+    "Queue_Profile": ["q_profile_entries"],
+    "Interface": ["ip6_addresses"],
+}
+
+ACL_REFERENCES = dict(
+    ("acl{0}_{1}_cfg".format(acl_type, direction), "ACL")
+    for acl_type in ["mac", "v4", "v6"]
+    for direction in ["in", "out", "routed_in", "routed_out"]
+)
+
+# Attributes referencing rows of other tables, by their keys in the
+# fullconfig JSON, and by their URIs in the REST API
+REFERENCES = {
+    "System": {"q_profile_default": "Queue_Profile", "qos_default": "QoS"},
+    "VLAN": ACL_REFERENCES,
+    "Interface": dict(
+        ACL_REFERENCES,
+        interfaces="Interface",
+        q_profile="Queue_Profile",
+        qos="QoS",
+        vlan_tag="VLAN",
+        vlan_trunks="VLAN",
+        vrf="VRF",
+    ),
+    "static_nexthops": {"port": "Interface"},
+    "static_routes": {"vrf": "VRF"},
+}
+
+# Rows of the switch itself, never deleted, like every interface but the
+# ones with these prefixes and the internal VLANs
+BUILT_IN_ROWS = {
+    "VRF": ["default", "mgmt"],
+    "QoS": ["factory-default"],
+    "Queue_Profile": ["factory-default"],
+    "VLAN": ["1"],
+}
+LOGICAL_INTERFACES = ("lag", "loopback", "tunnel", "vlan")
+
+# Version attribute of the tables whose child table changes only reach the
+# hardware when the version of their row changes, like pyaoscx does
+VERSIONS = {"ACL": ("cfg_aces", "cfg_version")}
+
+
+def get_argument_spec():
+    argument_spec = {
+        "config": {"type": "dict", "required": False},
+        "src": {"type": "path", "required": False},
+        "state": {
+            "type": "str",
+            "default": "merged",
+            "choices": ["merged", "replaced", "overridden"],
+        },
+    }
+    return argument_spec
+
+
+def get_table(config, name):
+    """
+    Returns the table of a fullconfig JSON with a case insensitive name, None
+        if it isn't in the configuration.
+    """
+    for table_name, table in config.items():
+        if table_name.lower() == name.lower():
+            return table
+    return None
+
+
+def get_key_values(key, indices):
+    """
+    Returns the values of the index attributes of a row key, the fullconfig
+        JSON separates them with "/" and the REST API with ",".
+    """
+    key = str(key)
+    if len(indices) > 1 and "," not in key:
+        return key.rsplit("/", len(indices) - 1)
+    return key.split(",", len(indices) - 1)
+
+
+def get_resource_path(collection, values):
+    return "{0}/{1}".format(
+        collection, ",".join(quote(value, safe="") for value in values)
+    )
+
+
+def get_reference_keys(value, indices):
+    """
+    Returns the sorted keys, as tuples of index values, of the rows of a
+        reference attribute, which holds keys in the fullconfig JSON, and a
+        URI, a list of URIs or a dict of keys to URIs in the REST API.
+    """
+    if not value:
+        return []
+    if isinstance(value, dict):
+        value = list(value)
+    elif not isinstance(value, list):
+        value = [value]
+    keys = []
+    for key in value:
+        key = str(key)
+        if key.startswith("/rest/"):
+            key = unquote(key.rstrip("/").rsplit("/", 1)[-1])
+        keys.append(tuple(get_key_values(key, indices)))
+    return sorted(keys)
+
+
+def get_reference(value, table, prefix):
+    """
+    Returns a reference attribute in the format pyaoscx writes, a URI or a
+        list of URIs, from the keys of the fullconfig JSON.
+    """
+    if isinstance(value, list):
+        return [get_reference(key, table, prefix) for key in value]
+    if value is None or isinstance(value, dict):
+        return value
+    if str(value).startswith("/rest/"):
+        return value
+    return prefix + get_resource_path(
+        dict(TABLES)[table], get_key_values(value, INDICES[table])
+    )
+
+
+def get_body(table, attributes, prefix):
+    """
+    Returns the attributes of a row in the format of the REST API.
+    """
+    references = REFERENCES.get(table, {})
+    return dict(
+        (
+            name,
+            (
+                get_reference(value, references[name], prefix)
+                if name in references
+                else value
+            ),
+        )
+        for name, value in attributes.items()
+    )
+
+
+def is_same(table, name, value, current):
+    reference = REFERENCES.get(table, {}).get(name)
+    if reference is None:
+        return value == current
+    indices = INDICES[reference]
+    return get_reference_keys(value, indices) == get_reference_keys(
+        current, indices
+    )
+
+
+def is_built_in(table, key, row):
+    if table == "Interface":
+        return not key.startswith(LOGICAL_INTERFACES)
+    if table == "VLAN" and row.get("type") == "internal":
+        return True
+    return key in BUILT_IN_ROWS.get(table, [])
+
+
+def split_row(table, row, skipped):
+    """
+    Splits a row in its attributes and its child tables. The nested tables
+        that aren't supported are left out, and added to skipped.
+    """
+    attributes = {}
+    children = {}
+    for name, value in row.items():
+        if name in CHILD_TABLES.get(table, []):
+            children[name] = value or {}
+        elif (
+            isinstance(value, dict)
+            and value
+            and all(isinstance(item, dict) for item in value.values())
+        ):
+            skipped.add("{0}.{1}".format(table, name))
+        else:
+            attributes[name] = value
+    return attributes, children
+
+
+def add_rows(changes, table, collection, intended_table, running_table, level):
+    """
+    Adds the operations applying the rows of a table, and of their child
+        tables, to changes.
+
+    :param changes: dict with the state, the REST prefix, the writes and
+        deletes of every stage, the version updates and the skipped tables.
+    :param level: 0 for a table of TABLES, 1 for its child tables...
+    :return: Whether any operation was added.
+    """
+    state = changes["state"]
+    indices = INDICES[table]
+    order = [name for name, dummy in TABLES].index(table) if not level else 0
+    writes = changes["writes"].setdefault((level, order), [])
+    deletes = changes["deletes"].setdefault((level, order), [])
+    added = False
+
+    running_rows = dict(
+        (tuple(get_key_values(key, indices)), (str(key), row or {}))
+        for key, row in running_table.items()
+    )
+    for key, row in intended_table.items():
+        values = tuple(get_key_values(key, indices))
+        path = get_resource_path(collection, values)
+        attributes, children = split_row(table, row or {}, changes["skipped"])
+        dummy, current = running_rows.pop(values, (None, None))
+        current_attributes, current_children = split_row(
+            table, current or {}, set()
+        )
+
+        # Child rows are written after all the rows of the tables, they may
+        # reference any of them
+        children_changed = False
+        for child in CHILD_TABLES.get(table, []):
+            if child in children:
+                children_changed |= add_rows(
+                    changes,
+                    child,
+                    "{0}/{1}".format(path, child),
+                    children[child],
+                    current_children.get(child) or {},
+                    level + 1,
+                )
+        version = VERSIONS.get(table)
+        if version and children_changed:
+            name = version[1]
+            changes["versions"].append(
+                dict(
+                    method="PATCH",
+                    path=path,
+                    data={
+                        name: max(
+                            current_attributes.get(name) or 0,
+                            attributes.get(name) or 0,
+                        )
+                        + 1
+                    },
+                )
+            )
+            if current is not None:
+                # Changed after the child rows are written
+                attributes[name] = current_attributes.get(name)
+        added |= children_changed
+
+        if current is None:
+            data = get_body(table, attributes, changes["prefix"])
+            for index, value in zip(indices, values):
+                data.setdefault(
+                    index, int(value) if value.isdigit() else value
+                )
+            writes.append(dict(method="POST", path=collection, data=data))
+            added = True
+            continue
+        attributes = dict(
+            (name, value)
+            for name, value in attributes.items()
+            if name not in indices
+        )
+        modified = dict(
+            (name, value)
+            for name, value in attributes.items()
+            if not is_same(table, name, value, current_attributes.get(name))
+        )
+        if state == "merged":
+            if modified:
+                writes.append(
+                    dict(
+                        method="PATCH",
+                        path=path,
+                        data=get_body(table, modified, changes["prefix"]),
+                    )
+                )
+                added = True
+        elif modified or any(
+            name not in attributes and value not in (None, [], {})
+            for name, value in current_attributes.items()
+            if name not in indices
+        ):
+            # The attributes of the row only, its child tables are left as
+            # they are unless given
+            writes.append(
+                dict(
+                    method="PUT",
+                    path=path,
+                    data=get_body(table, attributes, changes["prefix"]),
+                )
+            )
+            added = True
+
+    # The rows of the child tables given are replaced, unless merged
+    if state == "overridden" or (level and state == "replaced"):
+        for values, (key, row) in running_rows.items():
+            if level or not is_built_in(table, key, row):
+                deletes.append(
+                    dict(
+                        method="DELETE",
+                        path=get_resource_path(collection, values),
+                    )
+                )
+                added = True
+    return added
+
+
+def get_changes(intended, running, state, prefix):
+    """
+    Computes the requests applying the intended configuration.
+
+    :param intended: Intended fullconfig JSON, or fragment of it.
+    :param running: Running fullconfig JSON of the switch.
+    :param state: merged, replaced or overridden.
+    :param prefix: REST resource prefix, like /rest/v10.09/, of the URIs of
+        the references.
+    :return: Tuple with the list of stages, each one a list of operations
+        with method, path and data, the stages must be sent in order, and
+        the sorted list of nested tables skipped.
+    """
+    changes = dict(
+        state=state,
+        prefix=prefix,
+        writes={},
+        deletes={},
+        versions=[],
+        skipped=set(),
+    )
+    stages = []
+
+    intended_system, dummy = split_row(
+        "System", get_table(intended, "System") or {}, changes["skipped"]
+    )
+    running_system = get_table(running, "System") or {}
+    modified = dict(
+        (name, value)
+        for name, value in intended_system.items()
+        if not is_same("System", name, value, running_system.get(name))
+    )
+    if modified:
+        stages.append(
+            [
+                dict(
+                    method="PATCH",
+                    path="system",
+                    data=get_body("System", modified, prefix),
+                )
+            ]
+        )
+
+    for name, collection in TABLES:
+        intended_table = get_table(intended, name)
+        if intended_table is not None:
+            add_rows(
+                changes,
+                name,
+                collection,
+                intended_table,
+                get_table(running, name) or {},
+                0,
+            )
+
+    # Rows are deleted after the rows referencing them, in the reverse order
+    stages.extend(
+        changes["writes"][stage] for stage in sorted(changes["writes"])
+    )
+    stages.append(changes["versions"])
+    stages.extend(
+        changes["deletes"][stage]
+        for stage in sorted(changes["deletes"], reverse=True)
+    )
+    return (
+        [operations for operations in stages if operations],
+        sorted(changes["skipped"]),
+    )
+
+
+def main():
+    ansible_module = AnsibleModule(
+        argument_spec=get_argument_spec(),
+        mutually_exclusive=[("config", "src")],
+        required_one_of=[("config", "src")],
+        supports_check_mode=True,
+    )
+
+    config = ansible_module.params["config"]
+    src = ansible_module.params["src"]
+    state = ansible_module.params["state"]
+
+    if src:
+        try:
+            with open(src) as src_file:
+                config = json.load(src_file)
+        except (IOError, OSError, ValueError) as e:
+            ansible_module.fail_json(
+                msg="Could not read {0}: {1}".format(src, str(e))
+            )
+
+    # A backup holds every table of the switch, the ones that aren't
+    # supported are left as they are
+    supported = ["System"] + [table[0] for table in TABLES]
+    known = [name.lower() for name in supported]
+    unsupported = [name for name in config if name.lower() not in known]
+    if unsupported:
+        ansible_module.warn(
+            "Skipped the unsupported tables {0}, supported tables are "
+            "{1}".format(", ".join(unsupported), ", ".join(supported))
+        )
+
+    try:
+        session = get_pyaoscx_session(ansible_module)
+    except Exception as e:
+        ansible_module.fail_json(
+            msg="Could not get PYAOSCX Session: {0}".format(str(e))
+        )
+
+    response = session.request("GET", "fullconfigs/running-config")
+    if response.status_code != 200:
+        ansible_module.fail_json(
+            msg="Could not get the running-config: {0} {1}".format(
+                response.status_code, response.text
+            )
+        )
+    running = json.loads(response.text)
+
+    stages, skipped = get_changes(
+        config, running, state, session.resource_prefix
+    )
+    if skipped:
+        ansible_module.warn(
+            "Skipped the unsupported nested tables {0}".format(
+                ", ".join(skipped)
+            )
+        )
+    result = dict(
+        changed=bool(stages),
+        operations=[
+            "{0} {1}".format(operation["method"], operation["path"])
+            for operations in stages
+            for operation in operations
+        ],
+    )
+
+    if ansible_module.check_mode:
+        ansible_module.exit_json(**result)
+
+    for operations in stages:
+        # The operations of a stage don't depend on each other, send them at
+        # once, but stop before the stages depending on a failed one
+        responses = send_requests(session, operations)
+        errors = []
+        for operation, response in zip(operations, responses):
+            if isinstance(response, Exception):
+                error = str(response)
+            elif response.status_code >= 400:
+                error = "{0} {1}".format(response.status_code, response.text)
+            else:
+                continue
+            errors.append(
+                "{0} {1}: {2}".format(
+                    operation["method"], operation["path"], error
+                )
+            )
+        if errors:
+            ansible_module.fail_json(
+                msg="Could not apply the configuration: {0}".format(
+                    "; ".join(errors)
+                ),
+                **result
+            )
+
+    ansible_module.exit_json(**result)
+
+
+if __name__ == "__main__":
+    main()
@@ -149,6 +149,7 @@ except ImportError:
 
 if HAS_PYAOSCX:
     from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
+        get_device_info,
         get_pyaoscx_session,
     )
 
@@ -219,7 +220,7 @@ def main():
     session = get_pyaoscx_session(ansible_module)
     device = Device(session)
     poe_interface = device.poe_interface(interface)
-    firmware = device.get_firmware_version()
+    firmware = get_device_info(ansible_module)["firmware_version"]
     platform = firmware.split(".")[0]
 
     try:
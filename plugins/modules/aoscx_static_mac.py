@@ -87,6 +87,7 @@ except ImportError:
 if HAS_PYAOSCX:
     from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
         get_pyaoscx_session,
+        prefetch_objects,
     )
 
 
@@ -139,14 +140,15 @@ def main():
     session = get_pyaoscx_session(ansible_module)
 
     vlan = Vlan(session, vlan)
+    static_mac = StaticMac(session, mac_addr, vlan, port=interface)
+    # Retrieve both objects in a single round-trip
+    prefetch_objects(session, [vlan, static_mac])
 
     try:
         vlan.get()
     except Exception:
         ansible_module.fail_json(msg="VLAN {0} doesn't exist.".format(vlan))
 
-    static_mac = StaticMac(session, mac_addr, vlan, port=interface)
-
     try:
         static_mac.get()
         exists = True
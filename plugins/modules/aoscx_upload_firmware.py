@@ -52,10 +52,62 @@ options:
   wait_firmware_upload:
     description: >
       If true, the result will be displayed after the firmware upload process
-      is done. If false, the result must be checked on the switch by the user.
+      is done. If false, the result must be checked on the switch by the user,
+      or by aoscx_firmware_status with the returned job.
     type: bool
     required: false
     default: false
+  wait_timeout:
+    description: >
+      Seconds the end of the firmware upload is waited for when
+      wait_firmware_upload is true, before the task fails. The status of the
+      upload is checked after 1, 2, 4... seconds, at most every 60 seconds.
+    type: int
+    required: false
+    default: 600
+    version_added: "4.6.0"
+  firmware_version:
+    description: >
+      Version of the firmware image, like GL.10.13.1000. By default it is
+      read from the header of firmware_file_path, or from the file name of
+      remote_firmware_file_path, like GL_10_13_1000.swi.
+    type: str
+    required: false
+    version_added: "4.6.0"
+  sha256:
+    description: >
+      SHA-256 checksum of the firmware image. A local image is checked
+      against it before it is uploaded, and the upload is only skipped when
+      the switch reports the same checksum for the partition.
+    type: str
+    required: false
+    version_added: "4.6.0"
+  force:
+    description: >
+      Upload the image even when the partition already holds the same
+      firmware version (and checksum, when sha256 is provided). By default
+      the upload is skipped and the task is not changed.
+    type: bool
+    required: false
+    default: false
+    version_added: "4.6.0"
+  upload_timeout:
+    description: >
+      Seconds without progress before the upload of a local image is
+      considered failed. By default the upload waits forever.
+    type: int
+    required: false
+    version_added: "4.6.0"
+  upload_retries:
+    description: >
+      Number of times the upload of a local image is retried after a
+      connection error, a timeout or a server error. Before retrying, the
+      partition is checked, so the image isn't sent again when the switch
+      received it and only the response was lost.
+    type: int
+    required: false
+    default: 2
+    version_added: "4.6.0"
 """
 
 EXAMPLES = """
@@ -70,16 +122,102 @@ EXAMPLES = """
   aoscx_upload_firmware:
     partition_name: secondary
     firmware_file_path: /tftpboot/TL_10_04_0030A.swi
+
+- name: Start the upload of firmware to primary on every switch
+  aoscx_upload_firmware:
+    partition_name: primary
+    remote_firmware_file_path: http://192.168.1.2:8000/GL_10_13_1000.swi
+    vrf: mgmt
+  register: upload
+
+- name: Wait for the uploads of all the switches from the controller
+  aoscx_firmware_status:
+    jobs_from: upload
+  run_once: true
+
+- name: Upload firmware to primary, unless it already holds this image
+  aoscx_upload_firmware:
+    partition_name: primary
+    firmware_file_path: /tftpboot/GL_10_13_1000.swi
+    sha256: 3f0a3c1d0c5e0e8a55b1b0a8b1c4bf0f8e1f6a7c8d9e0f1a2b3c4d5e6f708192
 """
 
-RETURN = r""" # """
+RETURN = r"""
+firmware_version:
+  description: >
+    Version of the firmware image, when it was provided or could be read
+    from the image.
+  returned: always
+  type: str
+  sample: GL.10.13.1000
+upload_stats:
+  description: >
+    Bytes sent, seconds, throughput in bytes per second and attempts of the
+    upload of a local image.
+  returned: when a local image is uploaded
+  type: dict
+  sample:
+    bytes: 563714293
+    seconds: 48.21
+    throughput: 11692891.4
+    attempts: 1
+job:
+  description: >
+    Handle of the upload, to wait for its end with aoscx_firmware_status,
+    with the partition, the firmware version and the date of the firmware
+    status before the upload started.
+  returned: when the image is uploaded
+  type: dict
+  sample:
+    partition_name: primary
+    firmware_version: GL.10.13.1000
+    since: 1718000000
+firmware_upload_result:
+  description: Status of the upload, success.
+  returned: when wait_firmware_upload is true
+  type: str
+msg:
+  description: Reason the upload was skipped.
+  returned: when the partition already holds the image
+  type: str
+"""
 
-from time import sleep
+import hashlib
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
     get_pyaoscx_session,
+    invalidate_device_info,
 )
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_upload import (  # NOQA
+    get_image_version,
+    upload_file,
+    wait_firmware_upload,
+)
+
+
+def get_file_sha256(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as image:
+        for chunk in iter(lambda: image.read(1024 * 1024), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def get_partition_sha256(session, partition_name):
+    """
+    Returns the SHA-256 of the image of a partition reported by the switch in
+        the software_images of the system, None if it isn't reported.
+    """
+    response = session.request("GET", "system?attributes=software_images")
+    if response.status_code != 200:
+        return None
+    images = response.json().get("software_images") or {}
+    prefix = "{0}_image_".format(partition_name)
+    for name, value in images.items():
+        if name.startswith(prefix) and "sha" in name and value:
+            return str(value).lower()
+    return None
 
 
 def get_argument_spec():
@@ -110,6 +248,36 @@ def get_argument_spec():
             "required": False,
             "default": False,
         },
+        "wait_timeout": {
+            "type": "int",
+            "required": False,
+            "default": 600,
+        },
+        "firmware_version": {
+            "type": "str",
+            "required": False,
+            "default": None,
+        },
+        "sha256": {
+            "type": "str",
+            "required": False,
+            "default": None,
+        },
+        "force": {
+            "type": "bool",
+            "required": False,
+            "default": False,
+        },
+        "upload_timeout": {
+            "type": "int",
+            "required": False,
+            "default": None,
+        },
+        "upload_retries": {
+            "type": "int",
+            "required": False,
+            "default": 2,
+        },
     }
     return argument_spec
 
@@ -118,7 +286,9 @@ def main():
     module_args = get_argument_spec()
 
     ansible_module = AnsibleModule(
-        argument_spec=module_args, supports_check_mode=True
+        argument_spec=module_args,
+        required_one_of=[("firmware_file_path", "remote_firmware_file_path")],
+        supports_check_mode=True,
     )
 
     # Get playbook's arguments
@@ -128,11 +298,33 @@ def main():
     firmware_file_path = ansible_module.params["firmware_file_path"]
     partition_idx = "{0}_version".format(partition_name)
     wait = ansible_module.params["wait_firmware_upload"]
+    wait_timeout = ansible_module.params["wait_timeout"]
+    firmware_version = ansible_module.params["firmware_version"]
+    sha256 = ansible_module.params["sha256"]
+    force = ansible_module.params["force"]
+    upload_timeout = ansible_module.params["upload_timeout"]
+    upload_retries = ansible_module.params["upload_retries"]
 
     result = dict(changed=False)
 
-    if ansible_module.check_mode:
-        ansible_module.exit_json(**result)
+    try:
+        if firmware_version is None:
+            firmware_version = get_image_version(firmware_file_path, http_path)
+        if sha256 is not None:
+            sha256 = sha256.lower()
+            if firmware_file_path is not None:
+                file_sha256 = get_file_sha256(firmware_file_path)
+                if file_sha256 != sha256:
+                    ansible_module.fail_json(
+                        msg="The SHA-256 of {0} is {1}, not {2}".format(
+                            firmware_file_path, file_sha256, sha256
+                        )
+                    )
+    except (IOError, OSError) as e:
+        ansible_module.fail_json(
+            msg="Could not read {0}: {1}".format(firmware_file_path, str(e))
+        )
+    result["firmware_version"] = firmware_version
 
     try:
         from pyaoscx.device import Device
@@ -141,6 +333,38 @@ def main():
 
     try:
         session = get_pyaoscx_session(ansible_module)
+    except Exception as e:
+        ansible_module.fail_json(
+            msg="Could not get PYAOSCX Session: {0}".format(str(e))
+        )
+
+    # Skip the transfer of hundreds of MB when the partition already holds
+    # the image, before the session used by the upload is reopened
+    if not force and firmware_version is not None:
+        try:
+            partition_version = Device(session).get_firmware_info()[
+                partition_idx
+            ]
+        except Exception as e:
+            ansible_module.fail_json(
+                msg="Error getting firmware info: {0}".format(str(e))
+            )
+        same_image = partition_version == firmware_version
+        if same_image and sha256 is not None:
+            same_image = (
+                get_partition_sha256(session, partition_name) == sha256
+            )
+        if same_image:
+            result["msg"] = "The {0} partition already holds {1}".format(
+                partition_name, firmware_version
+            )
+            ansible_module.exit_json(**result)
+
+    if ansible_module.check_mode:
+        result["changed"] = True
+        ansible_module.exit_json(**result)
+
+    try:
         proxy = session.proxy.get("https", None)
         # Ansible is closing connection while
         # while firmware is still being uploaded,
@@ -160,6 +384,9 @@ def main():
     device = Device(session)
     try:
         prev_firmware = device.get_firmware_info()
+        # The status of a previous upload, the end of this one changes its
+        # date
+        prev_status = device.get_firmware_status()
     except Exception as e:
         ansible_module.fail_json(
             msg="Error getting firmware info: {0}".format(str(e))
@@ -169,6 +396,7 @@ def main():
     # PYAOSCX will try to use pycurl if available
     platform = prev_firmware[partition_idx].split(".")[0]
     needs_pycurl = platform in ["PL", "RL", "ML", "FL"]
+    use_pycurl = False
     w_message = ""
     if needs_pycurl:
         import importlib.util
@@ -179,28 +407,88 @@ def main():
                 " (This platform has issues with firmware upload, "
                 "please install pycurl)"
             )
+        else:
+            use_pycurl = True
+
+    def uploaded():
+        """
+        Whether the partition holds the image, after a failed attempt
+        """
+        try:
+            return (
+                firmware_version is not None
+                and device.get_firmware_info()[partition_idx]
+                == firmware_version
+            )
+        except Exception:
+            return False
 
     try:
-        success = device.upload_firmware(
-            partition_name=partition_name,
-            firmware_file_path=firmware_file_path,
-            remote_firmware_file_path=http_path,
-            vrf=vrf,
-            try_pycurl=needs_pycurl,
-        )
+        if firmware_file_path is not None and not use_pycurl:
+            # Streamed from disk with the session of the module, instead of
+            # loading the image in memory
+            response, result["upload_stats"] = upload_file(
+                session.s,
+                session.base_url + "firmware?image={0}".format(partition_name),
+                firmware_file_path,
+                timeout=upload_timeout,
+                retries=upload_retries,
+                completed=uploaded,
+            )
+            if response is not None and response.status_code != 200:
+                raise Exception(
+                    "{0} {1}".format(response.status_code, response.text)
+                )
+            success = True
+        else:
+            success = device.upload_firmware(
+                partition_name=partition_name,
+                firmware_file_path=firmware_file_path,
+                remote_firmware_file_path=http_path,
+                vrf=vrf,
+                try_pycurl=needs_pycurl,
+            )
     except Exception as e:
         session.close()
         ansible_module.fail_json(msg="{0}{1}".format(e, w_message))
 
+    # The upload used its own session, the firmware versions cached by the
+    # persistent connection are outdated
+    invalidate_device_info(ansible_module)
+
+    result["job"] = dict(
+        partition_name=partition_name,
+        firmware_version=firmware_version,
+        since=prev_status.get("date"),
+    )
+
     if wait:
-        for retry in range(10):
-            _result = device.get_firmware_status()
-            status = _result["status"]
-            if status == "in_progress":
-                sleep(60)
-        if status == "failure":
-            ansible_module.fail_json(msg="Firmware upload failed")
-        result["firmware_upload_result"] = status
+        try:
+            status, done = wait_firmware_upload(
+                device.get_firmware_status,
+                since=result["job"]["since"],
+                timeout=wait_timeout,
+            )
+        except Exception as e:
+            session.close()
+            ansible_module.fail_json(
+                msg="Error getting firmware status: {0}".format(str(e))
+            )
+        if not done:
+            session.close()
+            ansible_module.fail_json(
+                msg="Firmware upload didn't finish in {0} seconds".format(
+                    wait_timeout
+                ),
+                **result
+            )
+        if status["status"] == "failure":
+            session.close()
+            ansible_module.fail_json(
+                msg="Firmware upload failed: {0}".format(status.get("reason")),
+                **result
+            )
+        result["firmware_upload_result"] = status["status"]
 
     try:
         curr_firmware = device.get_firmware_info()
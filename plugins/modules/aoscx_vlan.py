@@ -27,9 +27,57 @@ options:
   vlan_id:
     description: >
       The ID of this VLAN. Non-internal VLANs must have an 'id' between 1 and
-      4094 to be effectively instantiated.
-    required: true
+      4094 to be effectively instantiated. Mutually exclusive with vlans, one
+      of them is required.
+    required: false
     type: int
+  vlans:
+    description: >
+      VLANs managed together, in aggregate mode. The VLANs of the switch are
+      read with a single request, compared with these ones, and only the
+      VLANs that differ are created, updated or deleted, with all the
+      requests sent in a single batch. When several entries list the same
+      VLAN, the attributes of the later ones take precedence.
+    required: false
+    type: list
+    elements: dict
+    version_added: "4.6.0"
+    suboptions:
+      vlan_id:
+        description: >
+          VLAN IDs and ranges of VLAN IDs, like 100-199,300, sharing the
+          attributes of the entry.
+        required: true
+        type: raw
+      name:
+        description: >
+          VLAN name, {id} is replaced by the ID of every VLAN, like
+          SERVERS_{id}.
+        required: false
+        type: str
+      description:
+        description: VLAN description, {id} is replaced like in name.
+        required: false
+        type: str
+      admin_state:
+        description: The Admin State of the VLAN.
+        required: false
+        choices:
+          - up
+          - down
+        type: str
+      voice:
+        description: Enable Voice VLAN
+        required: false
+        type: bool
+      vsx_sync:
+        description: Enable vsx_sync (Only for VSX device)
+        required: false
+        type: bool
+      ip_igmp_snooping:
+        description: Enable IP IGMP Snooping
+        required: false
+        type: bool
   name:
     description: VLAN name
     required: false
@@ -77,12 +125,24 @@ options:
     required: false
     type: bool
   state:
-    description: Create or update or delete the VLAN.
+    description: >
+      Create or update or delete the VLAN. The merged, replaced, overridden
+      and deleted states require vlans. With merged, the given attributes of
+      the VLANs are updated, and missing VLANs are created. With replaced,
+      the attributes that aren't given are also reset to their defaults. With
+      overridden, the VLANs are replaced, and the VLANs that aren't listed,
+      except VLAN 1 and the internal VLANs, are deleted. With deleted, the
+      listed VLANs, except VLAN 1, are deleted. With vlans, create and
+      update are handled as merged, and delete as deleted.
     required: false
     choices:
       - create
       - update
       - delete
+      - merged
+      - replaced
+      - overridden
+      - deleted
     default: create
     type: str
 """
@@ -126,21 +186,101 @@ EXAMPLES = """
   aoscx_vlan:
     vlan_id: 300
     state: delete
+
+- name: Create the VLANs of a pod
+  aoscx_vlan:
+    vlans:
+      - vlan_id: 100-199
+        name: SERVERS_{id}
+      - vlan_id: 200-209,300
+        name: STORAGE_{id}
+        vsx_sync: true
+    state: merged
+
+- name: Keep only VLAN 1 and the VLANs of a pod
+  aoscx_vlan:
+    vlans:
+      - vlan_id: 100-199
+        name: SERVERS_{id}
+    state: overridden
+
+- name: Delete the VLANs of a pod
+  aoscx_vlan:
+    vlans:
+      - vlan_id: 100-199,200-209,300
+    state: deleted
 """
 
-RETURN = r""" # """
+RETURN = r"""
+created:
+  description: VLANs created, or that would be created in check mode.
+  returned: with vlans
+  type: str
+  sample: 100-199,300
+updated:
+  description: VLANs updated, or that would be updated in check mode.
+  returned: with vlans
+  type: str
+  sample: "10"
+deleted:
+  description: VLANs deleted, or that would be deleted in check mode.
+  returned: with vlans
+  type: str
+  sample: 20-29
+"""
 
 from ansible.module_utils.basic import AnsibleModule
 from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_pyaoscx import (  # NOQA
     get_pyaoscx_session,
+    prefetch_objects,
+    send_requests,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_ranges import (  # NOQA
+    compress_vlan_ids,
+    expand_vlan_ids,
+)
+
+# States of the aggregate mode, the states of a single VLAN are mapped to them
+AGGREGATE_STATES = dict(
+    create="merged",
+    update="merged",
+    delete="deleted",
+    merged="merged",
+    replaced="replaced",
+    overridden="overridden",
+    deleted="deleted",
 )
 
+# Attributes of the VLANs read in aggregate mode, type tells the internal
+# VLANs apart
+VLAN_ATTRIBUTES = "id,name,description,admin,voice,vsx_sync,mgmd_enable,type"
+
+VSX_SYNC_ALL = ["all_attributes_and_dependents"]
+
 
 def get_argument_spec():
     argument_spec = {
         "vlan_id": {
             "type": "int",
-            "required": True,
+            "required": False,
+        },
+        "vlans": {
+            "type": "list",
+            "elements": "dict",
+            "required": False,
+            "options": {
+                "vlan_id": {"type": "raw", "required": True},
+                "name": {"type": "str", "required": False},
+                "description": {"type": "str", "required": False},
+                "admin_state": {
+                    "type": "str",
+                    "required": False,
+                    "choices": ["up", "down"],
+                },
+                "voice": {"type": "bool", "required": False},
+                "vsx_sync": {"type": "bool", "required": False},
+                "ip_igmp_snooping": {"type": "bool", "required": False},
+            },
         },
         "name": {
             "type": "str",
@@ -184,19 +324,243 @@ def get_argument_spec():
                 "create",
                 "delete",
                 "update",
+                "merged",
+                "replaced",
+                "overridden",
+                "deleted",
             ],
         },
     }
     return argument_spec
 
 
+def default_vlan_name(vlan_id):
+    return "DEFAULT_VLAN_1" if vlan_id == 1 else "VLAN{0}".format(vlan_id)
+
+
+def get_intended_vlans(vlans):
+    """
+    Returns the attributes of every VLAN of the vlans option, in the format
+        of the REST API, igmp standing for mgmd_enable.igmp.
+    """
+    intended = {}
+    for entry in vlans:
+        for vlan_id in expand_vlan_ids(entry["vlan_id"]):
+            attributes = intended.setdefault(vlan_id, {})
+            for option in ["name", "description"]:
+                if entry[option] is not None:
+                    attributes[option] = entry[option].replace(
+                        "{id}", str(vlan_id)
+                    )
+            if entry["admin_state"] is not None:
+                attributes["admin"] = entry["admin_state"]
+            if entry["voice"] is not None:
+                attributes["voice"] = entry["voice"]
+            if entry["vsx_sync"] is not None:
+                attributes["vsx_sync"] = (
+                    VSX_SYNC_ALL if entry["vsx_sync"] else []
+                )
+            if entry["ip_igmp_snooping"] is not None:
+                attributes["igmp"] = entry["ip_igmp_snooping"]
+    return intended
+
+
+def get_vlan_changes(vlan_id, attributes, current, replace):
+    """
+    Returns the attributes of a VLAN that differ from the current ones.
+
+    :param attributes: Intended attributes, from get_intended_vlans.
+    :param current: Current attributes, empty for a new VLAN.
+    :param replace: Whether the attributes that aren't given are reset.
+    """
+    if replace:
+        defaults = dict(
+            name=default_vlan_name(vlan_id),
+            description=None,
+            voice=False,
+            vsx_sync=[],
+            igmp=False,
+        )
+        if "admin" in current:
+            defaults["admin"] = "up"
+        attributes = dict(defaults, **attributes)
+    changes = {}
+    for name, value in attributes.items():
+        if name == "igmp":
+            mgmd_enable = dict(current.get("mgmd_enable") or {})
+            if mgmd_enable.get("igmp", False) != value:
+                mgmd_enable["igmp"] = value
+                changes["mgmd_enable"] = mgmd_enable
+        elif name == "admin" and current and "admin" not in current:
+            # The VLANs of this firmware don't have an admin state
+            continue
+        elif current.get(name) != value:
+            changes[name] = value
+    return changes
+
+
+def get_vlan_operations(intended, running, state):
+    """
+    Computes the requests applying the intended VLANs.
+
+    :param intended: Intended VLANs, from get_intended_vlans.
+    :param running: VLANs of the switch, by ID.
+    :param state: merged, replaced, overridden or deleted.
+    :return: Tuple with the operations and the VLAN IDs created, updated and
+        deleted.
+    """
+    operations = []
+    created, updated, deleted = [], [], []
+    if state == "deleted":
+        # VLAN 1 can't be deleted
+        deleted = [
+            vlan_id
+            for vlan_id in intended
+            if vlan_id in running and vlan_id != 1
+        ]
+    else:
+        replace = state in ["replaced", "overridden"]
+        for vlan_id, attributes in intended.items():
+            current = running.get(vlan_id)
+            changes = get_vlan_changes(
+                vlan_id, attributes, current or {}, replace
+            )
+            if current is None:
+                changes["id"] = vlan_id
+                changes.setdefault("name", default_vlan_name(vlan_id))
+                operations.append(
+                    dict(method="POST", path="system/vlans", data=changes)
+                )
+                created.append(vlan_id)
+            elif changes:
+                operations.append(
+                    dict(
+                        method="PATCH",
+                        path="system/vlans/{0}".format(vlan_id),
+                        data=changes,
+                    )
+                )
+                updated.append(vlan_id)
+        if state == "overridden":
+            # VLAN 1 can't be deleted
+            deleted = [
+                vlan_id
+                for vlan_id in running
+                if vlan_id not in intended and vlan_id != 1
+            ]
+    for vlan_id in deleted:
+        operations.append(
+            dict(method="DELETE", path="system/vlans/{0}".format(vlan_id))
+        )
+    return operations, created, updated, deleted
+
+
+def apply_vlans(ansible_module):
+    """
+    Aggregate mode, applies the VLANs of the vlans option.
+    """
+    state = AGGREGATE_STATES[ansible_module.params["state"]]
+    try:
+        intended = get_intended_vlans(ansible_module.params["vlans"])
+    except ValueError as e:
+        ansible_module.fail_json(msg=str(e))
+
+    try:
+        session = get_pyaoscx_session(ansible_module)
+    except Exception as e:
+        ansible_module.fail_json(
+            msg="Could not get PYAOSCX Session: {0}".format(str(e))
+        )
+
+    response = session.request(
+        "GET", "system/vlans?depth=2&attributes={0}".format(VLAN_ATTRIBUTES)
+    )
+    if response.status_code != 200:
+        ansible_module.fail_json(
+            msg="Could not get the VLANs: {0} {1}".format(
+                response.status_code, response.text
+            )
+        )
+    # The internal VLANs are managed by the switch, like pyaoscx they are
+    # left out, so overridden never deletes them
+    running = dict(
+        (int(vlan_id), vlan)
+        for vlan_id, vlan in response.json().items()
+        if vlan.get("type") != "internal"
+    )
+
+    operations, created, updated, deleted = get_vlan_operations(
+        intended, running, state
+    )
+    if state == "deleted" and 1 in intended:
+        ansible_module.warn("VLAN 1 can't be deleted, it was left unchanged")
+    for vlan_id in updated:
+        if (
+            "admin" not in running[vlan_id]
+            and intended[vlan_id].get("admin") == "down"
+        ):
+            ansible_module.warn(
+                "Unable to set admin_state to down on VLAN {0}".format(vlan_id)
+            )
+    result = dict(
+        changed=bool(operations),
+        created=compress_vlan_ids(created),
+        updated=compress_vlan_ids(updated),
+        deleted=compress_vlan_ids(deleted),
+    )
+    if ansible_module.check_mode or not operations:
+        ansible_module.exit_json(**result)
+
+    # The VLANs don't depend on each other, all the requests are sent at once
+    responses = send_requests(session, operations)
+    errors = []
+    for operation, response in zip(operations, responses):
+        if isinstance(response, Exception):
+            error = str(response)
+        elif response.status_code >= 400:
+            error = "{0} {1}".format(response.status_code, response.text)
+        else:
+            continue
+        errors.append(
+            "{0} {1}: {2}".format(
+                operation["method"], operation["path"], error
+            )
+        )
+    if errors:
+        ansible_module.fail_json(
+            msg="Could not apply the VLANs: {0}".format("; ".join(errors)),
+            **result
+        )
+    ansible_module.exit_json(**result)
+
+
 def main():
     ansible_module = AnsibleModule(
         argument_spec=get_argument_spec(),
         required_together=[["acl_name", "acl_type", "acl_direction"]],
+        mutually_exclusive=[
+            ["vlan_id", "vlans"],
+            ["vlans", "acl_name"],
+            ["vlans", "name"],
+            ["vlans", "description"],
+            ["vlans", "admin_state"],
+            ["vlans", "voice"],
+            ["vlans", "vsx_sync"],
+            ["vlans", "ip_igmp_snooping"],
+        ],
+        required_one_of=[["vlan_id", "vlans"]],
         supports_check_mode=True,
     )
 
+    if ansible_module.params["vlans"] is not None:
+        apply_vlans(ansible_module)
+    if ansible_module.params["state"] not in ["create", "update", "delete"]:
+        ansible_module.fail_json(
+            msg="The {0} state requires vlans".format(
+                ansible_module.params["state"]
+            )
+        )
+
     result = dict(changed=False)
 
     if ansible_module.check_mode:
@@ -225,6 +589,14 @@ def main():
     vlan = Vlan(session, vlan_id, vlan_name)
     modified = False
 
+    if acl_name and state != "delete":
+        # set_acl() retrieves the ACL, get it along with the VLAN in a
+        # single round-trip
+        acl = session.api.get_module(
+            session, "ACL", index_id=acl_name, list_type=acl_type
+        )
+        prefetch_objects(session, [vlan, acl])
+
     try:
         vlan.get()
         vlan_exists = True
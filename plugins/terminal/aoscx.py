@@ -38,6 +38,10 @@ class TerminalModule(TerminalBase):
         re.compile(rb"[\r\n]?[\w\+\-\.:\/\[\]]+(?:\([^\)]+\)){0,3}(?:[>#]) ?$")
     ]
 
+    # Used by network_cli to invalidate its cache (single_user_mode) when the
+    # switch is in configuration mode
+    terminal_config_prompt = re.compile(r"^.+\(config(?:-[^\)]+)?\)#\s*$")
+
     def on_open_shell(self):
         """
         Tasks to be executed immediately after connecting to switch.
@@ -0,0 +1,1077 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Local stand-in for the REST API of an AOS-CX switch.
+
+The simulator keeps an in-memory configuration database with a configurable
+scale (VLANs, ports, MAC entries) and serves the subset of the REST API used
+by the collection: login/logout, system, the system tables (vlans,
+interfaces, vrfs, acls, ...), fullconfigs and firmware. It can inject
+latency in every request and counts requests, bytes and TLS connections, so
+plays can be measured without real hardware. It is not a functional model of
+a switch, only enough of one for the modules to run their usual REST calls.
+
+Statistics are exposed outside of the REST API:
+    GET /__stats__      returns the counters as JSON.
+    DELETE /__stats__   resets the counters.
+
+Example:
+    python aoscx_simulator.py --port 8443 --vlans 4094 --interfaces 1100 \\
+        --macs 100000 --latency 20
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import re
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+from urllib.request import urlopen
+
+DEFAULT_REST_VERSION = "10.09"
+DEFAULT_FIRMWARE = "GL.10.13.1000"
+DEFAULT_PLATFORM = "8400"
+PORTS_PER_SLOT = 48
+MACS_PER_PORT = 64
+
+# Index attributes of the objects of each table, in URI order
+TABLE_INDICES = {
+    "acl_object_groups": ["name", "object_type"],
+    "acls": ["name", "list_type"],
+    "areas": ["area_id"],
+    "cfg_aces": ["sequence_number"],
+    "ip6_addresses": ["address"],
+    "macs": ["from", "mac_addr"],
+    "ospf_interfaces": ["interface_name"],
+    "ospf_routers": ["instance_tag"],
+    "ospf_vlinks": ["peer_router_id"],
+    "ospfv3_routers": ["instance_tag"],
+    "qos_cos_map_entries": ["code_point"],
+    "qos_dscp_map_entries": ["code_point"],
+    "q_profile_entries": ["queue_number"],
+    "queues": ["queue_number"],
+    "static_macs": ["mac_addr"],
+    "static_nexthops": ["id"],
+    "static_routes": ["prefix"],
+    "vlans": ["id"],
+}
+
+# ACL applications of interfaces and VLANs, unset by default
+ACL_APPLICATIONS = dict(
+    ("acl{0}_{1}_cfg{2}".format(acl_type, direction, suffix), None)
+    for acl_type in ("mac", "v4", "v6")
+    for direction in ("in", "out", "routed_in", "routed_out")
+    for suffix in ("", "_version")
+)
+
+# Attributes every object of a table has, even when they aren't set
+DEFAULT_ATTRIBUTES = {
+    "interfaces": dict(
+        ACL_APPLICATIONS,
+        admin="down",
+        interfaces={},
+        ip4_address=None,
+        ip4_address_secondary=[],
+        vrf=None,
+    ),
+    "ospf_routers": {"passive_interface_default": False},
+    "ospfv3_routers": {"passive_interface_default": False},
+    "vlans": dict(ACL_APPLICATIONS),
+    "vrfs": {
+        "dns_domain_name": None,
+        "dns_domain_list": {},
+        "dns_name_servers": {},
+        "dns_host_v4_address_mapping": {},
+        "dns_host_v6_address_mapping": {},
+    },
+}
+
+# Objects that are a single child of another object, like the PoE settings
+# of an interface, with their default attributes
+CHILD_OBJECTS = {
+    "poe_interface": {
+        "config": {
+            "admin_disable": False,
+            "allocate_by_method": "usage",
+            "cfg_assigned_class": "class4",
+            "pd_class_override": False,
+            "pre_standard_detect": False,
+            "priority": "low",
+        },
+    },
+}
+
+# Reference attributes holding many objects, the fullconfig JSON lists their
+# keys, the other references are a single key
+LIST_REFERENCES = {"interfaces", "vlan_trunks"}
+
+# Child tables that can also be written inline, as a dict of objects, in a
+# PUT or PATCH of their parent object
+INLINE_TABLES = {"acls": "cfg_aces"}
+
+# Attributes never returned by the writable and configuration selectors
+STATUS_ATTRIBUTES = {
+    "capabilities",
+    "capacities",
+    "hw_intf_info",
+    "link_speed",
+    "link_state",
+    "lldp_neighbors",
+    "macs",
+    "oper_state",
+    "oper_state_reason",
+    "oper_status",
+    "statistics",
+}
+
+# Operational status of a VSX in sync with its peer, the simulator has no ISL
+VSX_OPER_STATUS = {
+    "config_sync_state": "in-sync",
+    "isl_mgmt_state": "operational",
+    "islp_device_state": "peer_established",
+    "keepalive_state": "keepalive_established",
+}
+
+CAPABILITIES = [
+    "classifier_acl_ipv4_vlan_out",
+    "classifier_acl_ipv6_vlan_out",
+    "classifier_acl_mac_vlan_out",
+    "classifier_acl_ipv4_routed_in",
+    "classifier_acl_ipv4_routed_out",
+    "classifier_acl_ipv6_routed_in",
+    "classifier_acl_ipv6_routed_out",
+    "classifier_acl_object_group",
+    "qos_cos_based_queueing",
+    "qos_dscp_map_cos_override",
+    "vsx",
+]
+
+
+class SwitchState(object):
+    """
+    In-memory configuration database of the simulated switch.
+    """
+
+    def __init__(
+        self,
+        rest_version=DEFAULT_REST_VERSION,
+        vlans=64,
+        interfaces=48,
+        macs=0,
+        firmware=DEFAULT_FIRMWARE,
+        platform=DEFAULT_PLATFORM,
+        seed=0,
+        internal_vlans=2,
+    ):
+        self.lock = threading.RLock()
+        self.prefix = "/rest/v{0}/".format(rest_version)
+        self.rest_version = rest_version
+        self.sessions = set()
+        self.tables = {}
+        self.child_objects = {}
+        self.fullconfigs = {}
+        self.running_config_override = None
+        self.firmware = {
+            "current_version": firmware,
+            "primary_version": firmware,
+            "secondary_version": firmware,
+            "default_image": "primary",
+            "booted_image": "primary",
+        }
+        self.firmware_status = {"status": "none", "reason": "", "date": 0}
+        # VSX configuration, a single object, None when VSX isn't configured
+        self.vsx = None
+        self.system = {
+            "hostname": "aoscx-simulator",
+            "domain_name": "example.com",
+            "platform_name": platform,
+            "software_version": firmware,
+            "software_info": {"build_id": firmware, "build_date": ""},
+            "software_images": {
+                "primary_image_version": firmware,
+                "secondary_image_version": firmware,
+            },
+            "mgmt_intf_status": {"ip": "127.0.0.1", "link_state": "up"},
+            "capabilities": list(CAPABILITIES),
+            "capacities": {"vlans_max": 4094, "vrfs_max": 256},
+            "boot_time": int(time.time()),
+            "admin_password_set": True,
+            "aruba_central": {},
+            "lldp_mgmt_neighbor_info": {},
+            "qos_defaults": {},
+            "other_config": {},
+            "q_profile_default": "factory-default",
+            "qos_default": "factory-default",
+            "qos_config": {},
+            "dns_domain_list": {},
+            "dns_name_servers": {},
+        }
+        self._populate(
+            vlans, interfaces, macs, internal_vlans, random.Random(seed)
+        )
+
+    def uri(self, table_path, key=None):
+        """
+        Returns the REST URI of a table or of one of its objects.
+        """
+        uri = self.prefix + table_path
+        if key is not None:
+            uri += "/" + quote(str(key), safe=",")
+        return uri
+
+    def _populate(self, vlans, interfaces, macs, internal_vlans, rng):
+        vlan_table = self.tables.setdefault("system/vlans", OrderedDict())
+        for vlan_id in range(1, vlans + 1):
+            vlan_table[str(vlan_id)] = {
+                "id": vlan_id,
+                "name": (
+                    "DEFAULT_VLAN_1"
+                    if vlan_id == 1
+                    else "VLAN{0}".format(vlan_id)
+                ),
+                "description": None,
+                "admin": "up",
+                "type": "static",
+                "voice": False,
+                "vsx_sync": [],
+                "mgmd_enable": {},
+                "oper_state": "up",
+            }
+        # Reserved by the switch, from the top of the range, like the VLANs
+        # of routed ports
+        for vlan_id in range(4094, max(vlans, 4094 - internal_vlans), -1):
+            vlan_table[str(vlan_id)] = {
+                "id": vlan_id,
+                "name": "VLAN{0}".format(vlan_id),
+                "admin": "up",
+                "type": "internal",
+                "oper_state": "up",
+            }
+
+        # Trust maps, with an entry per code point
+        for table, code_points in (("cos", 8), ("dscp", 64)):
+            self.tables["system/qos_{0}_map_entries".format(table)] = (
+                OrderedDict(
+                    (
+                        str(code_point),
+                        {
+                            "code_point": code_point,
+                            "color": "green",
+                            "description": None,
+                            "local_priority": code_point % 8,
+                        },
+                    )
+                    for code_point in range(code_points)
+                )
+            )
+
+        self.tables["system/vrfs"] = OrderedDict(
+            [
+                ("default", {"name": "default", "type": "default"}),
+                ("mgmt", {"name": "mgmt", "type": "mgmt"}),
+            ]
+        )
+
+        intf_table = self.tables.setdefault("system/interfaces", OrderedDict())
+        port_names = []
+        for index in range(interfaces):
+            slot, port = divmod(index, PORTS_PER_SLOT)
+            name = "1/{0}/{1}".format(slot + 1, port + 1)
+            port_names.append(name)
+            intf_table[name] = {
+                "name": name,
+                "type": "system",
+                "admin_state": "down",
+                "description": None,
+                "mtu": 1500,
+                "routing": False,
+                "vlan_mode": "access",
+                "vlan_tag": {"1": self.uri("system/vlans", 1)},
+                "vlan_trunks": {},
+                "interfaces": {name: self.uri("system/interfaces", name)},
+                "user_config": {"admin": "down"},
+                "other_config": {},
+                "link_state": rng.choice(["up", "down"]),
+                "link_speed": 1000000000,
+                "hw_intf_info": {"connector": "RJ45"},
+                "statistics": {"rx_bytes": 0, "tx_bytes": 0},
+            }
+
+        for vlan_id in range(1, vlans + 1):
+            self.tables["system/vlans/{0}/macs".format(vlan_id)] = (
+                OrderedDict()
+            )
+        for index in range(macs):
+            vlan_id = index % vlans + 1
+            port = port_names[(index // MACS_PER_PORT) % len(port_names)]
+            mac = "02:{0:02x}:{1:02x}:{2:02x}:{3:02x}:{4:02x}".format(
+                *[(index >> shift) & 0xFF for shift in (32, 24, 16, 8, 0)]
+            )
+            table = self.tables["system/vlans/{0}/macs".format(vlan_id)]
+            table["dynamic," + mac] = {
+                "from": "dynamic",
+                "mac_addr": mac,
+                "port": {port: self.uri("system/interfaces", port)},
+            }
+
+        for table_path, table in self.tables.items():
+            for obj in table.values():
+                _set_defaults(table_path, obj)
+
+    def running_config(self):
+        """
+        Builds the fullconfig JSON document of the running configuration.
+        """
+        if self.running_config_override is not None:
+            return self.running_config_override
+        config = OrderedDict()
+        config["System"] = {
+            key: value
+            for key, value in self.system.items()
+            if key not in STATUS_ATTRIBUTES
+        }
+        config["Vlan"] = self._fullconfig_table("system/vlans")
+        config["Interface"] = self._fullconfig_table("system/interfaces")
+        # Ports of the older schema, still read by pyaoscx
+        config["Port"] = copy.deepcopy(config["Interface"])
+        config["Vrf"] = self._fullconfig_table("system/vrfs")
+        config["ACL"] = self._fullconfig_table("system/acls")
+        return config
+
+    def _fullconfig_table(self, table_path):
+        """
+        Returns a table in the schema of the fullconfig JSON, which differs
+        from the REST API: keys of many indices are joined with "/",
+        references are keys instead of URIs, unset attributes are left out,
+        and the child tables are nested in their parent objects.
+        """
+        rows = OrderedDict()
+        for key, obj in self.tables.get(table_path, {}).items():
+            if obj.get("type") == "internal":
+                continue
+            row = OrderedDict()
+            for name, value in _writable(obj).items():
+                value = _fullconfig_value(name, value, self.prefix)
+                if value is not None:
+                    row[name] = value
+            # Direct children only, keys may hold "/" like route prefixes
+            child_prefix = "{0}/{1}/".format(table_path, key)
+            for child_path in list(self.tables):
+                child = child_path[len(child_prefix) :]
+                if (
+                    child_path.startswith(child_prefix)
+                    and "/" not in child
+                    and child not in STATUS_ATTRIBUTES
+                    and self.tables[child_path]
+                ):
+                    row[child] = self._fullconfig_table(child_path)
+            rows[key.replace(",", "/")] = row
+        return rows
+
+    def new_session(self):
+        session_id = uuid.uuid4().hex
+        self.sessions.add(session_id)
+        return session_id
+
+
+def _set_defaults(table_path, obj):
+    """
+    Adds the default attributes of the objects of a table to an object.
+    """
+    defaults = DEFAULT_ATTRIBUTES.get(table_path.rsplit("/", 1)[-1], {})
+    for name, value in defaults.items():
+        obj.setdefault(name, copy.deepcopy(value))
+    return obj
+
+
+def _fullconfig_value(name, value, prefix):
+    """
+    Returns an attribute in the schema of the fullconfig JSON, references
+    being the keys of the objects instead of their URIs.
+    """
+
+    def get_key(uri):
+        return unquote(uri.rstrip("/").rsplit("/", 1)[-1]).replace(",", "/")
+
+    if name in LIST_REFERENCES and not value:
+        return None
+    if isinstance(value, dict) and value:
+        uris = list(value.values())
+    elif isinstance(value, list) and value:
+        uris = value
+    elif isinstance(value, str):
+        uris = [value]
+    else:
+        return value
+    if not all(
+        isinstance(uri, str) and uri.startswith(prefix) for uri in uris
+    ):
+        return value
+    keys = [get_key(uri) for uri in uris]
+    return keys if name in LIST_REFERENCES else keys[0]
+
+
+def _writable(obj):
+    return {
+        key: value
+        for key, value in obj.items()
+        if key not in STATUS_ATTRIBUTES
+    }
+
+
+def _select(obj, query, table_name=None):
+    """
+    Applies the attributes and selector query parameters to an object.
+    """
+    selector = query.get("selector", [None])[0]
+    if selector in ("writable", "configuration"):
+        obj = _writable(obj)
+    if selector == "writable":
+        # Indices can't be written once the object exists
+        indices = TABLE_INDICES.get(table_name, [])
+        obj = {key: value for key, value in obj.items() if key not in indices}
+    attributes = query.get("attributes", [None])[0]
+    if attributes:
+        wanted = attributes.split(",")
+        obj = {key: value for key, value in obj.items() if key in wanted}
+    return obj
+
+
+class Stats(object):
+    """
+    Thread-safe request counters.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.requests = 0
+            self.connections = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.methods = {}
+            self.logins = 0
+
+    def add_request(self, method, bytes_in, bytes_out):
+        with self.lock:
+            self.requests += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.methods[method] = self.methods.get(method, 0) + 1
+
+    def add_connection(self):
+        with self.lock:
+            self.connections += 1
+
+    def add_login(self):
+        with self.lock:
+            self.logins += 1
+
+    def as_dict(self):
+        with self.lock:
+            return dict(
+                requests=self.requests,
+                connections=self.connections,
+                logins=self.logins,
+                bytes_in=self.bytes_in,
+                bytes_out=self.bytes_out,
+                methods=dict(self.methods),
+            )
+
+
+class SimulatorHandler(BaseHTTPRequestHandler):
+    """
+    HTTP handler of the simulator, the server provides state, stats,
+    latency and jitter.
+    """
+
+    protocol_version = "HTTP/1.1"
+    server_version = "AOSCX-Simulator/1.0"
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.stats.add_connection()
+
+    def log_message(self, *args):
+        if self.server.verbose:
+            BaseHTTPRequestHandler.log_message(self, *args)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PATCH(self):
+        self._dispatch("PATCH")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def _dispatch(self, method):
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        url = urlsplit(self.path)
+        if url.path.rstrip("/") == "/__stats__":
+            if method == "DELETE":
+                self.server.stats.reset()
+            self._send(200, self.server.stats.as_dict(), count=False)
+            return
+
+        latency = self.server.latency
+        if latency:
+            time.sleep(latency + random.uniform(0, self.server.jitter))
+        request_size = (
+            len(self.requestline) + len(str(self.headers)) + len(body)
+        )
+        self._request_size = request_size
+        try:
+            self._route(method, url, parse_qs(url.query), body)
+        except Exception as exc:
+            self._send(500, {"error": str(exc)})
+
+    def _send(self, code, payload=None, headers=None, count=True):
+        if payload is None:
+            data = b""
+        elif isinstance(payload, bytes):
+            data = payload
+        else:
+            data = json.dumps(payload).encode("utf-8")
+        headers = dict(headers or {})
+        if self.command == "GET" and code == 200 and data:
+            # Conditional requests, answered with 304 when the ETag matches
+            etag = '"{0}"'.format(hashlib.sha1(data).hexdigest())
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                code = 304
+                data = b""
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        if count:
+            self.server.stats.add_request(
+                self.command, self._request_size, len(data) + 160
+            )
+
+    def _session_id(self):
+        for cookie in self.headers.get_all("Cookie") or []:
+            for item in cookie.split(";"):
+                name, _, value = item.strip().partition("=")
+                if name == "id":
+                    return value
+        return None
+
+    def _route(self, method, url, query, body):
+        state = self.server.state
+        path = url.path
+        if "/rest/" not in path:
+            self._send(404, {"error": "Not found"})
+            return
+        # Accept any REST version, v1 included, in the path
+        resource = path.split("/rest/", 1)[1].split("/", 1)
+        resource = resource[1].strip("/") if len(resource) > 1 else ""
+        # Object keys, like interface names, are URL encoded in the path
+        segments = [unquote(segment) for segment in resource.split("/")]
+        resource = unquote(resource)
+
+        if resource == "login":
+            self._login(query, body)
+            return
+        session_id = self._session_id()
+        if session_id not in state.sessions:
+            self._send(401, {"error": "Authorization Required"})
+            return
+        if resource == "logout":
+            with state.lock:
+                state.sessions.discard(session_id)
+            self._send(200)
+            return
+
+        data = None
+        if body:
+            try:
+                data = json.loads(body.decode("utf-8"))
+            except ValueError:
+                # Multipart firmware uploads are not JSON
+                data = None
+
+        with state.lock:
+            if resource.startswith("firmware") or resource == "boot":
+                self._firmware(method, resource, query, body)
+            elif resource.startswith("fullconfigs"):
+                self._fullconfigs(method, resource, query, data)
+            elif resource == "system":
+                self._system(method, query, data)
+            elif resource == "system/vsx":
+                self._vsx(method, query, data)
+            elif resource.startswith("system/subsystems"):
+                self._subsystems(query)
+            elif resource.startswith("system/"):
+                self._table(method, segments, query, data)
+            else:
+                self._send(404, {"error": "Not found"})
+
+    def _login(self, query, body):
+        form = parse_qs(body.decode("utf-8")) if body else {}
+        username = (form.get("username") or query.get("username") or [""])[0]
+        if not username:
+            self._send(401, {"error": "Login failed"})
+            return
+        session_id = self.server.state.new_session()
+        self.server.stats.add_login()
+        self._send(
+            200,
+            headers={
+                "Set-Cookie": "id={0}; Path=/; HttpOnly".format(session_id),
+                "X-Csrf-Token": uuid.uuid4().hex,
+            },
+        )
+
+    def _firmware(self, method, resource, query, body=b""):
+        state = self.server.state
+        if resource == "boot":
+            image = query.get("image", ["primary"])[0]
+            state.firmware["booted_image"] = image
+            state.firmware["current_version"] = state.firmware[
+                image + "_version"
+            ]
+            self._send(200)
+        elif resource == "firmware/status":
+            self._send(200, state.firmware_status)
+        elif method == "GET":
+            self._send(200, state.firmware)
+        else:
+            image = query.get("image", ["primary"])[0]
+            source = query.get("from", [""])[0]
+            if not source and body:
+                # Local uploads, named after the image in the multipart body
+                match = re.search(rb'filename="([^"]+)"', body[:1024])
+                source = match.group(1).decode() if match else ""
+            status = {"status": "success", "reason": "", "date": 0}
+            if source.startswith("http"):
+                # Downloads the image like a switch, discarding it
+                try:
+                    with urlopen(source, timeout=30) as download:
+                        while download.read(1024 * 1024):
+                            pass
+                except Exception as e:
+                    status.update(status="failure", reason=str(e))
+            if source and status["status"] == "success":
+                version = os.path.basename(source).rsplit(".", 1)[0]
+                version = version.replace("_", ".")
+                state.firmware[image + "_version"] = version
+            status["date"] = int(time.time())
+            state.firmware_status = status
+            self._send(200)
+
+    def _vsx(self, method, query, data):
+        state = self.server.state
+        if method in ["POST", "PUT"]:
+            state.vsx = data
+            self._send(201 if method == "POST" else 200)
+        elif state.vsx is None:
+            self._send(404, {"error": "Object not found"})
+        elif method == "DELETE":
+            state.vsx = None
+            self._send(204)
+        else:
+            vsx = dict(state.vsx, oper_status=VSX_OPER_STATUS)
+            self._send(200, _select(vsx, query))
+
+    def _fullconfigs(self, method, resource, query, data):
+        state = self.server.state
+        parts = resource.split("/", 1)
+        if len(parts) == 1:
+            names = ["running-config", "startup-config"]
+            names.extend(state.fullconfigs)
+            self._send(
+                200,
+                {
+                    name: state.uri("fullconfigs", name)
+                    for name in dict.fromkeys(names)
+                },
+            )
+            return
+        name = parts[1]
+        if method == "GET":
+            if "to" in query:
+                self._send(200)
+            elif name == "running-config":
+                self._send(200, state.running_config())
+            elif name == "startup-config":
+                self._send(
+                    200,
+                    state.fullconfigs.get(name, state.running_config()),
+                )
+            elif name in state.fullconfigs:
+                self._send(200, state.fullconfigs[name])
+            else:
+                self._send(404, {"error": "Not found"})
+        elif method == "PUT":
+            source = query.get("from", [None])[0]
+            if source and "fullconfigs/" in source:
+                source_name = source.rsplit("/", 1)[1]
+                if source_name == "running-config":
+                    document = state.running_config()
+                else:
+                    document = state.fullconfigs.get(source_name)
+                document = copy.deepcopy(document)
+            else:
+                document = data
+            if name == "running-config":
+                state.running_config_override = document
+            else:
+                state.fullconfigs[name] = document
+            self._send(200)
+        elif method == "DELETE":
+            state.fullconfigs.pop(name, None)
+            self._send(204)
+        else:
+            self._send(405, {"error": "Method not allowed"})
+
+    def _system(self, method, query, data):
+        state = self.server.state
+        if method == "GET":
+            self._send(200, _select(state.system, query))
+        elif method in ("PUT", "PATCH"):
+            state.system.update(data or {})
+            self._send(200 if method == "PUT" else 204)
+        else:
+            self._send(405, {"error": "Method not allowed"})
+
+    def _subsystems(self, query):
+        state = self.server.state
+        interfaces = {
+            name: state.uri("system/interfaces", name)
+            for name in state.tables["system/interfaces"]
+        }
+        subsystem = {
+            "product_info": {
+                "product_name": "Simulated " + state.system["platform_name"]
+            },
+            "power_supplies": {"1/1": {"status": "ok"}},
+            "fans": {"1/1": {"status": "ok"}},
+            "resource_utilization": {"cpu": 5, "memory": 20},
+            "interfaces": interfaces,
+            "data_planes": {"1/1": {"interfaces": interfaces}},
+        }
+        self._send(200, {"chassis,1": _select(subsystem, query)})
+
+    def _table(self, method, segments, query, data):
+        state = self.server.state
+        # Tables and objects alternate below system: system/<table>/<key>
+        if len(segments) % 2 != 0:
+            table_path = "/".join(segments[:-1])
+            key = segments[-1]
+        else:
+            table_path = "/".join(segments)
+            key = None
+
+        if segments[-1] in CHILD_OBJECTS and key is None:
+            self._child_object(method, segments, query, data)
+            return
+
+        if "*" in table_path:
+            # Wildcards, like system/interfaces/*/lldp_neighbors, are
+            # answered with the union of the matching tables
+            self._send(200, {})
+            return
+
+        table = state.tables.get(table_path)
+        if table is None:
+            if not self._exists(segments[:-2] if key else segments[:-1]):
+                self._send(404, {"error": "Not found"})
+                return
+            table = state.tables.setdefault(table_path, OrderedDict())
+
+        table_name = table_path.rsplit("/", 1)[-1]
+        depth = int(query.get("depth", ["1"])[0])
+        if key is None:
+            if method == "GET":
+                if depth <= 1:
+                    payload = {
+                        name: state.uri(table_path, name) for name in table
+                    }
+                else:
+                    payload = {
+                        name: _select(obj, query, table_name)
+                        for name, obj in table.items()
+                    }
+                self._send(200, payload)
+            elif method == "POST":
+                indices = TABLE_INDICES.get(table_name)
+                if indices is None:
+                    indices = ["name"] if "name" in data else ["id"]
+                new_key = ",".join(str(data.get(index)) for index in indices)
+                if new_key in table:
+                    self._send(400, {"error": "Object already exists"})
+                    return
+                table[new_key] = _set_defaults(table_path, data)
+                self._send(201)
+            else:
+                self._send(405, {"error": "Method not allowed"})
+            return
+
+        if key not in table:
+            if method == "PUT" and data is not None:
+                table[key] = data
+                self._send(200)
+            else:
+                self._send(404, {"error": "Object not found"})
+            return
+        if method in ["PUT", "PATCH"] and data:
+            self._write_inline(table_path, key, data)
+        if method == "GET":
+            self._send(200, _select(table[key], query, table_name))
+        elif method == "PUT":
+            obj = table[key]
+            status = {
+                name: value
+                for name, value in obj.items()
+                if name in STATUS_ATTRIBUTES
+            }
+            obj.clear()
+            obj.update(data or {})
+            obj.update(status)
+            self._send(200)
+        elif method == "PATCH":
+            table[key].update(data or {})
+            self._send(204)
+        elif method == "DELETE":
+            del table[key]
+            for table_name in list(state.tables):
+                if table_name.startswith(table_path + "/" + key + "/"):
+                    del state.tables[table_name]
+            self._send(204)
+        else:
+            self._send(405, {"error": "Method not allowed"})
+
+    def _child_object(self, method, segments, query, data):
+        state = self.server.state
+        if not self._exists(segments[:-1]):
+            self._send(404, {"error": "Not found"})
+            return
+        obj = state.child_objects.setdefault(
+            "/".join(segments), copy.deepcopy(CHILD_OBJECTS[segments[-1]])
+        )
+        if method == "GET":
+            self._send(200, _select(obj, query))
+        elif method in ("PUT", "PATCH"):
+            if method == "PUT":
+                obj.clear()
+            obj.update(data or {})
+            self._send(200 if method == "PUT" else 204)
+        else:
+            self._send(405, {"error": "Method not allowed"})
+
+    def _write_inline(self, table_path, key, data):
+        """
+        Replaces the child table written inline in an object, removing it
+        from the object data.
+        """
+        child = INLINE_TABLES.get(table_path.rsplit("/", 1)[-1])
+        if child is None or not isinstance(data.get(child), dict):
+            return
+        indices = TABLE_INDICES.get(child, ["id"])
+        rows = OrderedDict()
+        for child_key, obj in data.pop(child).items():
+            obj = dict(obj)
+            # The keys of the dict are the index of the objects
+            obj.setdefault(indices[0], int(child_key))
+            rows[str(child_key)] = obj
+        child_path = "/".join([table_path, key, child])
+        self.server.state.tables[child_path] = rows
+
+    def _exists(self, segments):
+        if len(segments) == 1:
+            return True
+        table = self.server.state.tables.get("/".join(segments[:-1]), {})
+        return segments[-1] in table
+
+
+class Simulator(ThreadingHTTPServer):
+    """
+    HTTPS server simulating the REST API of an AOS-CX switch.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address,
+        state,
+        latency=0.0,
+        jitter=0.0,
+        certfile=None,
+        keyfile=None,
+        verbose=False,
+    ):
+        ThreadingHTTPServer.__init__(self, address, SimulatorHandler)
+        self.state = state
+        self.stats = Stats()
+        self.latency = latency
+        self.jitter = jitter
+        self.verbose = verbose
+        self._tmpdir = None
+        if certfile is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="aoscx-simulator-")
+            certfile, keyfile = create_certificate(self._tmpdir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def start(self):
+        """
+        Serves requests from a background thread.
+        """
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def server_close(self):
+        ThreadingHTTPServer.server_close(self)
+        if self._tmpdir:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+
+def create_certificate(directory):
+    """
+    Creates a self-signed certificate with the openssl command line tool.
+    """
+    certfile = os.path.join(directory, "cert.pem")
+    keyfile = os.path.join(directory, "key.pem")
+    subprocess.check_call(
+        [
+            "openssl",
+            "req",
+            "-x509",
+            "-newkey",
+            "rsa:2048",
+            "-nodes",
+            "-days",
+            "1",
+            "-subj",
+            "/CN=aoscx-simulator",
+            "-keyout",
+            keyfile,
+            "-out",
+            certfile,
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return certfile, keyfile
+
+
+def build_simulator(args):
+    state = SwitchState(
+        rest_version=args.rest_version,
+        vlans=args.vlans,
+        interfaces=args.interfaces,
+        macs=args.macs,
+        firmware=args.firmware,
+        platform=args.platform,
+        internal_vlans=args.internal_vlans,
+    )
+    return Simulator(
+        (args.address, args.port),
+        state,
+        latency=args.latency / 1000.0,
+        jitter=args.jitter / 1000.0,
+        certfile=args.certfile,
+        keyfile=args.keyfile,
+        verbose=args.verbose,
+    )
+
+
+def add_arguments(parser):
+    """
+    Adds the simulator options to an argparse parser.
+    """
+    parser.add_argument("--address", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--rest-version", default=DEFAULT_REST_VERSION)
+    parser.add_argument("--vlans", type=int, default=64)
+    parser.add_argument("--interfaces", type=int, default=48)
+    parser.add_argument("--macs", type=int, default=0)
+    parser.add_argument(
+        "--internal-vlans",
+        type=int,
+        default=2,
+        help="Internal VLANs reserved by the switch, above --vlans",
+    )
+    parser.add_argument("--firmware", default=DEFAULT_FIRMWARE)
+    parser.add_argument("--platform", default=DEFAULT_PLATFORM)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.0,
+        help="Latency added to every request, in milliseconds",
+    )
+    parser.add_argument(
+        "--jitter",
+        type=float,
+        default=0.0,
+        help="Maximum random latency added on top of --latency, in ms",
+    )
+    parser.add_argument("--certfile")
+    parser.add_argument("--keyfile")
+    parser.add_argument("--verbose", action="store_true")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    add_arguments(parser)
+    args = parser.parse_args()
+    simulator = build_simulator(args)
+    print(
+        "AOS-CX simulator listening on https://{0}:{1}{2}".format(
+            args.address, simulator.port, simulator.state.prefix
+        )
+    )
+    try:
+        simulator.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.server_close()
+
+
+if __name__ == "__main__":
+    main()
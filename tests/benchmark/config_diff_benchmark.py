@@ -0,0 +1,215 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Times the configuration differences computed by aoscx_config.
+
+A synthetic AOS-CX running-config (VLANs, interfaces, access-lists and
+routing blocks) of about --lines lines is generated, then the candidates of
+every scenario are compared against it with the AoscxConfig index used by
+the module and, with --compare, with the netcommon NetworkConfig it replaced,
+checking both return the same commands. NetworkConfig is quadratic, keep
+--lines to a few thousand when comparing.
+
+Example:
+    python config_diff_benchmark.py --lines 50000
+    python config_diff_benchmark.py --lines 5000 --compare
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import sys
+import time
+
+from ansible_collections.ansible.netcommon.plugins.module_utils.network.common.config import (  # NOQA
+    NetworkConfig,
+    dumps,
+)
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx_config import (  # NOQA
+    AoscxConfig,
+)
+
+# Lines of an interface block, a config is mostly made of these
+INTERFACE_LINES = [
+    "    description uplink {0}",
+    "    no shutdown",
+    "    mtu 9198",
+    "    vlan trunk native 1",
+    "    vlan trunk allowed {1}",
+    "    lldp receive",
+    "    lldp transmit",
+    "    spanning-tree bpdu-guard",
+    "    apply access-list ip acl{2} in",
+]
+
+
+def running_config(lines):
+    """
+    Returns a running-config of about the given number of lines.
+    """
+    config = ["hostname bench", "user admin group administrators"]
+    vlans = max(1, lines // 20)
+    acls = max(1, lines // 100)
+    interfaces = max(1, (lines - 3 * vlans - 21 * acls) // 10)
+    for acl in range(1, acls + 1):
+        config.append("access-list ip acl{0}".format(acl))
+        for seq in range(10, 210, 10):
+            config.append(
+                "    {0} permit tcp 10.{1}.{2}.0/24 any eq {3}".format(
+                    seq, acl % 256, seq // 10, 1000 + seq
+                )
+            )
+    for vlan in range(1, vlans + 1):
+        config.append("vlan {0}".format(vlan))
+        config.append("    name VLAN{0}".format(vlan))
+        config.append("    description bench {0}".format(vlan))
+    for index in range(interfaces):
+        name = "{0}/{1}/{2}".format(
+            index // 2048 + 1, index // 64 % 32 + 1, index % 64 + 1
+        )
+        config.append("interface {0}".format(name))
+        for line in INTERFACE_LINES:
+            config.append(
+                line.format(name, index % vlans + 1, index % acls + 1)
+            )
+    config.extend(
+        [
+            "router ospf 1",
+            "    router-id 10.0.0.1",
+            "    area 0.0.0.0",
+            "https-server vrf mgmt",
+        ]
+    )
+    return config
+
+
+def modified(config, every):
+    """
+    Returns the config with one line out of every changed.
+    """
+    return [
+        (
+            line + " changed"
+            if index % every == 0 and line.startswith("    ")
+            else line
+        )
+        for index, line in enumerate(config)
+    ]
+
+
+def scenarios(config):
+    """
+    Returns the name, candidate lines, parents and difference arguments of
+        every scenario.
+    """
+    interface = next(
+        index
+        for index in range(len(config) // 2, len(config))
+        if config[index].startswith("interface ")
+    )
+    block = [line.strip() for line in config[interface + 1 : interface + 10]]
+    block[2] = "mtu 1500"
+    acl = config.index("access-list ip acl1")
+    return [
+        ("src, match line", modified(config, 100), None, "line", "line"),
+        (
+            "lines, match line",
+            [line for line in config if line.startswith("vlan ")]
+            + ["vlan 5000"],
+            None,
+            "line",
+            "line",
+        ),
+        ("parents, match line", block, [config[interface]], "line", "line"),
+        (
+            "parents, match strict",
+            block,
+            [config[interface]],
+            "strict",
+            "line",
+        ),
+        ("parents, match exact", block, [config[interface]], "exact", "line"),
+        (
+            "parents, replace block",
+            [line.strip() for line in config[acl + 1 : acl + 21]]
+            + ["500 deny any any any"],
+            [config[acl]],
+            "line",
+            "block",
+        ),
+    ]
+
+
+def run(cls, running, candidate, parents, match, replace):
+    start = time.time()
+    config = cls(indent=1, contents=running)
+    if parents is None and match == "line" and replace == "line":
+        candidate_config = cls(indent=1, contents="\n".join(candidate))
+    else:
+        candidate_config = cls()
+        candidate_config.add(candidate, parents=parents or [])
+    updates = candidate_config.difference(
+        config, match=match, replace=replace, path=parents
+    )
+    commands = dumps(updates, "commands")
+    return time.time() - start, commands
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--lines",
+        type=int,
+        default=50000,
+        help="Approximate number of lines of the running-config",
+    )
+    parser.add_argument(
+        "--compare",
+        action="store_true",
+        help="Also time NetworkConfig and check it returns the same commands",
+    )
+    options = parser.parse_args()
+
+    config = running_config(options.lines)
+    running = "\n".join(config)
+    print("running-config: {0} lines".format(len(config)))
+    header = "{0:<24} {1:>9} {2:>14} {3:>9}".format(
+        "scenario", "commands", "NetworkConfig", "indexed"
+    )
+    print(header)
+    print("-" * len(header))
+
+    failed = False
+    for name, candidate, parents, match, replace in scenarios(config):
+        elapsed, commands = run(
+            AoscxConfig, running, candidate, parents, match, replace
+        )
+        reference = "-"
+        if options.compare:
+            reference_elapsed, reference_commands = run(
+                NetworkConfig, running, candidate, parents, match, replace
+            )
+            reference = "{0:.3f}".format(reference_elapsed)
+            if reference_commands != commands:
+                reference += " DIFFERS"
+                failed = True
+        print(
+            "{0:<24} {1:>9} {2:>14} {3:>9.3f}".format(
+                name,
+                len(commands.splitlines()),
+                reference,
+                elapsed,
+            )
+        )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
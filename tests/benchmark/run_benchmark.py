@@ -0,0 +1,529 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Runs the modules of the collection against the AOS-CX REST simulator.
+
+Each module with a scenario is run in its own play, the task repeated
+--repeat times over one persistent connection, and the benchmark reports the
+wall time of every task together with the REST requests, bytes and TLS
+connections it caused on the simulator. Results can be saved with --output
+and compared against a previous run with --baseline, the script exits with
+an error when a module got slower, or issued more requests, than the
+baseline allows.
+
+Example:
+    python run_benchmark.py --latency 20 --repeat 5 --output current.json
+    python run_benchmark.py --latency 20 --baseline current.json
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import xml.etree.ElementTree as ET
+
+from aoscx_simulator import add_arguments, build_simulator
+
+import requests
+import urllib3
+
+COLLECTION_ROOT = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir, os.pardir)
+)
+
+# Module arguments of the task run by every scenario. Scenarios run in this
+# order on the same simulator, some use the objects created by the previous
+# ones (ACLs, QoS profiles, OSPF routers and areas, backups). files are
+# created in the temporary directory before the play, with their size.
+SCENARIOS = {
+    "aoscx_facts": {"gather_subset": ["host_name", "platform_name"]},
+    "aoscx_facts_subsystems": {
+        "module": "aoscx_facts",
+        "gather_subset": ["physical_interfaces", "fans", "power_supplies"],
+    },
+    "aoscx_facts_resources": {
+        "module": "aoscx_facts",
+        "gather_subset": ["host_name"],
+        "gather_network_resources": [
+            "interfaces",
+            "vlans",
+            "vrfs",
+            "lldp_neighbors",
+        ],
+    },
+    "aoscx_facts_fields": {
+        "module": "aoscx_facts",
+        "gather_subset": ["host_name", "physical_interfaces"],
+        "gather_network_resources": ["interfaces"],
+        "fields": {
+            "interfaces": ["admin_state", "link_state", "description"],
+            "physical_interfaces": ["name"],
+        },
+    },
+    "aoscx_vlan": {"vlan_id": 2, "name": "VLAN2", "description": "bench"},
+    "aoscx_vrf": {"name": "bench"},
+    "aoscx_interface": {
+        "name": "1/1/1",
+        "enabled": True,
+        "description": "bench",
+    },
+    "aoscx_static_mac": {
+        "vlan": 1,
+        "mac_addr": "aa:bb:cc:dd:ee:ff",
+        "port": "1/1/2",
+    },
+    "aoscx_acl": {
+        "name": "bench",
+        "type": "ipv4",
+        "acl_entries": {
+            "10": {"action": "permit", "src_ip": "10.0.0.0/8"},
+        },
+    },
+    "aoscx_acl_bulk": {
+        "module": "aoscx_acl",
+        "name": "bench_bulk",
+        "type": "ipv4",
+        "acl_entries": dict(
+            (
+                str(index * 10),
+                {
+                    "action": "permit",
+                    "src_ip": "10.{0}.{1}.0/24".format(
+                        index // 256, index % 256
+                    ),
+                },
+            )
+            for index in range(1, 501)
+        ),
+        "bulk": "replace",
+    },
+    "aoscx_backup_config": {
+        "config_name": "running-config",
+        "output_file": "{tmpdir}/running-config.json",
+    },
+    "aoscx_checkpoint": {
+        "source_config": "running-config",
+        "destination_config": "bench",
+    },
+    "aoscx_vlan_aggregate": {
+        "module": "aoscx_vlan",
+        "vlans": [{"vlan_id": "100-199", "name": "VLAN{id}"}],
+        "state": "merged",
+    },
+    "aoscx_interfaces": {
+        "interfaces": [
+            {"name": "1/1/10-1/1/20", "description": "bench", "enabled": True}
+        ],
+        "state": "merged",
+    },
+    "aoscx_acl_interface": {
+        "acl_name": "bench",
+        "acl_type": "ipv4",
+        "acl_interface_list": ["1/1/3"],
+    },
+    "aoscx_acl_vlan": {
+        "acl_name": "bench",
+        "acl_type": "ipv4",
+        "acl_vlan_list": [2],
+    },
+    "aoscx_object_group": {
+        "name": "bench",
+        "type": "ipv4",
+        "addresses": {"10": "10.0.0.1"},
+    },
+    "aoscx_banner": {"banner_type": "banner", "banner": "bench"},
+    "aoscx_dns": {
+        "vrf": "mgmt",
+        "domain_name": "example.com",
+        "name_servers": {"0": "4.4.4.8"},
+    },
+    "aoscx_system": {"global_qos_trust_mode": "dscp"},
+    "aoscx_l2_interface": {
+        "interface": "1/1/4",
+        "vlan_mode": "access",
+        "vlan_access": "2",
+    },
+    "aoscx_l3_interface": {"interface": "1/1/5", "ipv4": ["10.1.1.1/24"]},
+    "aoscx_lag_interface": {"name": "lag1", "interfaces": ["1/1/6"]},
+    "aoscx_vlan_interface": {"vlan_id": "2", "ipv4": ["10.2.0.1/24"]},
+    "aoscx_poe": {"interface": "1/1/8", "enable": True},
+    "aoscx_static_route": {
+        "vrf_name": "default",
+        "destination_address_prefix": "1.1.1.0/24",
+        "type": "forward",
+        "next_hop_ip_address": "2.2.2.2",
+    },
+    "aoscx_ospf_router": {"vrf": "default", "instance_tag": 1},
+    "aoscx_ospf_area": {"vrf": "default", "ospf_id": 1, "area_id": "0.0.0.1"},
+    "aoscx_ospf_interface": {
+        "vrf": "default",
+        "version": "v2",
+        "ospf_id": 1,
+        "area_id": "0.0.0.1",
+        "interface_name": "1/1/7",
+    },
+    "aoscx_ospf_vlink": {
+        "vrf": "default",
+        "ospf_id": 1,
+        "area_id": "0.0.0.1",
+        "peer_router_id": "10.0.0.1",
+    },
+    "aoscx_ospfv3_router": {"vrf": "default", "instance_tag": 1},
+    "aoscx_ospfv3_area": {
+        "vrf": "default",
+        "ospf_id": 1,
+        "area_id": "0.0.0.1",
+    },
+    "aoscx_ospfv3_vlink": {
+        "vrf": "default",
+        "ospf_id": 1,
+        "area_id": "0.0.0.1",
+        "peer_router_id": "10.0.0.1",
+    },
+    "aoscx_qos": {"name": "bench"},
+    "aoscx_queue": {"qos_name": "bench", "queue_number": 1},
+    "aoscx_qos_cos": {"code_point": 3, "description": "bench"},
+    "aoscx_qos_dscp": {"code_point": 3, "description": "bench"},
+    "aoscx_queue_profile": {"name": "bench"},
+    "aoscx_queue_profile_entry": {
+        "queue_profile": "bench",
+        "queue_number": 1,
+        "local_priorities": [1],
+    },
+    "aoscx_vsx": {
+        "device_role": "primary",
+        "isl_port": "1/1/9",
+        "keepalive_peer_ip": "10.9.0.2",
+        "keepalive_src_ip": "10.9.0.1",
+    },
+    "aoscx_mac": {"vlan": 1},
+    "aoscx_patch_config": {
+        "config": {"Vlan": {"3": {"id": 3, "name": "bench"}}},
+    },
+    # The backup of aoscx_backup_config, in the schema of the fullconfig JSON
+    "aoscx_patch_config_backup": {
+        "module": "aoscx_patch_config",
+        "src": "{tmpdir}/running-config.json",
+        "state": "overridden",
+    },
+    "aoscx_upload_config": {
+        "config_name": "startup-config",
+        "config_json": "{tmpdir}/running-config.json",
+    },
+    "aoscx_fleet_backup": {"dest": "{tmpdir}/fleet-backup"},
+    "aoscx_boot_firmware": {"partition_name": "primary"},
+    "aoscx_firmware_distribute": {
+        "src": "{tmpdir}/GL_10_13_1001.swi",
+        "partition_name": "secondary",
+        "files": {"GL_10_13_1001.swi": 4 << 20},
+    },
+    "aoscx_firmware_status": {},
+    "aoscx_fleet_upgrade": {
+        "src": "{tmpdir}/GL_10_13_1002.swi",
+        "boot_timeout": 60,
+        "poll_interval": 1,
+        "files": {"GL_10_13_1002.swi": 4 << 20},
+    },
+}
+
+# Modules of the collection without a scenario, and why
+EXCLUDED = {
+    "aoscx_command": "runs CLI commands over SSH, the simulator only serves "
+    "the REST API",
+    "aoscx_config": "configures the switch through the CLI over SSH, the "
+    "simulator only serves the REST API",
+    "aoscx_upload_firmware": "reopens a pyaoscx session, whose login fails "
+    "the cookie check when ansible_host has a port, like the simulator's",
+}
+
+
+def collections_path(tmpdir):
+    """
+    Returns the collections path to reach this collection, linking the
+    repository into a temporary ansible_collections tree if needed.
+    """
+    parent = os.path.dirname(os.path.dirname(COLLECTION_ROOT))
+    if os.path.basename(parent) == "ansible_collections":
+        path = os.path.dirname(parent)
+    else:
+        namespace = os.path.join(
+            tmpdir, "ansible_collections", "arubanetworks"
+        )
+        os.makedirs(namespace)
+        os.symlink(COLLECTION_ROOT, os.path.join(namespace, "aoscx"))
+        path = tmpdir
+    extra = os.environ.get("ANSIBLE_COLLECTIONS_PATH")
+    return os.pathsep.join([path, extra]) if extra else path
+
+
+def write_playbook(tmpdir, name, args, repeat):
+    args = dict(args)
+    module = args.pop("module", name)
+    for filename, size in args.pop("files", {}).items():
+        with open(os.path.join(tmpdir, filename), "wb") as data:
+            data.truncate(size)
+    args = json.loads(json.dumps(args).replace("{tmpdir}", tmpdir))
+    tasks = [
+        {
+            "name": "{0} {1}".format(name, index),
+            "arubanetworks.aoscx." + module: args,
+        }
+        for index in range(repeat)
+    ]
+    play = {
+        "name": name,
+        "hosts": "all",
+        "gather_facts": False,
+        "tasks": tasks,
+    }
+    path = os.path.join(tmpdir, name + ".yml")
+    with open(path, "w") as playbook:
+        # JSON is valid YAML
+        json.dump([play], playbook, indent=2)
+    return path
+
+
+def write_inventory(tmpdir, port, rest_version):
+    """
+    Writes the inventory of the simulator, the connection variables are host
+    variables so action plugins reaching the switches find them.
+    """
+    host_vars = {
+        "ansible_connection": "arubanetworks.aoscx.aoscx",
+        "ansible_network_os": "arubanetworks.aoscx.aoscx",
+        "ansible_host": "127.0.0.1:{0}".format(port),
+        "ansible_user": "admin",
+        "ansible_password": "admin",
+        "ansible_aoscx_validate_certs": False,
+        "ansible_aoscx_use_proxy": False,
+        "ansible_aoscx_rest_version": rest_version,
+        "ansible_python_interpreter": sys.executable,
+    }
+    path = os.path.join(tmpdir, "inventory.yml")
+    with open(path, "w") as inventory:
+        json.dump({"all": {"hosts": {"simulator": host_vars}}}, inventory)
+    return path
+
+
+def task_times(junit_dir):
+    """
+    Reads the task times from the report of the junit callback.
+    """
+    times = []
+    for filename in sorted(os.listdir(junit_dir)):
+        tree = ET.parse(os.path.join(junit_dir, filename))
+        for case in tree.iter("testcase"):
+            failed = (
+                case.find("failure") is not None
+                or case.find("error") is not None
+            )
+            times.append((float(case.get("time", 0)), failed))
+    return times
+
+
+# Kept open so reading the counters doesn't count as a new connection
+STATS_SESSION = requests.Session()
+
+
+def stats(url, reset=False):
+    method = "DELETE" if reset else "GET"
+    return STATS_SESSION.request(method, url, verify=False).json()
+
+
+def run_scenario(name, args, options, inventory, stats_url, tmpdir, env):
+    playbook = write_playbook(tmpdir, name, args, options.repeat)
+    junit_dir = os.path.join(tmpdir, "junit-" + name)
+    os.makedirs(junit_dir)
+    stats(stats_url, reset=True)
+    process = subprocess.run(
+        [
+            "ansible-playbook",
+            "-i",
+            inventory,
+            playbook,
+        ],
+        env=dict(env, JUNIT_OUTPUT_DIR=junit_dir),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        universal_newlines=True,
+    )
+    counters = stats(stats_url)
+    times = task_times(junit_dir)
+    result = dict(
+        tasks=len(times),
+        failed=process.returncode != 0 or any(f for t, f in times),
+        wall_time=sum(t for t, f in times),
+        first_task=times[0][0] if times else 0.0,
+        mean_task=(sum(t for t, f in times) / len(times)) if times else 0.0,
+        requests=counters["requests"],
+        requests_per_task=(
+            float(counters["requests"]) / len(times) if times else 0.0
+        ),
+        connections=counters["connections"],
+        logins=counters["logins"],
+        bytes_in=counters["bytes_in"],
+        bytes_out=counters["bytes_out"],
+        methods=counters["methods"],
+    )
+    if result["failed"] and options.verbose:
+        print(process.stdout)
+    return result
+
+
+def compare(results, baseline, tolerance):
+    """
+    Returns the regressions of results against a baseline.
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or result["failed"] or previous["failed"]:
+            continue
+        for metric in ("mean_task", "requests_per_task"):
+            limit = previous[metric] * (1 + tolerance)
+            if result[metric] > limit and result[metric] > 0:
+                regressions.append(
+                    "{0}: {1} {2:.3f} > {3:.3f} (baseline {4:.3f})".format(
+                        name, metric, result[metric], limit, previous[metric]
+                    )
+                )
+    return regressions
+
+
+def report(results, modules):
+    header = "{0:<26} {1:>6} {2:>9} {3:>9} {4:>8} {5:>6} {6:>11}".format(
+        "scenario",
+        "tasks",
+        "first(s)",
+        "mean(s)",
+        "req/task",
+        "conns",
+        "bytes out",
+    )
+    print(header)
+    print("-" * len(header))
+    for name in sorted(results):
+        result = results[name]
+        if result["failed"]:
+            print("{0:<26} FAILED".format(name))
+            continue
+        print(
+            "{0:<26} {1:>6} {2:>9.3f} {3:>9.3f} {4:>8.1f} {5:>6} {6:>11}".format(
+                name,
+                result["tasks"],
+                result["first_task"],
+                result["mean_task"],
+                result["requests_per_task"],
+                result["connections"],
+                result["bytes_out"],
+            )
+        )
+    covered = set(args.get("module", name) for name, args in SCENARIOS.items())
+    excluded = sorted(set(modules) & set(EXCLUDED))
+    if excluded:
+        print("\nExcluded:")
+        for name in excluded:
+            print("  {0}: {1}".format(name, EXCLUDED[name]))
+    missing = sorted(set(modules) - covered - set(EXCLUDED))
+    if missing:
+        print("\nNo scenario: " + ", ".join(missing))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    add_arguments(parser)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="Number of times the task of each scenario is run",
+    )
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        help="Scenario to run, can be repeated, defaults to all",
+    )
+    parser.add_argument("--output", help="Saves the results to a JSON file")
+    parser.add_argument(
+        "--baseline", help="JSON results of a previous run to compare with"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative slowdown against the baseline",
+    )
+    options = parser.parse_args()
+    urllib3.disable_warnings()
+
+    modules = sorted(
+        filename[:-3]
+        for filename in os.listdir(
+            os.path.join(COLLECTION_ROOT, "plugins", "modules")
+        )
+        if filename.startswith("aoscx_") and filename.endswith(".py")
+    )
+    scenarios = options.scenario or list(SCENARIOS)
+
+    tmpdir = tempfile.mkdtemp(prefix="aoscx-benchmark-")
+    simulator = build_simulator(options)
+    simulator.start()
+    env = dict(
+        os.environ,
+        ANSIBLE_COLLECTIONS_PATH=collections_path(tmpdir),
+        ANSIBLE_CALLBACKS_ENABLED="junit",
+        ANSIBLE_HOST_KEY_CHECKING="False",
+        ANSIBLE_PERSISTENT_CONNECT_TIMEOUT="60",
+        ANSIBLE_NOCOLOR="1",
+    )
+    inventory = write_inventory(tmpdir, simulator.port, options.rest_version)
+    stats_url = "https://127.0.0.1:{0}/__stats__".format(simulator.port)
+    results = {}
+    try:
+        for name in scenarios:
+            results[name] = run_scenario(
+                name,
+                SCENARIOS[name],
+                options,
+                inventory,
+                stats_url,
+                tmpdir,
+                env,
+            )
+    finally:
+        simulator.shutdown()
+        simulator.server_close()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    report(results, modules)
+
+    if options.output:
+        with open(options.output, "w") as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    failed = [name for name, result in results.items() if result["failed"]]
+    if options.baseline:
+        with open(options.baseline) as baseline:
+            regressions = compare(
+                results, json.load(baseline), options.tolerance
+            )
+        if regressions:
+            print("\nRegressions:\n  " + "\n  ".join(regressions))
+            return 1
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# (C) Copyright 2024 Hewlett Packard Enterprise Development LP.
+# GNU General Public License v3.0+
+# (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+"""
+Times the sorted JSON written by aoscx_backup_config with sort_json.
+
+A synthetic fullconfig JSON document of about --size megabytes is generated,
+then written sorted with dump_sorted_json, and, for reference, with the
+previous implementation, sorting the whole document with comp_sort before
+json.dumps. Both outputs are checked to be identical.
+
+Example:
+    python sort_json_benchmark.py --size 10
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import argparse
+import io
+import json
+import random
+import re
+import sys
+import time
+from collections import OrderedDict
+
+from ansible_collections.arubanetworks.aoscx.plugins.module_utils.aoscx import (  # NOQA
+    dump_sorted_json,
+)
+
+
+def legacy_natural_sort_key(s):
+    _nsre = re.compile(r"\.*(\d+)$")
+    if "%2F" in s:
+        s = s.replace("%2F", "")
+    return [
+        int(text) if text.isdigit() else text.lower()
+        for text in re.split(_nsre, s)
+    ]
+
+
+def legacy_comp_sort(obj):
+    """
+    comp_sort before dump_sorted_json, limited to the lists of strings it
+    could sort.
+    """
+    data = OrderedDict()
+    if isinstance(obj, dict):
+        for key, value in sorted(
+            obj.items(), key=lambda x: legacy_natural_sort_key(x[0])
+        ):
+            if isinstance(value, dict) or isinstance(value, list):
+                data[key] = legacy_comp_sort(value)
+            else:
+                data[key] = value
+    elif isinstance(obj, list):
+        return sorted(obj, key=legacy_natural_sort_key)
+    return data
+
+
+def interface(rng, name, vlans):
+    return {
+        "name": name,
+        "description": "port {0}".format(name),
+        "admin": rng.choice(["up", "down"]),
+        "mtu": 9198,
+        "routing": False,
+        "vlan_mode": "native-untagged",
+        "vlan_tag": str(rng.randint(1, vlans)),
+        "vlan_trunks": [
+            str(rng.randint(1, vlans)) for i in range(rng.randint(1, 16))
+        ],
+        "lldp_enable_dir": "rxtx",
+        "other_config": {
+            "stp_bpdu_guard": "true",
+            "lacp-port-priority": "1",
+        },
+        "user_config": {"admin": "up", "speeds": "1000,10000"},
+    }
+
+
+def fullconfig(size):
+    """
+    Returns a fullconfig document of about size bytes, with its keys shuffled
+    """
+    rng = random.Random(0)
+    vlans = 4094
+    config = {
+        "System": {"hostname": "bench", "other_config": {}},
+        "VLAN": {},
+        "Interface": {},
+        "ACL": {},
+    }
+    for vlan in range(1, vlans + 1):
+        config["VLAN"][str(vlan)] = {
+            "id": vlan,
+            "name": "VLAN{0}".format(vlan),
+            "admin": "up",
+            "vsx_sync": ["all_attributes_and_dependents"],
+        }
+    acl = 0
+    index = 0
+    while len(json.dumps(config)) < size:
+        for i in range(256):
+            name = "{0}/{1}/{2}".format(
+                index // 4096 + 1, index // 64 % 64 + 1, index % 64 + 1
+            )
+            config["Interface"][name.replace("/", "%2F")] = interface(
+                rng, name, vlans
+            )
+            index += 1
+        acl += 1
+        config["ACL"]["acl{0},ipv4".format(acl)] = {
+            "name": "acl{0}".format(acl),
+            "list_type": "ipv4",
+            "cfg_aces": {
+                str(seq): {
+                    "action": "permit",
+                    "src_ip": "10.{0}.{1}.0/255.255.255.0".format(
+                        acl % 256, seq % 256
+                    ),
+                }
+                for seq in range(10, 1010, 10)
+            },
+        }
+    return shuffle(config, rng)
+
+
+def shuffle(obj, rng):
+    if isinstance(obj, dict):
+        items = list(obj.items())
+        rng.shuffle(items)
+        return dict((key, shuffle(value, rng)) for key, value in items)
+    if isinstance(obj, list):
+        items = list(obj)
+        rng.shuffle(items)
+        return items
+    return obj
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument(
+        "--size",
+        type=float,
+        default=10,
+        help="Approximate size of the document, in megabytes",
+    )
+    options = parser.parse_args()
+
+    config = fullconfig(int(options.size * 1024 * 1024))
+
+    start = time.time()
+    legacy = json.dumps(legacy_comp_sort(config), indent=4)
+    legacy_elapsed = time.time() - start
+
+    output = io.StringIO()
+    start = time.time()
+    dump_sorted_json(config, output, indent=4)
+    elapsed = time.time() - start
+
+    print("document: {0:.1f} MB".format(len(legacy) / 1024.0 / 1024.0))
+    print("comp_sort + json.dumps: {0:.3f}s".format(legacy_elapsed))
+    print("dump_sorted_json:       {0:.3f}s".format(elapsed))
+    if output.getvalue() != legacy:
+        print("Outputs differ")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())